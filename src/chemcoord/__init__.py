@@ -22,8 +22,12 @@ from chemcoord.utilities._print_versions import show_versions
 from chemcoord.cartesian_coordinates.cartesian_class_main import Cartesian
 from chemcoord.cartesian_coordinates.asymmetric_unit_cartesian_class import \
     AsymmetricUnitCartesian
+from chemcoord.cartesian_coordinates.cartesian_trajectory_class import \
+    CartesianTrajectory
 import chemcoord.cartesian_coordinates.xyz_functions as xyz_functions
 from chemcoord.internal_coordinates.zmat_class_main import Zmat
+from chemcoord.internal_coordinates.zmat_trajectory_class import \
+    ZmatTrajectory
 import chemcoord.internal_coordinates.zmat_functions as zmat_functions
 import chemcoord.configuration as configuration
 from chemcoord.configuration import settings
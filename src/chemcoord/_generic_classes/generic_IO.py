@@ -16,7 +16,10 @@ class GenericIO(object):
             else:
                 return x
         new = self.copy()
+        frame = new._frame
         for col in self.columns.drop('atom'):
             if self[col].dtype == np.dtype('O'):
-                new._frame.loc[:, col] = self[col].apply(formatter)
+                frame.loc[:, col] = self[col].apply(formatter)
+        # Assigning the frame discards a stale columnar storage.
+        new._frame = frame
         return new
@@ -57,6 +57,27 @@ class GenericCore(object):
         new_frame.index = self.index
         return self.__class__(pd.concat([self._frame, new_frame], axis=1))
 
+    def _get_masses(self):
+        """Return the masses as array without creating a new instance.
+
+        If there is a ``'mass'`` column, it is used.
+        """
+        try:
+            return self.loc[:, 'mass'].values.astype('f8')
+        except KeyError:
+            return constants.elements.loc[self['atom'], 'mass'].values
+
+    @staticmethod
+    def _get_series_values(series, columns):
+        """Return the values of a Series operand.
+
+        A Series with exactly the labels ``columns`` is aligned to them,
+        any other Series is used by position.
+        """
+        if set(series.index) == set(columns):
+            return series.reindex(columns).values
+        return series.values
+
     def get_total_mass(self):
         """Returns the total mass in g/mol.
 
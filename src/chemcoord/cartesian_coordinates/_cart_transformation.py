@@ -984,6 +984,28 @@ def get_C(X, c_table):
     return (ERR_CODE_OK, C)
 
 
+@jit(nopython=True, cache=True)
+def get_C_batch(X, c_table):
+    """Batched version of :func:`get_C`.
+
+    Args:
+        X (np.array): An array of shape ``(n_frames, 3, n_atoms)``.
+        c_table (np.array): The positional construction table
+            of shape ``(3, n_atoms)``, which is shared by all frames.
+
+    Returns:
+        tuple: ``(err, C)`` where ``err`` is an array
+        of length ``n_frames`` and ``C`` has the same shape as ``X``.
+    """
+    n_frames = X.shape[0]
+    C = np.empty_like(X)
+    err = np.empty(n_frames, dtype=nb.i8)
+    for k in range(n_frames):
+        err[k], C_k = get_C(X[k], c_table)
+        C[k] = C_k
+    return err, C
+
+
 @jit(nopython=True, cache=True)
 def get_grad_C(X, c_table):
     n_atoms = X.shape[1]
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals, with_statement)
+
+import warnings
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from chemcoord.cartesian_coordinates._cartesian_class_get_zmat import \
+    CartesianGetZmat
+from chemcoord.configuration import settings
+
+
+class CartesianConformers(CartesianGetZmat):
+    def _get_fragment(self, i, j, bond_dict):
+        """Return the atoms that are connected to i,
+        if the bond between i and j is cut."""
+        visited, to_visit = {i}, [k for k in bond_dict[i] if k != j]
+        while to_visit:
+            k = to_visit.pop()
+            if k not in visited:
+                visited.add(k)
+                to_visit.extend(set(bond_dict[k]) - visited)
+        return visited
+
+    def _is_in_ring(self, i, j, bond_dict):
+        """Test if the bond between i and j is part of a ring."""
+        return j in self._get_fragment(i, j, bond_dict)
+
+    def get_rotatable_bonds(self, use_lookup=None):
+        """Return the rotatable bonds.
+
+        A bond is considered to be rotatable, if it is not part of a ring
+        and both atoms have further bonding partners.
+
+        Args:
+            use_lookup (bool): Use a lookup variable for
+                :meth:`~chemcoord.Cartesian.get_bonds`. The default is
+                specified in ``settings['defaults']['use_lookup']``
+
+        Returns:
+            list: A list of tuples ``(i, j)`` with the indices
+            of the bonded atoms.
+        """
+        if use_lookup is None:
+            use_lookup = settings['defaults']['use_lookup']
+        bond_dict = self.get_bonds(use_lookup=use_lookup)
+        rotatable_bonds, visited = [], set()
+        for i in self.index:
+            visited.add(i)
+            for j in set(bond_dict[i]) - visited:
+                if (len(bond_dict[i]) > 1 and len(bond_dict[j]) > 1
+                        and not self._is_in_ring(i, j, bond_dict)):
+                    rotatable_bonds.append((i, j))
+        return rotatable_bonds
+
+    def get_conformers(self, bonds=None, angles=(0., 120., 240.),
+                       n_samples=None, random_state=None, clash_factor=1.5,
+                       use_lookup=None, atomic_radius_data=None,
+                       chunksize=1000):
+        """Generate conformers by rotation around bonds.
+
+        For each bond the molecule is split into the two fragments
+        that are connected by this bond and the smaller one is rotated
+        rigidly around the bond axis.
+        The geometries are generated in batches and conformers
+        with steric clashes are removed.
+        Two atoms clash, if they are neither bonded nor share a
+        bonding partner and if their distance is smaller than
+        ``clash_factor`` times the sum of their radii.
+        Only pairs of atoms, whose distance is changed by the rotations,
+        are tested.
+
+        Args:
+            bonds (list): A list of tuples ``(i, j)``. The default
+                are the bonds from :meth:`~Cartesian.get_rotatable_bonds`.
+                Bonds that are part of a ring are skipped with a warning.
+            angles (sequence): The rotation angles in degrees
+                that are enumerated for each bond.
+            n_samples (int): If it is not None, ``n_samples`` random
+                combinations of rotation angles are sampled instead of
+                the enumeration of ``angles``.
+            random_state (int): Seed for the random sampling.
+            clash_factor (float): Scales the sum of the atomic radii
+                of two atoms, below which their distance is a clash.
+                The default is 1.5.
+            use_lookup (bool): Use a lookup variable for
+                :meth:`~chemcoord.Cartesian.get_bonds`. The default is
+                specified in ``settings['defaults']['use_lookup']``
+            atomic_radius_data (str): Defines which column of
+                :attr:`constants.elements` is used. The default is
+                ``atomic_radius_cc`` and can be changed with
+                :attr:`settings['defaults']['atomic_radius_data']`.
+                Compare with :func:`add_data`.
+            chunksize (int): The number of geometries
+                that are generated at once.
+
+        Returns:
+            dict: The dictionary has the following entries:
+
+            ``'positions'``: An array of shape
+            ``(n_conformers, n_atoms, 3)`` with the positions in the
+            order of ``self.index``.
+
+            ``'angles'``: An array of shape ``(n_conformers, n_bonds)``
+            with the rotation angles in degrees.
+            A rotation of the bond ``(i, j)`` by an angle
+            increases the dihedrals ``(k, i, j, l)`` by this angle.
+
+            ``'bonds'``: The list of rotated bonds.
+            The first atom of each tuple is on the moving side.
+        """
+        if use_lookup is None:
+            use_lookup = settings['defaults']['use_lookup']
+        if atomic_radius_data is None:
+            atomic_radius_data = settings['defaults']['atomic_radius_data']
+        if bonds is None:
+            bonds = self.get_rotatable_bonds(use_lookup=use_lookup)
+        bond_dict = self.get_bonds(use_lookup=use_lookup)
+        position = {k: v for v, k in enumerate(self.index)}
+        n_atoms = len(self)
+
+        rotated_bonds, moving = [], []
+        for i, j in bonds:
+            fragment = self._get_fragment(i, j, bond_dict)
+            if j in fragment:
+                message = ('The bond {} is part of a ring '
+                           'and is skipped.').format
+                warnings.warn(message((i, j)))
+                continue
+            if 2 * len(fragment) > n_atoms:
+                i, j = j, i
+                fragment = self._get_fragment(i, j, bond_dict)
+            mask = np.zeros(n_atoms, dtype=bool)
+            mask[[position[k] for k in fragment]] = True
+            rotated_bonds.append((position[i], position[j]))
+            moving.append(mask)
+        n_bonds = len(rotated_bonds)
+        moving = np.array(moving, dtype=bool).reshape((n_bonds, n_atoms))
+
+        if n_samples is None:
+            angles = np.asarray(angles, dtype='f8')
+            n_conformers = len(angles) ** n_bonds
+
+            def get_angles(start, stop):
+                k = np.arange(start, min(stop, n_conformers))
+                digits = np.empty((len(k), n_bonds), dtype='i8')
+                for bond in reversed(range(n_bonds)):
+                    digits[:, bond] = k % len(angles)
+                    k //= len(angles)
+                return angles[digits]
+        else:
+            n_conformers = n_samples
+            sampled = np.random.RandomState(random_state).uniform(
+                0., 360., (n_samples, n_bonds))
+
+            def get_angles(start, stop):
+                return sampled[start:stop]
+
+        def rotate(positions, chunk_angles):
+            for bond, (i, j) in enumerate(rotated_bonds):
+                axis = positions[:, i] - positions[:, j]
+                axis /= np.linalg.norm(axis, axis=1)[:, None]
+                phi = -np.radians(chunk_angles[:, bond])[:, None, None]
+                axis = axis[:, None, :]
+                v = positions[:, moving[bond]] - positions[:, i, None]
+                positions[:, moving[bond]] = (
+                    positions[:, i, None] + v * np.cos(phi)
+                    + np.cross(axis, v) * np.sin(phi)
+                    + axis * (axis * v).sum(axis=2)[:, :, None]
+                    * (1 - np.cos(phi)))
+
+        radii = self._get_element_data(atomic_radius_data).astype('f8')
+        max_distance = clash_factor * 2 * radii.max()
+        excluded = set()
+        for i in self.index:
+            neighbours = {i} | set(bond_dict[i])
+            for j in neighbours:
+                excluded |= {(position[j], position[k])
+                             for k in neighbours | set(bond_dict[j])}
+        excluded = np.array(sorted(j * n_atoms + k for j, k in excluded
+                                   if j < k), dtype='i8')
+        side = moving.T
+
+        def get_clashes(positions):
+            """Test all conformers with one tree by shifting them
+            so far apart, that they cannot interact."""
+            n_frames = len(positions)
+            width = np.ptp(positions[:, :, 0]) + 2 * max_distance
+            shift = np.zeros((n_frames, 1, 3))
+            shift[:, 0, 0] = np.arange(n_frames) * width
+            pairs = cKDTree((positions + shift).reshape((-1, 3))).query_pairs(
+                max_distance, output_type='ndarray')
+            frame, (j, k) = pairs[:, 0] // n_atoms, (pairs % n_atoms).T
+            select = ((side[j] != side[k]).any(axis=1)
+                      & ~np.in1d(j * n_atoms + k, excluded))
+            frame, j, k = frame[select], j[select], k[select]
+            distances = np.linalg.norm(
+                positions[frame, j] - positions[frame, k], axis=1)
+            clashes = np.zeros(n_frames, dtype=bool)
+            clashes[frame[distances < clash_factor
+                          * (radii[j] + radii[k])]] = True
+            return clashes
+
+        X = self._get_coords()
+        valid_positions, valid_angles = [], []
+        for start in range(0, n_conformers, chunksize):
+            chunk_angles = get_angles(start, start + chunksize)
+            positions = np.repeat(X[None, :, :], len(chunk_angles), axis=0)
+            rotate(positions, chunk_angles)
+            valid = ~get_clashes(positions)
+            valid_positions.append(positions[valid])
+            valid_angles.append(chunk_angles[valid])
+
+        valid_positions = np.concatenate(
+            [np.empty((0, n_atoms, 3))] + valid_positions)
+        valid_angles = np.concatenate(
+            [np.empty((0, n_bonds))] + valid_angles)
+        return {'positions': valid_positions, 'angles': valid_angles,
+                'bonds': [(self.index[i], self.index[j])
+                          for i, j in rotated_bonds]}
@@ -3,7 +3,6 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals, with_statement)
 
 import collections
-import copy
 import itertools
 from functools import partial
 from itertools import product
@@ -12,6 +11,8 @@ import numba as nb
 import numpy as np
 import pandas as pd
 from numba import jit
+from scipy.optimize import linear_sum_assignment
+from scipy.spatial import cKDTree
 from sortedcontainers import SortedSet
 
 import chemcoord.cartesian_coordinates.xyz_functions as xyz_functions
@@ -19,15 +20,20 @@ import chemcoord.constants as constants
 from chemcoord._generic_classes.generic_core import GenericCore
 from chemcoord.cartesian_coordinates._cartesian_class_pandas_wrapper import \
     PandasWrapper
+from chemcoord.cartesian_coordinates._columnar_storage import \
+    ColumnarStorage
 from chemcoord.cartesian_coordinates.xyz_functions import dot
 from chemcoord.configuration import settings
 from chemcoord.exceptions import IllegalArgumentCombination, PhysicalMeaning
+from chemcoord.utilities import _symbolic
 from six.moves import zip  # pylint:disable=redefined-builtin
 
 
 class CartesianCore(PandasWrapper, GenericCore):
 
     _required_cols = frozenset({'atom', 'x', 'y', 'z'})
+    # Above this number of pairs a spatial index is used for nearest pairs.
+    _max_pairs_brute_force = 10**6
 
     # Look into the numpy manual for description of __array_priority__:
     # https://docs.scipy.org/doc/numpy-1.12.0/reference/arrays.classes.html
@@ -58,17 +64,30 @@ class CartesianCore(PandasWrapper, GenericCore):
         elif frame is None and atoms is None and coords is None:
             message = 'Either frame or atoms and coords have to be not None'
             raise IllegalArgumentCombination(message)
-        elif atoms is not None and coords is not None:
-            frame = pd.DataFrame(index=index,
-                                 columns=['atom', 'x', 'y', 'z'], dtype='f8')
-            frame['atom'] = atoms
-            frame.loc[:, ['x', 'y', 'z']] = coords
+        columns = None
+        if atoms is not None and coords is not None:
+            if not (isinstance(atoms, pd.Series)
+                    or isinstance(coords, pd.DataFrame)):
+                try:
+                    columns = ColumnarStorage.from_atoms(atoms, coords, index)
+                except (TypeError, ValueError):
+                    pass
+            if columns is None:
+                frame = pd.DataFrame(index=index, columns=['atom', 'x', 'y',
+                                                           'z'], dtype='f8')
+                frame['atom'] = atoms
+                frame.loc[:, ['x', 'y', 'z']] = coords
         elif not isinstance(frame, pd.DataFrame):
             raise ValueError('Need a pd.DataFrame as input')
-        if not self._required_cols <= set(frame.columns):
-            raise PhysicalMeaning('There are columns missing for a '
-                                  'meaningful description of a molecule')
-        self._frame = frame.copy()
+        if columns is None:
+            if not self._required_cols <= set(frame.columns):
+                raise PhysicalMeaning('There are columns missing for a '
+                                      'meaningful description of a molecule')
+            columns = ColumnarStorage.from_frame(frame)
+        if columns is None:
+            self._frame = frame.copy()
+        else:
+            self._columns = columns
         if metadata is None:
             self.metadata = {}
         else:
@@ -77,7 +96,7 @@ class CartesianCore(PandasWrapper, GenericCore):
         if _metadata is None:
             self._metadata = {}
         else:
-            self._metadata = copy.deepcopy(_metadata)
+            self._metadata = _metadata.copy()
 
     def _return_appropiate_type(self, selected):
         if isinstance(selected, pd.Series):
@@ -91,19 +110,143 @@ class CartesianCore(PandasWrapper, GenericCore):
                 and self._required_cols <= set(selected.columns)):
             molecule = self.__class__(selected)
             molecule.metadata = self.metadata.copy()
-            molecule._metadata = copy.deepcopy(self._metadata)
+            molecule._metadata = self._metadata.copy()
             return molecule
         else:
             return selected
 
+    def _get_coords(self, labels=None):
+        """Return the positions as float array of shape ``(n_atoms, 3)``.
+
+        For the columnar storage the array is not copied,
+        so it must not be changed in place.
+        Compact float32 positions are promoted to float64.
+
+        Args:
+            labels (sequence): If it is not None, only the positions of
+                the atoms with these index labels are returned.
+
+        Returns:
+            np.array:
+        """
+        coords = ['x', 'y', 'z']
+        if self._columns is None or not self.index.is_unique:
+            if labels is None:
+                return self.loc[:, coords].values.astype('f8')
+            return self.loc[labels, coords].values.astype('f8')
+        elif labels is None:
+            return self._columns.get_coords()
+        positions = self.index.get_indexer(labels)
+        if (positions == -1).any():
+            raise KeyError('{} not in index'.format(
+                np.asarray(labels)[positions == -1]))
+        return self._columns.coords[positions].astype('f8')
+
+    def _get_atoms(self):
+        """Return the element symbols as array."""
+        if self._columns is None:
+            return self._frame['atom'].values
+        return self._columns.atoms
+
+    def _get_element_data(self, column):
+        """Return the values of ``constants.elements[column]`` per atom
+        without creating a new instance."""
+        if self._columns is None:
+            return constants.elements.loc[self._get_atoms(), column].values
+        return self._columns.get_element_data(column)
+
+    def _get_masses(self):
+        if self._columns is None or 'mass' in self._columns.columns:
+            return super(CartesianCore, self)._get_masses()
+        return self._columns.masses
+
+    @classmethod
+    def _from_columns(cls, columns, metadata=None, _metadata=None):
+        """Create a new instance, that uses the given
+        :class:`ColumnarStorage` without validation or copy."""
+        new = cls.__new__(cls)
+        new._columns = columns
+        new.metadata = {} if metadata is None else metadata.copy()
+        new._metadata = {} if _metadata is None else _metadata.copy()
+        return new
+
+    def _new_from_columns(self, columns):
+        """Create a new instance with the same metadata, that uses the
+        given :class:`ColumnarStorage`."""
+        return self._from_columns(columns, self.metadata, self._metadata)
+
+    def _get_storage(self):
+        """Return the positions as :class:`ColumnarStorage`.
+
+        If ``self`` holds a DataFrame, a new storage is created from it.
+        For non numeric positions None is returned.
+        """
+        if self._columns is not None:
+            return self._columns
+        return ColumnarStorage.from_frame(self._frame)
+
+    def _with_coords(self, storage, new_coords):
+        """Return a copy of ``storage`` with new positions
+        as new instance.
+
+        This is the fast path of the arithmetic operators,
+        which avoids the materialization of a DataFrame.
+        The result is stored with the dtype of ``storage``.
+        """
+        new_coords = np.array(new_coords, dtype=storage.coords.dtype,
+                              order='C', copy=False)
+        if new_coords.shape != storage.coords.shape:
+            message = 'Result of shape {} can not be assigned to {}.'.format
+            raise ValueError(message(new_coords.shape, storage.coords.shape))
+        return self._new_from_columns(storage.copy(coords=new_coords))
+
+    def _get_array_operands(self, other):
+        """Return the storage of ``self`` and the other operand
+        of an arithmetic operation as float array
+        in the order of ``self.index``.
+
+        Operands with the same structure are confirmed by comparing
+        the cached fingerprints.
+        A Series with the labels ``['x', 'y', 'z']`` is aligned to them
+        and used by position otherwise.
+        If the fast path is not possible, e.g. for symbolic values
+        or DataFrames, ``(None, None)`` is returned.
+        """
+        if isinstance(other, pd.DataFrame):
+            return None, None
+        elif isinstance(other, pd.Series):
+            other = self._get_series_values(other, ['x', 'y', 'z'])
+        this = self._get_storage()
+        if this is None:
+            return None, None
+        elif isinstance(other, CartesianCore):
+            that = other._get_storage()
+            if that is None:
+                return None, None
+            elif this.has_same_structure(that):
+                return this, that.get_coords()
+            self._test_if_can_be_added(other)
+            return this, other._get_coords(self.index)
+        try:
+            return this, np.asarray(other, dtype='f8')
+        except (TypeError, ValueError):
+            return None, None
+
     def _test_if_can_be_added(self, other):
+        if (self._columns is not None and other._columns is not None
+                and self._columns.has_same_structure(other._columns)):
+            return
         if not (set(self.index) == set(other.index)
-                and np.alltrue(self['atom'] == other.loc[self.index, 'atom'])):
+                and (self._get_atoms() == other._get_atoms()[
+                    other.index.get_indexer(self.index)]).all()):
             message = ("You can add only Cartesians which are indexed in the "
                        "same way and use the same atoms.")
             raise PhysicalMeaning(message)
 
     def __add__(self, other):
+        storage, operand = self._get_array_operands(other)
+        if storage is not None:
+            return self._with_coords(storage, storage.get_coords() + operand)
         coords = ['x', 'y', 'z']
         new = self.copy()
         if isinstance(other, CartesianCore):
@@ -112,6 +255,8 @@ class CartesianCore(PandasWrapper, GenericCore):
         elif isinstance(other, pd.DataFrame):
             new.loc[:, coords] = self.loc[:, coords] + other.loc[:, coords]
         else:
+            if isinstance(other, pd.Series):
+                other = self._get_series_values(other, coords)
             try:
                 other = np.array(other, dtype='f8')
             except TypeError:
@@ -123,6 +268,9 @@ class CartesianCore(PandasWrapper, GenericCore):
         return self.__add__(other)
 
     def __sub__(self, other):
+        storage, operand = self._get_array_operands(other)
+        if storage is not None:
+            return self._with_coords(storage, storage.get_coords() - operand)
         coords = ['x', 'y', 'z']
         new = self.copy()
         if isinstance(other, CartesianCore):
@@ -131,6 +279,8 @@ class CartesianCore(PandasWrapper, GenericCore):
         elif isinstance(other, pd.DataFrame):
             new.loc[:, coords] = self.loc[:, coords] - other.loc[:, coords]
         else:
+            if isinstance(other, pd.Series):
+                other = self._get_series_values(other, coords)
             try:
                 other = np.array(other, dtype='f8')
             except TypeError:
@@ -139,6 +289,9 @@ class CartesianCore(PandasWrapper, GenericCore):
         return new
 
     def __rsub__(self, other):
+        storage, operand = self._get_array_operands(other)
+        if storage is not None:
+            return self._with_coords(storage, operand - storage.get_coords())
         coords = ['x', 'y', 'z']
         new = self.copy()
         if isinstance(other, CartesianCore):
@@ -147,6 +300,8 @@ class CartesianCore(PandasWrapper, GenericCore):
         elif isinstance(other, pd.DataFrame):
             new.loc[:, coords] = other.loc[:, coords] - self.loc[:, coords]
         else:
+            if isinstance(other, pd.Series):
+                other = self._get_series_values(other, coords)
             try:
                 other = np.array(other, dtype='f8')
             except TypeError:
@@ -155,6 +310,9 @@ class CartesianCore(PandasWrapper, GenericCore):
         return new
 
     def __mul__(self, other):
+        storage, operand = self._get_array_operands(other)
+        if storage is not None:
+            return self._with_coords(storage, storage.get_coords() * operand)
         coords = ['x', 'y', 'z']
         new = self.copy()
         if isinstance(other, CartesianCore):
@@ -163,6 +321,8 @@ class CartesianCore(PandasWrapper, GenericCore):
         elif isinstance(other, pd.DataFrame):
             new.loc[:, coords] = self.loc[:, coords] * other.loc[:, coords]
         else:
+            if isinstance(other, pd.Series):
+                other = self._get_series_values(other, coords)
             try:
                 other = np.array(other, dtype='f8')
             except TypeError:
@@ -174,6 +334,9 @@ class CartesianCore(PandasWrapper, GenericCore):
         return self.__mul__(other)
 
     def __truediv__(self, other):
+        storage, operand = self._get_array_operands(other)
+        if storage is not None:
+            return self._with_coords(storage, storage.get_coords() / operand)
         coords = ['x', 'y', 'z']
         new = self.copy()
         if isinstance(other, CartesianCore):
@@ -182,6 +345,8 @@ class CartesianCore(PandasWrapper, GenericCore):
         elif isinstance(other, pd.DataFrame):
             new.loc[:, coords] = self.loc[:, coords] / other.loc[:, coords]
         else:
+            if isinstance(other, pd.Series):
+                other = self._get_series_values(other, coords)
             try:
                 other = np.array(other, dtype='f8')
             except TypeError:
@@ -190,6 +355,9 @@ class CartesianCore(PandasWrapper, GenericCore):
         return new
 
     def __rtruediv__(self, other):
+        storage, operand = self._get_array_operands(other)
+        if storage is not None:
+            return self._with_coords(storage, operand / storage.get_coords())
         coords = ['x', 'y', 'z']
         new = self.copy()
         if isinstance(other, CartesianCore):
@@ -198,6 +366,8 @@ class CartesianCore(PandasWrapper, GenericCore):
         elif isinstance(other, pd.DataFrame):
             new.loc[:, coords] = other.loc[:, coords] / self.loc[:, coords]
         else:
+            if isinstance(other, pd.Series):
+                other = self._get_series_values(other, coords)
             try:
                 other = np.array(other, dtype='f8')
             except TypeError:
@@ -206,6 +376,9 @@ class CartesianCore(PandasWrapper, GenericCore):
         return new
 
     def __pow__(self, other):
+        storage, operand = self._get_array_operands(other)
+        if storage is not None:
+            return self._with_coords(storage, storage.get_coords()**operand)
         coords = ['x', 'y', 'z']
         new = self.copy()
         new.loc[:, coords] = self.loc[:, coords]**other
@@ -218,6 +391,9 @@ class CartesianCore(PandasWrapper, GenericCore):
         return -1 * self.copy()
 
     def __abs__(self):
+        storage = self._get_storage()
+        if storage is not None:
+            return self._with_coords(storage, abs(storage.get_coords()))
         coords = ['x', 'y', 'z']
         new = self.copy()
         new.loc[:, coords] = abs(new.loc[:, coords])
@@ -227,11 +403,134 @@ class CartesianCore(PandasWrapper, GenericCore):
         return NotImplemented
 
     def __rmatmul__(self, other):
+        storage, operand = self._get_array_operands(other)
+        if storage is not None:
+            return self._with_coords(
+                storage, np.dot(operand, storage.get_coords().T).T)
         coords = ['x', 'y', 'z']
         new = self.copy()
         new.loc[:, coords] = (np.dot(other, new.loc[:, coords].T)).T
         return new
 
+    def _set_coords_(self, new_coords, rigid):
+        """Overwrite the coordinates in place.
+
+        If the movement is not rigid, the cached connectivity
+        is discarded.
+        """
+        if self._columns is None:
+            self._frame.loc[:, ['x', 'y', 'z']] = new_coords
+        else:
+            self._columns.coords[:, :] = new_coords
+            self._frame_cache = None
+        if not rigid:
+            for key in ['bond_dict', 'val_bond_dict']:
+                self._metadata.pop(key, None)
+        return self
+
+    def translate_(self, vector):
+        """Translate the molecule in place.
+
+        The cached connectivity stays valid.
+
+        Args:
+            vector (sequence): A 3-dimensional vector.
+
+        Returns:
+            Cartesian: ``self``
+        """
+        vector = np.asarray(vector, dtype='f8')
+        return self._set_coords_(self._get_coords() + vector, rigid=True)
+
+    def rotate_(self, matrix):
+        """Rotate the molecule in place around the origin.
+
+        This is the inplace version of ``matrix @ self``.
+        The cached connectivity stays valid.
+
+        Args:
+            matrix (np.array): An orthogonal ``(3, 3)`` matrix.
+
+        Returns:
+            Cartesian: ``self``
+        """
+        matrix = np.asarray(matrix, dtype='f8')
+        if not np.allclose(np.dot(matrix, matrix.T), np.identity(3)):
+            raise ValueError('matrix has to be orthogonal. '
+                             'Use transform_ for general transformations.')
+        return self.transform_(matrix)
+
+    def transform_(self, matrix, vector=None):
+        """Apply an affine transformation in place.
+
+        The new positions are ``matrix @ x + vector`` for each
+        position ``x``.
+        If ``matrix`` is orthogonal, the cached connectivity stays valid,
+        otherwise it is discarded.
+
+        Args:
+            matrix (np.array): A ``(3, 3)`` matrix.
+            vector (sequence): An optional 3-dimensional vector.
+
+        Returns:
+            Cartesian: ``self``
+        """
+        matrix = np.asarray(matrix, dtype='f8')
+        new_coords = np.dot(self._get_coords(), matrix.T)
+        if vector is not None:
+            new_coords += np.asarray(vector, dtype='f8')
+        rigid = np.allclose(np.dot(matrix, matrix.T), np.identity(3))
+        return self._set_coords_(new_coords, rigid=rigid)
+
+    def _get_inplace_operand(self, other):
+        """Return the operand as array and if it is a rigid translation.
+
+        If ``self`` or the operand is symbolic, ``(None, False)``
+        is returned.
+        """
+        coords = ['x', 'y', 'z']
+        if self._get_storage() is None:
+            return None, False
+        elif isinstance(other, CartesianCore):
+            if other._get_storage() is None:
+                return None, False
+            self._test_if_can_be_added(other)
+            if (self._columns is not None and other._columns is not None
+                    and self._columns.has_same_structure(other._columns)):
+                return other._get_coords(), False
+            return other._get_coords(self.index), False
+        elif isinstance(other, pd.DataFrame):
+            other = other.loc[self.index, coords].values
+        elif isinstance(other, pd.Series):
+            other = self._get_series_values(other, coords)
+        try:
+            other = np.asarray(other, dtype='f8')
+        except (TypeError, ValueError):
+            return None, False
+        return other, other.ndim <= 1
+
+    def _replace_(self, new):
+        """Take the values of ``new`` in place.
+
+        This is the fallback of the inplace operators for symbolic values.
+        """
+        self._frame = new._frame
+        for key in ['bond_dict', 'val_bond_dict']:
+            self._metadata.pop(key, None)
+        return self
+
+    def __iadd__(self, other):
+        operand, rigid = self._get_inplace_operand(other)
+        if operand is None:
+            return self._replace_(self + other)
+        return self._set_coords_(self._get_coords() + operand, rigid=rigid)
+
+    def __isub__(self, other):
+        operand, rigid = self._get_inplace_operand(other)
+        if operand is None:
+            return self._replace_(self - other)
+        return self._set_coords_(self._get_coords() - operand, rigid=rigid)
+
     def __eq__(self, other):
         return self._frame == other._frame
 
@@ -243,11 +542,37 @@ class CartesianCore(PandasWrapper, GenericCore):
             partial(pd.to_numeric, errors='ignore')))
 
     def copy(self):
+        if self._columns is not None:
+            return self._new_from_columns(self._columns.copy())
         molecule = self.__class__(self._frame)
         molecule.metadata = self.metadata.copy()
-        molecule._metadata = copy.deepcopy(self._metadata)
+        molecule._metadata = self._metadata.copy()
         return molecule
 
+    def compact(self):
+        """Return a copy with a compact storage of the positions.
+
+        The positions are stored as float32, which halves the memory
+        of large ensembles of molecules.
+        Contiguous integer labels are stored as
+        :class:`pandas.RangeIndex` and the element symbols
+        as small integer codes.
+        The methods of :class:`~chemcoord.Cartesian` promote
+        the positions to float64 internally, so only the precision
+        of the stored positions (ca. seven significant digits) is reduced.
+        The results of arithmetic operations keep the compact storage.
+
+        Args:
+            None
+
+        Returns:
+            Cartesian:
+        """
+        storage = self._get_storage()
+        if storage is None:
+            raise TypeError('Only numeric positions can be stored compactly.')
+        return self._new_from_columns(storage.compact())
+
     def subs(self, *args):
         """Substitute a symbolic expression in ``['x', 'y', 'z']``
 
@@ -293,6 +618,41 @@ class CartesianCore(PandasWrapper, GenericCore):
                     pass
         return out
 
+    def compile(self, *symbols):
+        """Compile the symbolic expressions in ``['x', 'y', 'z']``
+
+        In contrast to :meth:`~Cartesian.subs` the symbolic expressions are
+        translated only once with :func:`sympy.lambdify`
+        into a numpy function.
+        The returned function can be called repeatedly
+        with concrete values for the symbols and takes the fast numeric path.
+
+        Args:
+            symbols (sympy.Symbol): The symbols in the order in which
+                their values are passed to the compiled function.
+                If no symbols are given, all free symbols
+                sorted by their name are used.
+
+        Returns:
+            function: A function ``f(*values)`` that returns a new
+            Cartesian with 64bit float columns.
+            The used order of symbols is stored in ``f.symbols``.
+        """
+        cols = ['x', 'y', 'z']
+        symbols, get_values = _symbolic.lambdify_array(
+            self.loc[:, cols].values, symbols if symbols else None)
+
+        def f(*values):
+            new_values = get_values(*values)
+            if new_values.ndim != 2:
+                raise ValueError('Only scalar values are allowed.')
+            out = self.copy()
+            for j, col in enumerate(cols):
+                out._writable_frame[col] = new_values[:, j]
+            return out
+        f.symbols = tuple(symbols)
+        return f
+
     @staticmethod
     @jit(nopython=True, cache=True)
     def _jit_give_bond_array(pos, bond_radii, self_bonding_allowed=False):
@@ -347,8 +707,10 @@ class CartesianCore(PandasWrapper, GenericCore):
 
     def _divide_et_impera(self, n_atoms_per_set=500, offset=3):
         coords = ['x', 'y', 'z']
+        positions = self._get_coords()
         sorted_series = dict(zip(
-            coords, [self[axis].sort_values() for axis in coords]))
+            coords, [pd.Series(positions[:, k], index=self.index).sort_values()
+                     for k in range(3)]))
 
         def ceil(x):
             return int(np.ceil(x))
@@ -393,6 +755,9 @@ class CartesianCore(PandasWrapper, GenericCore):
             assigns the output to a variable ``self._metadata['bond_dict']`` if
             ``set_lookup`` is ``True`` (which is the default). This is
             necessary for performance reasons.
+            The dictionary is shared with copies and slices
+            of the molecule, so it must not be changed in place.
+            Use :meth:`~Cartesian.set_bonds` instead.
 
         ``.get_bonds()`` will use or not use a lookup
         depending on ``use_lookup``. Greatly increases performance if
@@ -439,9 +804,9 @@ class CartesianCore(PandasWrapper, GenericCore):
             old_index = self.index
             self.index = range(len(self))
             fragments = self._divide_et_impera(offset=offset)
-            positions = np.array(self.loc[:, ['x', 'y', 'z']], order='F')
-            data = self.add_data([atomic_radius_data, 'valency'])
-            bond_radii = data[atomic_radius_data]
+            positions = np.array(self._get_coords(), order='F')
+            bond_radii = pd.Series(self._get_element_data(atomic_radius_data),
+                                   index=self.index)
             if modified_properties is not None:
                 bond_radii.update(pd.Series(modified_properties))
             bond_radii = bond_radii.values
@@ -691,7 +1056,8 @@ class CartesianCore(PandasWrapper, GenericCore):
         Returns:
             :class:`numpy.ndarray`:
         """
-        return np.mean(self.loc[:, ['x', 'y', 'z']], axis=0)
+        return pd.Series(self._get_coords().mean(axis=0),
+                         index=['x', 'y', 'z'])
 
     def get_barycenter(self):
         """Return the mass weighted average location.
@@ -702,12 +1068,9 @@ class CartesianCore(PandasWrapper, GenericCore):
         Returns:
             :class:`numpy.ndarray`:
         """
-        try:
-            mass = self['mass'].values
-        except KeyError:
-            mass = self.add_data('mass')['mass'].values
-        pos = self.loc[:, ['x', 'y', 'z']].values
-        return (pos * mass[:, None]).sum(axis=0) / self.get_total_mass()
+        mass = self._get_masses()
+        pos = self._get_coords()
+        return (pos * mass[:, None]).sum(axis=0) / mass.sum()
 
     def get_bond_lengths(self, indices):
         """Return the distances between given atoms.
@@ -727,16 +1090,15 @@ class CartesianCore(PandasWrapper, GenericCore):
         Returns:
             :class:`numpy.ndarray`: Vector of angles in degrees.
         """
-        coords = ['x', 'y', 'z']
         if isinstance(indices, pd.DataFrame):
-            i_pos = self.loc[indices.index, coords].values
-            b_pos = self.loc[indices.loc[:, 'b'], coords].values
+            i_pos = self._get_coords(indices.index)
+            b_pos = self._get_coords(indices.loc[:, 'b'])
         else:
             indices = np.array(indices)
             if len(indices.shape) == 1:
                 indices = indices[None, :]
-            i_pos = self.loc[indices[:, 0], coords].values
-            b_pos = self.loc[indices[:, 1], coords].values
+            i_pos = self._get_coords(indices[:, 0])
+            b_pos = self._get_coords(indices[:, 1])
         return np.linalg.norm(i_pos - b_pos, axis=1)
 
     def get_angle_degrees(self, indices):
@@ -757,18 +1119,17 @@ class CartesianCore(PandasWrapper, GenericCore):
         Returns:
             :class:`numpy.ndarray`: Vector of angles in degrees.
         """
-        coords = ['x', 'y', 'z']
         if isinstance(indices, pd.DataFrame):
-            i_pos = self.loc[indices.index, coords].values
-            b_pos = self.loc[indices.loc[:, 'b'], coords].values
-            a_pos = self.loc[indices.loc[:, 'a'], coords].values
+            i_pos = self._get_coords(indices.index)
+            b_pos = self._get_coords(indices.loc[:, 'b'])
+            a_pos = self._get_coords(indices.loc[:, 'a'])
         else:
             indices = np.array(indices)
             if len(indices.shape) == 1:
                 indices = indices[None, :]
-            i_pos = self.loc[indices[:, 0], coords].values
-            b_pos = self.loc[indices[:, 1], coords].values
-            a_pos = self.loc[indices[:, 2], coords].values
+            i_pos = self._get_coords(indices[:, 0])
+            b_pos = self._get_coords(indices[:, 1])
+            a_pos = self._get_coords(indices[:, 2])
 
         BI, BA = i_pos - b_pos, a_pos - b_pos
         bi, ba = [v / np.linalg.norm(v, axis=1)[:, None] for v in (BI, BA)]
@@ -797,20 +1158,19 @@ class CartesianCore(PandasWrapper, GenericCore):
         Returns:
             :class:`numpy.ndarray`: Vector of angles in degrees.
         """
-        coords = ['x', 'y', 'z']
         if isinstance(indices, pd.DataFrame):
-            i_pos = self.loc[indices.index, coords].values
-            b_pos = self.loc[indices.loc[:, 'b'], coords].values
-            a_pos = self.loc[indices.loc[:, 'a'], coords].values
-            d_pos = self.loc[indices.loc[:, 'd'], coords].values
+            i_pos = self._get_coords(indices.index)
+            b_pos = self._get_coords(indices.loc[:, 'b'])
+            a_pos = self._get_coords(indices.loc[:, 'a'])
+            d_pos = self._get_coords(indices.loc[:, 'd'])
         else:
             indices = np.array(indices)
             if len(indices.shape) == 1:
                 indices = indices[None, :]
-            i_pos = self.loc[indices[:, 0], coords].values
-            b_pos = self.loc[indices[:, 1], coords].values
-            a_pos = self.loc[indices[:, 2], coords].values
-            d_pos = self.loc[indices[:, 3], coords].values
+            i_pos = self._get_coords(indices[:, 0])
+            b_pos = self._get_coords(indices[:, 1])
+            a_pos = self._get_coords(indices[:, 2])
+            d_pos = self._get_coords(indices[:, 3])
 
         IB = b_pos - i_pos
         BA = a_pos - b_pos
@@ -957,24 +1317,6 @@ class CartesianCore(PandasWrapper, GenericCore):
         missing_part = missing_part.fragmentate(use_lookup=use_lookup)
         return sorted(missing_part, key=len, reverse=True)
 
-    @staticmethod
-    @jit(nopython=True, cache=True)
-    def _jit_pairwise_distances(pos1, pos2):
-        """Optimized function for calculating the distance between each pair
-        of points in positions1 and positions2.
-
-        Does use python mode as fallback, if a scalar and not an array is
-        given.
-        """
-        n1 = pos1.shape[0]
-        n2 = pos2.shape[0]
-        D = np.empty((n1, n2))
-
-        for i in range(n1):
-            for j in range(n2):
-                D[i, j] = np.sqrt(((pos1[i] - pos2[j])**2).sum())
-        return D
-
     def get_shortest_distance(self, other):
         """Calculate the shortest distance between self and other
 
@@ -993,14 +1335,75 @@ class CartesianCore(PandasWrapper, GenericCore):
             ``d``:
             The distance between self and other. (float)
         """
-        coords = ['x', 'y', 'z']
-        pos1 = self.loc[:, coords].values
-        pos2 = other.loc[:, coords].values
-        D = self._jit_pairwise_distances(pos1, pos2)
-        i, j = np.unravel_index(D.argmin(), D.shape)
-        d = D[i, j]
-        i, j = dict(enumerate(self.index))[i], dict(enumerate(other.index))[j]
-        return i, j, d
+        pos1, pos2 = self._get_coords(), other._get_coords()
+        if len(pos1) * len(pos2) <= self._max_pairs_brute_force:
+            i, j, d = self._jit_shortest_distance(pos1, pos2)
+        else:
+            # Query the smaller set against a tree of the larger set.
+            swap = len(pos1) > len(pos2)
+            if swap:
+                pos1, pos2 = pos2, pos1
+            distances, nearest = cKDTree(pos2).query(pos1)
+            i = distances.argmin()
+            i, j, d = i, nearest[i], distances[i]
+            if swap:
+                i, j = j, i
+        return self.index[i], other.index[j], d
+
+    @staticmethod
+    @jit(nopython=True, cache=True)
+    def _jit_shortest_distance(pos1, pos2):
+        """Find the nearest pair of points in pos1 and pos2.
+
+        The pairwise distance matrix is never allocated.
+        """
+        i_min, j_min, d_min = 0, 0, np.inf
+        for i in range(pos1.shape[0]):
+            for j in range(pos2.shape[0]):
+                d = 0.
+                for k in range(3):
+                    d += (pos1[i, k] - pos2[j, k])**2
+                if d < d_min:
+                    i_min, j_min, d_min = i, j, d
+        return i_min, j_min, np.sqrt(d_min)
+
+    def pairs_within(self, cutoff, other=None):
+        """Return all pairs of atoms within a distance cutoff.
+
+        The pairs are found with a :class:`scipy.spatial.cKDTree`,
+        so the pairwise distance matrix is never allocated.
+
+        Args:
+            cutoff (float):
+            other (Cartesian): If other is None, the pairs
+                within ``self`` are returned.
+                Otherwise pairs between ``self`` and ``other``.
+
+        Returns:
+            pd.DataFrame: A DataFrame with the columns
+            ``['i', 'j', 'distance']``, where ``i`` is an index of ``self``
+            and ``j`` an index of ``other`` (or ``self``).
+            Within ``self`` each pair appears only once.
+        """
+        pos1 = self._get_coords()
+        tree = cKDTree(pos1)
+        if other is None:
+            pos2, index2 = pos1, self.index
+            pairs = tree.query_pairs(cutoff, output_type='ndarray')
+        else:
+            pos2 = other._get_coords()
+            index2 = other.index
+            pairs = tree.sparse_distance_matrix(cKDTree(pos2), cutoff,
+                                                output_type='ndarray')
+            pairs = np.stack([pairs['i'], pairs['j']], axis=1)
+        pairs = pairs.reshape((len(pairs), 2))
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        distances = np.linalg.norm(pos1[pairs[:, 0]] - pos2[pairs[:, 1]],
+                                   axis=1)
+        return pd.DataFrame({'i': self.index[pairs[:, 0]],
+                             'j': index2[pairs[:, 1]],
+                             'distance': distances},
+                            columns=['i', 'j', 'distance'])
 
     def get_inertia(self):
         """Calculate the inertia tensor and transforms along
@@ -1039,26 +1442,21 @@ class CartesianCore(PandasWrapper, GenericCore):
             The i-th eigenvector corresponds to the i-th eigenvalue in
             ``diag_inertia_tensor``.
         """
-        def calculate_inertia_tensor(molecule):
-            masses = molecule.loc[:, 'mass'].values
-            pos = molecule.loc[:, ['x', 'y', 'z']].values
-            inertia = np.sum(
-                masses[:, None, None]
-                * ((pos**2).sum(axis=1)[:, None, None]
-                   * np.identity(3)[None, :, :]
-                   - pos[:, :, None] * pos[:, None, :]),
-                axis=0)
-            diag_inertia, eig_v = np.linalg.eig(inertia)
-            sorted_index = np.argsort(diag_inertia)
-            diag_inertia = diag_inertia[sorted_index]
-            eig_v = eig_v[:, sorted_index]
-            return inertia, eig_v, diag_inertia
-
-        molecule = self.add_data('mass')
-        molecule = molecule - molecule.get_barycenter()
-        inertia, eig_v, diag_inertia = calculate_inertia_tensor(molecule)
-        eig_v = xyz_functions.orthonormalize_righthanded(eig_v)
-        molecule = molecule.basistransform(eig_v)
+        coords = ['x', 'y', 'z']
+        masses = self._get_masses()
+        X = self._get_coords()
+        result = xyz_functions.get_inertia(X[None, :, :], masses)
+        inertia = result['inertia_tensor'][0]
+        # The eigenvectors keep the orientation of previous versions.
+        diag_inertia, eig_v = np.linalg.eig(inertia)
+        sorted_index = np.argsort(diag_inertia)
+        diag_inertia = diag_inertia[sorted_index]
+        eig_v = xyz_functions.orthonormalize_righthanded(
+            eig_v[:, sorted_index])
+        molecule = self.copy()
+        frame = molecule._writable_frame
+        frame['mass'] = masses.copy()
+        frame.loc[:, coords] = np.dot(X - result['barycenter'][0], eig_v)
         return {'transformed_Cartesian': molecule, 'eigenvectors': eig_v,
                 'diag_inertia_tensor': diag_inertia, 'inertia_tensor': inertia}
 
@@ -1102,7 +1500,7 @@ class CartesianCore(PandasWrapper, GenericCore):
         self.index = range(len(self))
         rename = {j: i for i, j in enumerate(old_index)}
 
-        pos = self.loc[:, ['x', 'y', 'z']].values.astype('f8')
+        pos = self._get_coords()
         out = np.empty((len(indices), 3))
         indices = np.array([rename.get(i, i) for i in indices], dtype='i8')
 
@@ -1270,7 +1668,8 @@ class CartesianCore(PandasWrapper, GenericCore):
         m2 = dot(xyz_functions.get_kabsch_rotation(pos1, pos2), m2)
         return m1, m2
 
-    def reindex_similar(self, other, n_sphere=4):
+    def reindex_similar(self, other, n_sphere=4, method='greedy',
+                        cutoff=None):
         """Reindex ``other`` to be similarly indexed as ``self``.
 
         Returns a reindexed copy of ``other`` that minimizes the
@@ -1279,6 +1678,14 @@ class CartesianCore(PandasWrapper, GenericCore):
         Read more about the definition of the chemical environment in
         :func:`Cartesian.partition_chem_env`
 
+        If ``method == 'optimal'``, each chemical environment is solved
+        as linear assignment problem, that minimizes the sum of distances
+        (:func:`scipy.optimize.linear_sum_assignment`).
+        If a ``cutoff`` is given, only pairs within the cutoff
+        are considered and a sparse matching is used.
+        If no complete matching is possible within the cutoff,
+        the dense problem is solved.
+
         .. note:: It is necessary to align ``self`` and other before
             applying this method.
             This can be done via :meth:`~Cartesian.align`.
@@ -1290,10 +1697,16 @@ class CartesianCore(PandasWrapper, GenericCore):
             other (Cartesian):
             n_sphere (int): Wrapper around the argument for
                 :meth:`~Cartesian.partition_chem_env`.
+            method (str): Either ``'greedy'`` or ``'optimal'``.
+            cutoff (float): Only used if ``method == 'optimal'``.
+                The sparse assignment requires scipy >= 1.6.
 
         Returns:
             Cartesian: Reindexed version of other
         """
+        if method not in {'greedy', 'optimal'}:
+            raise ValueError("method has to be 'greedy' or 'optimal'")
+
         def make_subset_similar(m1, subset1, m2, subset2, index_dct):
             """Changes index_dct INPLACE"""
             coords = ['x', 'y', 'z']
@@ -1324,6 +1737,37 @@ class CartesianCore(PandasWrapper, GenericCore):
                         found = True
             return index_dct
 
+        def assign_optimally(m1, subset1, m2, subset2, index_dct):
+            """Changes index_dct INPLACE"""
+            coords = ['x', 'y', 'z']
+            index1, index2 = list(subset1), list(subset2)
+            pos1 = m1.loc[index1, coords].values.astype('f8')
+            pos2 = m2.loc[index2, coords].values.astype('f8')
+            rows = None
+            if cutoff is not None:
+                from scipy.sparse.csgraph import \
+                    min_weight_full_bipartite_matching
+                D = cKDTree(pos1).sparse_distance_matrix(
+                    cKDTree(pos2), cutoff, output_type='coo_matrix').tocsr()
+                # Shift by a constant to keep pairs with zero distance.
+                D.data += 1.
+                try:
+                    rows, cols = min_weight_full_bipartite_matching(D)
+                except ValueError:
+                    pass
+            if rows is None:
+                D = np.linalg.norm(pos1[:, None, :] - pos2[None, :, :],
+                                   axis=2)
+                rows, cols = linear_sum_assignment(D)
+            for k, l in zip(rows, cols):
+                index_dct[index2[l]] = index1[k]
+            return index_dct
+
+        if method == 'optimal':
+            assign = assign_optimally
+        else:
+            assign = make_subset_similar
+
         molecule1 = self.copy()
         molecule2 = other.copy()
 
@@ -1335,9 +1779,8 @@ class CartesianCore(PandasWrapper, GenericCore):
             message = ('You have chemically different molecules, regarding '
                        'the topology of their connectivity.')
             assert len(partition1[key]) == len(partition2[key]), message
-            index_dct = make_subset_similar(molecule1, partition1[key],
-                                            molecule2, partition2[key],
-                                            index_dct)
+            index_dct = assign(molecule1, partition1[key],
+                               molecule2, partition2[key], index_dct)
         molecule2.index = [index_dct[i] for i in molecule2.index]
         return molecule2.loc[molecule1.index]
     
@@ -18,6 +18,8 @@ from chemcoord.configuration import settings
 from chemcoord.exceptions import (ERR_CODE_OK, ERR_CODE_InvalidReference,
                                   IllegalArgumentCombination, InvalidReference,
                                   UndefinedCoordinateSystem)
+from chemcoord.internal_coordinates._last_valid_positions import \
+    LastValidPositions
 from chemcoord.internal_coordinates.zmat_class_main import Zmat
 
 
@@ -446,7 +448,7 @@ class CartesianGetZmat(CartesianCore):
             raise ValueError(message(i=i))
         for k in range(3):
             if k < row:
-                A[k] = self.loc[c_table.iloc[row, k], ['x', 'y', 'z']]
+                A[k] = self._get_coords([c_table.iloc[row, k]])[0]
             else:
                 A[k] = abs_refs[c_table.iloc[row, k]]
         v1, v2 = A[2] - A[1], A[1] - A[0]
@@ -519,7 +521,7 @@ class CartesianGetZmat(CartesianCore):
         c_table.index = c_table.index.astype('i8')
 
         new_index = c_table.index.append(self.index.difference(c_table.index))
-        X = self.loc[new_index, ['x', 'y', 'z']].values.astype('f8').T
+        X = self._get_coords(new_index).T
         c_table = c_table.replace(dict(zip(new_index, range(len(self)))))
         c_table = c_table.values.T
 
@@ -553,8 +555,9 @@ class CartesianGetZmat(CartesianCore):
         zmat_values = self._calculate_zmat_values(c_table)
         zmat_frame.loc[:, ['bond', 'angle', 'dihedral']] = zmat_values
 
+        last_valid = LastValidPositions.from_cartesian(self)
         zmatrix = Zmat(zmat_frame, metadata=self.metadata,
-                       _metadata={'last_valid_cartesian': self.copy()})
+                       _metadata={'last_valid_positions': last_valid})
         return zmatrix
 
     def get_zmat(self, construction_table=None,
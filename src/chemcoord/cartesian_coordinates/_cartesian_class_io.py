@@ -8,20 +8,27 @@ import tempfile
 import warnings
 from io import open  # pylint:disable=redefined-builtin
 from threading import Thread
+import itertools
 import json
-from collections import defaultdict
-import re
-from functools import partial
 
 import pandas as pd
 import numpy as np
 
+import chemcoord.cartesian_coordinates.xyz_functions as xyz_functions
 from chemcoord._generic_classes.generic_IO import GenericIO
 from chemcoord.cartesian_coordinates._cartesian_class_core import CartesianCore
 from chemcoord.configuration import settings
 from chemcoord import constants
 
 
+def _get_element_symbols():
+    """Return an array to look up element symbols by atomic number."""
+    atomic_number = constants.elements['atomic_number'].dropna()
+    symbols = np.empty(int(atomic_number.max()) + 1, dtype='O')
+    symbols[atomic_number.values.astype('i8')] = atomic_number.index
+    return symbols
+
+
 class CartesianIO(CartesianCore, GenericIO):
     """This class provides IO-methods.
 
@@ -92,44 +99,68 @@ class CartesianIO(CartesianCore, GenericIO):
         """Write xyz-file
 
         Args:
-            buf (str): StringIO-like, optional buffer to write to
+            buf (str): StringIO-like, optional buffer or path to write to
             sort_index (bool): If sort_index is true, the
                 :class:`~chemcoord.Cartesian`
                 is sorted by the index before writing.
             float_format (one-parameter function): Formatter function
                 to apply to column’s elements if they are floats.
                 The result of this function must be a unicode string.
+                For simple format functions like ``'{:.6f}'.format``
+                all lines are formatted at once.
             overwrite (bool): May overwrite existing files.
 
         Returns:
             formatted : string (or unicode, depending on data and options)
         """
+        output = '{n}\n{message}\n{frame_string}'.format(
+            n=len(self), message=xyz_functions._XYZ_COMMENT,
+            frame_string=self._get_xyz_lines(sort_index, index, header,
+                                             float_format))
+
+        if hasattr(buf, 'write'):
+            buf.write(output)
+        elif buf is not None:
+            if overwrite:
+                with open(buf, mode='w') as f:
+                    f.write(output)
+            else:
+                with open(buf, mode='x') as f:
+                    f.write(output)
+        else:
+            return output
+
+    def _get_xyz_lines(self, sort_index, index, header, float_format):
+        """Format the atom lines of a xyz file.
+
+        For numeric positions and simple format functions all lines
+        are formatted by one call of :meth:`str.format`.
+        """
+        storage = self._get_storage()
+        if storage is not None and not (index or header):
+            atoms, positions = storage.atoms, storage.get_coords()
+            if sort_index:
+                order = self.index.argsort(kind='mergesort')
+                atoms, positions = atoms[order], positions[order]
+            template = xyz_functions._get_xyz_template(atoms, float_format,
+                                                       positions)
+            if template is None:
+                return xyz_functions._format_xyz_lines(
+                    atoms, positions, float_format, align=True)
+            return template.format(*positions.ravel())
+
         if sort_index:
             molecule_string = self.sort_index().to_string(
                 header=header, index=index, float_format=float_format)
         else:
             molecule_string = self.to_string(header=header, index=index,
                                              float_format=float_format)
-
         # NOTE the following might be removed in the future
         # introduced because of formatting bug in pandas
         # See https://github.com/pandas-dev/pandas/issues/13032
         space = ' ' * (self.loc[:, 'atom'].str.len().max()
                        - len(self.iloc[0, 0]))
-
-        output = '{n}\n{message}\n{alignment}{frame_string}'.format(
-            n=len(self), alignment=space, frame_string=molecule_string,
-            message='Created by chemcoord http://chemcoord.readthedocs.io/')
-
-        if buf is not None:
-            if overwrite:
-                with open(buf, mode='w') as f:
-                    f.write(output)
-            else:
-                with open(buf, mode='x') as f:
-                    f.write(output)
-        else:
-            return output
+        return space + molecule_string
 
     def write_xyz(self, *args, **kwargs):
         """Deprecated, use :meth:`~chemcoord.Cartesian.to_xyz`
@@ -163,8 +194,7 @@ class CartesianIO(CartesianCore, GenericIO):
                               delim_whitespace=True,
                               names=['atom', 'x', 'y', 'z'], engine=engine)
 
-        remove_digits = partial(re.sub, r'[0-9]+', '')
-        frame['atom'] = frame['atom'].apply(remove_digits)
+        frame['atom'] = xyz_functions._remove_digits(frame['atom'].values)
 
         molecule = cls(frame)
         molecule.index = range(start_index, start_index + len(molecule))
@@ -173,11 +203,30 @@ class CartesianIO(CartesianCore, GenericIO):
             molecule.get_bonds(use_lookup=False, set_lookup=True)
         return molecule
 
+    def _get_bond_pairs(self):
+        """Return the bonds as positional pairs ``(i, j)`` with ``i < j``.
+
+        The cached bond dictionary is not changed.
+
+        Returns:
+            :class:`numpy.ndarray`: An integer array of shape
+            ``(n_bonds, 2)`` sorted by rows.
+        """
+        bond_dict = self.get_bonds()
+        i = np.repeat(self.index.get_indexer(list(bond_dict)),
+                      [len(bonded) for bonded in bond_dict.values()])
+        j = self.index.get_indexer(
+            list(itertools.chain.from_iterable(bond_dict.values())))
+        pairs = np.stack([i, j], axis=1).astype('i8')
+        pairs = pairs[pairs[:, 0] < pairs[:, 1]]
+        return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
     def to_cjson(self, buf=None, **kwargs):
         """Write a cjson file or return dictionary.
 
         The cjson format is specified
         `here <https://github.com/OpenChemistry/chemicaljson>`_.
+        The bonds are given as zero based positions of the atoms.
 
         Args:
             buf (str): If it is a filepath, the data is written to
@@ -190,28 +239,13 @@ class CartesianIO(CartesianCore, GenericIO):
         Returns:
             dict:
         """
-        cjson_dict = {'chemical json': 0}
-
-        cjson_dict['atoms'] = {}
-
-        atomic_number = constants.elements['atomic_number'].to_dict()
-        cjson_dict['atoms'] = {'elements': {}}
-        cjson_dict['atoms']['elements']['number'] = [
-            int(atomic_number[x]) for x in self['atom']]
-
-        cjson_dict['atoms']['coords'] = {}
-        coords = self.loc[:, ['x', 'y', 'z']].values.reshape(len(self) * 3)
-        cjson_dict['atoms']['coords']['3d'] = [float(x) for x in coords]
-
-        bonds = []
-        bond_dict = self.get_bonds()
-        for i in bond_dict:
-            for b in bond_dict[i]:
-                bonds += [int(i), int(b)]
-                bond_dict[b].remove(i)
-
-        cjson_dict['bonds'] = {'connections': {}}
-        cjson_dict['bonds']['connections']['index'] = bonds
+        numbers = self._get_element_data('atomic_number').astype('i8')
+        cjson_dict = {
+            'chemical json': 0,
+            'atoms': {'elements': {'number': numbers.tolist()},
+                      'coords': {'3d': self._get_coords().ravel().tolist()}},
+            'bonds': {'connections': {
+                'index': self._get_bond_pairs().ravel().tolist()}}}
 
         if buf is not None:
             with open(buf, mode='w') as f:
@@ -241,27 +275,29 @@ class CartesianIO(CartesianCore, GenericIO):
                 data = json.load(f)
             assert data['chemical json'] == 0
 
-        n_atoms = len(data['atoms']['coords']['3d'])
         metadata = {}
         _metadata = {}
 
-        coords = np.array(
-            data['atoms']['coords']['3d']).reshape((n_atoms // 3, 3))
+        coords = np.array(data['atoms']['coords']['3d'],
+                          dtype='f8').reshape((-1, 3))
+        n_atoms = len(coords)
 
-        atomic_number = constants.elements['atomic_number']
-        elements = [dict(zip(atomic_number, atomic_number.index))[x]
-                    for x in data['atoms']['elements']['number']]
+        elements = _get_element_symbols()[
+            np.asarray(data['atoms']['elements']['number'], dtype='i8')]
 
         try:
             connections = data['bonds']['connections']['index']
         except KeyError:
             pass
         else:
-            bond_dict = defaultdict(set)
-            for i, b in zip(connections[::2], connections[1::2]):
-                bond_dict[i].add(b)
-                bond_dict[b].add(i)
-            _metadata['bond_dict'] = dict(bond_dict)
+            pairs = np.asarray(connections, dtype='i8').reshape((-1, 2))
+            pairs = np.concatenate([pairs, pairs[:, ::-1]])
+            pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+            bounds = np.searchsorted(pairs[:, 0], np.arange(n_atoms + 1))
+            bonded = pairs[:, 1].tolist()
+            _metadata['bond_dict'] = {
+                i: set(bonded[bounds[i]:bounds[i + 1]])
+                for i in range(n_atoms)}
 
         try:
             metadata.update(data['properties'])
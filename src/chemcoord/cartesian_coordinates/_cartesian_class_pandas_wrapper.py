@@ -2,7 +2,8 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals, with_statement)
 
-import copy
+
+import pandas as pd
 
 import chemcoord.cartesian_coordinates._indexers as indexers
 from chemcoord.exceptions import PhysicalMeaning
@@ -25,12 +26,46 @@ class PandasWrapper(object):
         There are two dictionaris as attributes
         called `metadata` and `_metadata`
         which are passed on when doing slices...
+        Only the dictionaries are copied, their entries are shared.
+        The entries of `_metadata` are therefore never changed in place,
+        but replaced by new objects.
+
+    Storage
+        The data is either held in a :class:`pandas.DataFrame` or in a
+        :class:`ColumnarStorage` with contiguous arrays.
+        The DataFrame ``_frame`` is only materialized,
+        when pandas behaviour is requested, and cached for read access.
+        Changes in place have to go through ``_writable_frame``,
+        which discards the storage, since the DataFrame
+        is the authoritative representation from then on.
     """
+    _columns = None
+    _frame_cache = None
+
+    @property
+    def _frame(self):
+        if self._frame_cache is None:
+            self._frame_cache = self._columns.to_frame()
+        return self._frame_cache
+
+    @property
+    def _writable_frame(self):
+        frame = self._frame
+        self._columns = None
+        return frame
+
+    @_frame.setter
+    def _frame(self, value):
+        self._frame_cache = value
+        self._columns = None
+
     def __len__(self):
         return self.shape[0]
 
     @property
     def empty(self):
+        if self._columns is not None:
+            return len(self._columns) == 0
         return self._frame.empty
 
     @property
@@ -114,9 +149,9 @@ class PandasWrapper(object):
 
     def __setitem__(self, key, value):
         if isinstance(key, tuple):
-            self._frame[key[0], key[1]] = value
+            self._writable_frame[key[0], key[1]] = value
         else:
-            self._frame[key] = value
+            self._writable_frame[key] = value
 
     @property
     def index(self):
@@ -124,11 +159,17 @@ class PandasWrapper(object):
 
         Assigning a value to it changes the index.
         """
+        if self._columns is not None:
+            return self._columns.index
         return self._frame.index
 
     @index.setter
     def index(self, value):
-        self._frame.index = value
+        if self._columns is not None:
+            self._columns.set_index(value)
+            self._frame_cache = None
+        else:
+            self._frame.index = value
 
     @property
     def columns(self):
@@ -136,6 +177,8 @@ class PandasWrapper(object):
 
         Assigning a value to it changes the columns.
         """
+        if self._columns is not None:
+            return pd.Index(self._columns.columns)
         return self._frame.columns
 
     @columns.setter
@@ -143,10 +186,12 @@ class PandasWrapper(object):
         if not self._required_cols <= set(value):
             raise PhysicalMeaning('There are columns missing for a '
                                   'meaningful description of a molecule')
-        self._frame.columns = value
+        self._writable_frame.columns = value
 
     @property
     def shape(self):
+        if self._columns is not None:
+            return (len(self._columns), len(self._columns.columns))
         return self._frame.shape
 
     @property
@@ -160,7 +205,7 @@ class PandasWrapper(object):
         Wrapper around the :meth:`pandas.DataFrame.sort_values` method.
         """
         if inplace:
-            self._frame.sort_values(
+            self._writable_frame.sort_values(
                 by, axis=axis, ascending=ascending,
                 inplace=inplace, kind=kind, na_position=na_position)
         else:
@@ -168,7 +213,7 @@ class PandasWrapper(object):
                 by, axis=axis, ascending=ascending, inplace=inplace,
                 kind=kind, na_position=na_position))
             new.metadata = self.metadata.copy()
-            new._metadata = copy.deepcopy(self._metadata)
+            new._metadata = self._metadata.copy()
             return new
 
     def sort_index(self, axis=0, level=None, ascending=True, inplace=False,
@@ -179,7 +224,7 @@ class PandasWrapper(object):
         Wrapper around the :meth:`pandas.DataFrame.sort_index` method.
         """
         if inplace:
-            self._frame.sort_index(
+            self._writable_frame.sort_index(
                 axis=axis, level=level, ascending=ascending, inplace=inplace,
                 kind=kind, na_position=na_position,
                 sort_remaining=sort_remaining, by=by)
@@ -189,7 +234,7 @@ class PandasWrapper(object):
                 inplace=inplace, kind=kind, na_position=na_position,
                 sort_remaining=sort_remaining, by=by))
             new.metadata = self.metadata.copy()
-            new._metadata = copy.deepcopy(self._metadata)
+            new._metadata = self._metadata.copy()
             return new
 
     def replace(self, to_replace=None, value=None, inplace=False,
@@ -199,15 +244,15 @@ class PandasWrapper(object):
         Wrapper around the :meth:`pandas.DataFrame.replace` method.
         """
         if inplace:
-            self._frame.replace(to_replace=to_replace, value=value,
-                                inplace=inplace, limit=limit, regex=regex,
-                                method=method, axis=axis)
+            self._writable_frame.replace(
+                to_replace=to_replace, value=value, inplace=inplace,
+                limit=limit, regex=regex, method=method, axis=axis)
         else:
             new = self.__class__(self._frame.replace(
                 to_replace=to_replace, value=value, inplace=inplace,
                 limit=limit, regex=regex, method=method, axis=axis))
             new.metadata = self.metadata.copy()
-            new._metadata = copy.deepcopy(self._metadata)
+            new._metadata = self._metadata.copy()
             return new
 
     def set_index(self, keys, drop=True, append=False,
@@ -231,9 +276,9 @@ class PandasWrapper(object):
                                   'of a molecule.')
 
         if inplace:
-            self._frame.set_index(keys, drop=drop, append=append,
-                                  inplace=inplace,
-                                  verify_integrity=verify_integrity)
+            self._writable_frame.set_index(
+                keys, drop=drop, append=append, inplace=inplace,
+                verify_integrity=verify_integrity)
         else:
             new = self._frame.set_index(keys, drop=drop, append=append,
                                         inplace=inplace,
@@ -283,8 +328,8 @@ class PandasWrapper(object):
         Wrapper around the :meth:`pandas.DataFrame.insert` method.
         """
         out = self if inplace else self.copy()
-        out._frame.insert(loc, column, value,
-                          allow_duplicates=allow_duplicates)
+        out._writable_frame.insert(loc, column, value,
+                                   allow_duplicates=allow_duplicates)
         if not inplace:
             return out
 
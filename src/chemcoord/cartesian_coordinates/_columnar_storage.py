@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals, with_statement)
+
+import numpy as np
+import pandas as pd
+
+import chemcoord.constants as constants
+from chemcoord.utilities._fingerprint import get_fingerprint
+
+
+def get_compact_index(index):
+    """Return a :class:`pandas.RangeIndex` for contiguous integer labels.
+
+    A RangeIndex needs constant memory independent of its length.
+    Other indices are returned unchanged.
+
+    Args:
+        index (pd.Index):
+
+    Returns:
+        pd.Index:
+    """
+    if isinstance(index, pd.RangeIndex) or not len(index):
+        return index
+    if index.dtype.kind in 'iu':
+        start = index[0]
+        if (index.values == np.arange(start, start + len(index))).all():
+            return pd.RangeIndex(start, start + len(index), name=index.name)
+    return index
+
+
+class ColumnarStorage(object):
+    """Columnar storage of a molecule in cartesian coordinates.
+
+    The positions are stored in a contiguous float64 array of shape
+    ``(n_atoms, 3)``.
+    The compact float32 storage is promoted to float64
+    by :meth:`get_coords`.
+    The element symbols are stored as small integer codes into a table
+    of the occurring symbols, which makes comparisons and lookups of
+    element properties cheap.
+    Additional columns are kept in a separate :class:`pandas.DataFrame`.
+    """
+    coords_cols = ['x', 'y', 'z']
+    _fingerprint = None
+    _masses = None
+
+    def __init__(self, coords, symbols, codes, index, columns=None,
+                 extra=None):
+        """How to initialize a ColumnarStorage instance.
+
+        Args:
+            coords (np.array): A float64 array of shape ``(n_atoms, 3)``.
+            symbols (np.array): The table of occurring element symbols.
+            codes (np.array): An integer array of length ``n_atoms``
+                with positions in ``symbols``.
+            index (pd.Index):
+            columns (list): The order of the columns.
+                The default is ``['atom', 'x', 'y', 'z']`` followed by
+                the columns of ``extra``.
+            extra (pd.DataFrame): Additional columns with ``index``
+                as index.
+
+        Returns:
+            ColumnarStorage:
+        """
+        self.coords = coords
+        self.symbols = symbols
+        self.codes = codes
+        self.index = index
+        self.extra = extra
+        if columns is None:
+            columns = ['atom'] + self.coords_cols
+            if extra is not None:
+                columns += list(extra.columns)
+        self.columns = list(columns)
+
+    @staticmethod
+    def _encode(atoms):
+        symbols, codes = np.unique(np.asarray(atoms, dtype='O'),
+                                   return_inverse=True)
+        dtype = 'i1' if len(symbols) <= np.iinfo('i1').max else 'i2'
+        return symbols, codes.astype(dtype)
+
+    @classmethod
+    def from_atoms(cls, atoms, coords, index=None, dtype='f8'):
+        """Create the storage from element symbols and positions.
+
+        Args:
+            atoms (sequence):
+            coords (sequence): An array of shape ``(n_atoms, 3)``.
+            index (sequence): The default is ``range(n_atoms)``.
+            dtype (str): Either ``'f8'`` or the compact ``'f4'``.
+
+        Returns:
+            ColumnarStorage:
+        """
+        coords = np.array(coords, dtype=dtype, order='C', ndmin=2)
+        symbols, codes = cls._encode(atoms)
+        if coords.shape != (len(codes), 3):
+            raise ValueError('coords have to be of shape (n_atoms, 3)')
+        if index is None:
+            index = pd.RangeIndex(len(codes))
+        else:
+            index = pd.Index(index)
+            if len(index) != len(codes):
+                raise ValueError('The index has to be of length n_atoms')
+        return cls(coords, symbols, codes, index)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Create the storage from a DataFrame.
+
+        Args:
+            frame (pd.DataFrame): A Dataframe with at least the
+                columns ``['atom', 'x', 'y', 'z']``.
+
+        Returns:
+            ColumnarStorage: If the positions are not numeric,
+            e.g. symbolic expressions, None is returned.
+        """
+        if frame.columns.duplicated().any():
+            return None
+        dtype = frame['x'].dtype
+        if not (dtype in (np.dtype('f4'), np.dtype('f8'))
+                and all(frame[col].dtype == dtype
+                        for col in cls.coords_cols)):
+            return None
+        try:
+            symbols, codes = cls._encode(frame['atom'].values)
+        except TypeError:
+            return None
+        coords = np.empty((len(frame), 3), dtype=dtype)
+        for j, col in enumerate(cls.coords_cols):
+            coords[:, j] = frame[col].values
+        extra_cols = [col for col in frame.columns
+                      if col not in {'atom', 'x', 'y', 'z'}]
+        extra = frame.loc[:, extra_cols].copy() if extra_cols else None
+        return cls(coords, symbols, codes, frame.index,
+                   columns=frame.columns, extra=extra)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def atoms(self):
+        """The element symbols as object array."""
+        return self.symbols[self.codes]
+
+    @property
+    def fingerprint(self):
+        """A hash of the index and the element symbols.
+
+        It is calculated only once and shared with copies,
+        since the index and the element codes are never changed in place.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = get_fingerprint(
+                pd.Series(self.atoms, index=self.index))
+        return self._fingerprint
+
+    @property
+    def masses(self):
+        """The masses of the atoms as read only float64 array.
+
+        Like the fingerprint, they are calculated only once
+        and shared with copies.
+        """
+        if self._masses is None:
+            masses = self.get_element_data('mass').astype('f8')
+            masses.flags.writeable = False
+            self._masses = masses
+        return self._masses
+
+    def get_coords(self):
+        """Return the positions as float64 array.
+
+        For float64 storage the array is not copied.
+        """
+        return self.coords.astype('f8', copy=False)
+
+    def compact(self):
+        """Return a copy with float32 positions and a compact index.
+
+        Returns:
+            ColumnarStorage:
+        """
+        new = self.copy(coords=self.coords.astype('f4'))
+        new.set_index(get_compact_index(self.index))
+        new._fingerprint = self._fingerprint
+        new._masses = self._masses
+        return new
+
+    def has_same_structure(self, other):
+        """Test if ``other`` has the same index and atoms
+        in the same order.
+
+        Args:
+            other (ColumnarStorage):
+
+        Returns:
+            bool:
+        """
+        return ((self.codes is other.codes and self.index is other.index)
+                or self.fingerprint == other.fingerprint)
+
+    def get_element_data(self, column):
+        """Return the values of ``constants.elements[column]`` per atom.
+
+        The lookup in :attr:`constants.elements` is done only once
+        for each occurring element.
+        """
+        positions = constants.elements.index.get_indexer(self.symbols)
+        if (positions == -1).any():
+            raise KeyError('{} not in constants.elements'.format(
+                self.symbols[positions == -1]))
+        return constants.elements[column].values[positions][self.codes]
+
+    def set_index(self, index):
+        index = pd.Index(index)
+        if len(index) != len(self):
+            message = 'Length mismatch: Expected axis has {} elements, ' \
+                'new values have {} elements'.format
+            raise ValueError(message(len(self), len(index)))
+        self.index = index
+        self._fingerprint = None
+        if self.extra is not None:
+            self.extra.index = index
+
+    def copy(self, coords=None):
+        """Return a copy.
+
+        Args:
+            coords (np.array): If it is not None, the copy uses these
+                positions without copying them again.
+
+        Returns:
+            ColumnarStorage:
+        """
+        if coords is None:
+            coords = self.coords.copy()
+        extra = None if self.extra is None else self.extra.copy()
+        new = self.__class__(coords, self.symbols, self.codes, self.index,
+                             columns=self.columns, extra=extra)
+        new._fingerprint, new._masses = self._fingerprint, self._masses
+        return new
+
+    def to_frame(self):
+        """Materialize the DataFrame.
+
+        Returns:
+            pd.DataFrame:
+        """
+        frame = pd.DataFrame(self.coords.copy(), index=self.index,
+                             columns=self.coords_cols)
+        frame.insert(0, 'atom', self.atoms)
+        if self.extra is not None:
+            for col in self.extra.columns:
+                frame[col] = self.extra[col].values
+        return frame.loc[:, self.columns]
@@ -20,9 +20,9 @@ class _Loc(_generic_Indexer):
 
     def __setitem__(self, key, value):
         if isinstance(key, tuple):
-            self.molecule._frame.loc[key[0], key[1]] = value
+            self.molecule._writable_frame.loc[key[0], key[1]] = value
         else:
-            self.molecule._frame.loc[key] = value
+            self.molecule._writable_frame.loc[key] = value
 
 
 class _ILoc(_generic_Indexer):
@@ -39,6 +39,6 @@ class _ILoc(_generic_Indexer):
 
     def __setitem__(self, key, value):
         if isinstance(key, tuple):
-            self.molecule._frame.iloc[key[0], key[1]] = value
+            self.molecule._writable_frame.iloc[key[0], key[1]] = value
         else:
-            self.molecule._frame.iloc[key] = value
+            self.molecule._writable_frame.iloc[key] = value
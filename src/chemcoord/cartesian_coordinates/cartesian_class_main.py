@@ -2,14 +2,14 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals, with_statement)
 
-from chemcoord.cartesian_coordinates._cartesian_class_get_zmat import \
-    CartesianGetZmat
+from chemcoord.cartesian_coordinates._cartesian_class_conformers import \
+    CartesianConformers
 from chemcoord.cartesian_coordinates._cartesian_class_io import CartesianIO
 from chemcoord.cartesian_coordinates._cartesian_class_symmetry import \
     CartesianSymmetry
 
 
-class Cartesian(CartesianIO, CartesianGetZmat, CartesianSymmetry):
+class Cartesian(CartesianIO, CartesianConformers, CartesianSymmetry):
     """The main class for dealing with cartesian Coordinates.
 
     **Mathematical Operations**:
@@ -38,6 +38,17 @@ class Cartesian(CartesianIO, CartesianGetZmat, CartesianSymmetry):
     ``np.diag([1, 1, -1]) @ cartesian_instance``
     to mirror on the x-y plane.
 
+    **Inplace operations**:
+    The operators ``+=`` and ``-=`` and the methods
+    :meth:`~Cartesian.translate_`, :meth:`~Cartesian.rotate_` and
+    :meth:`~Cartesian.transform_` change the coordinates in place.
+    Since only leftsided matrix multiplication is supported,
+    ``cartesian_instance.transform_(A)`` is the inplace version of
+    ``A @ cartesian_instance``.
+    The cached connectivity from :meth:`~Cartesian.get_bonds` is kept
+    for rigid motions (translations and orthogonal matrices) and
+    discarded otherwise.
+
     **Indexing**:
 
     The indexing behaves like Indexing and Selecting data in
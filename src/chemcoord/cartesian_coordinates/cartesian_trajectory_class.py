@@ -0,0 +1,657 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals, with_statement)
+
+import mmap
+import numbers
+from io import StringIO, open  # pylint:disable=redefined-builtin
+
+import numpy as np
+import pandas as pd
+
+import chemcoord.cartesian_coordinates._cart_transformation as transformation
+import chemcoord.cartesian_coordinates.xyz_functions as xyz_functions
+import chemcoord.constants as constants
+from chemcoord.cartesian_coordinates._columnar_storage import (
+    ColumnarStorage, get_compact_index)
+from chemcoord.cartesian_coordinates.cartesian_class_main import Cartesian
+from chemcoord.configuration import settings
+from chemcoord.exceptions import (ERR_CODE_OK, InvalidReference,
+                                  PhysicalMeaning)
+from chemcoord.internal_coordinates.zmat_trajectory_class import \
+    ZmatTrajectory
+from chemcoord.utilities import _trajectory_file
+
+
+class CartesianTrajectory(object):
+    """A sequence of frames of the same molecule in cartesian coordinates.
+
+    All positions are stored in one array of shape
+    ``(n_frames, n_atoms, 3)`` and the atoms and the index are shared
+    by all frames.
+    Per frame information, like the energies of a molden file,
+    is stored in the :class:`pandas.DataFrame` ``frame_metadata``
+    with one row per frame.
+
+    **Indexing**:
+
+    ``trajectory[i]`` returns the ``i``-th frame as
+    :class:`~chemcoord.Cartesian`.
+    It shares the encoded atoms with the trajectory, but its positions
+    are a float64 copy, so changing the frame does not change
+    the trajectory.
+    Slices, boolean masks and lists of integers return a new
+    :class:`~chemcoord.CartesianTrajectory`.
+    For slices the positions are a view of the original array.
+
+    **Vectorized methods**:
+
+    The methods that measure or move the molecule, e.g.
+    :meth:`~CartesianTrajectory.get_barycenter` or
+    :meth:`~CartesianTrajectory.align`, work on all frames at once
+    and return arrays with ``n_frames`` as first dimension.
+
+    **Compact storage**:
+
+    For large ensembles the positions can be stored as float32,
+    either by passing a float32 array or by calling
+    :meth:`~CartesianTrajectory.compact`.
+    The dtype is kept by slicing, copying and alignment.
+    All kernels promote the positions to float64 internally,
+    so only the precision of the stored positions is reduced.
+    """
+    _storage = None
+
+    def __init__(self, atoms, positions, index=None, metadata=None,
+                 frame_metadata=None, dtype=None):
+        """How to initialize a CartesianTrajectory instance.
+
+        Args:
+            atoms (sequence): A list of strings. (Elementsymbols)
+            positions (sequence): An array of shape
+                ``(n_frames, n_atoms, 3)``.
+            index (sequence): The index shared by all frames.
+                The default is ``range(n_atoms)``.
+            metadata (dict): Metadata shared by all frames.
+            frame_metadata (pd.DataFrame): Metadata per frame,
+                e.g. ``{'energy': energies}``.
+                Everything accepted by the :class:`pandas.DataFrame`
+                constructor with one row per frame can be passed.
+            dtype (str): The dtype of the stored positions,
+                either ``'f8'`` or the compact ``'f4'``.
+                The default is ``'f4'`` for float32 positions
+                and ``'f8'`` otherwise.
+
+        Returns:
+            CartesianTrajectory: A new trajectory instance.
+        """
+        positions = np.asarray(positions)
+        if dtype is None:
+            dtype = 'f4' if positions.dtype == np.dtype('f4') else 'f8'
+        if np.dtype(dtype) not in (np.dtype('f4'), np.dtype('f8')):
+            raise ValueError("dtype has to be 'f4' or 'f8'")
+        positions = positions.astype(dtype, copy=False)
+        if len(positions.shape) != 3 or positions.shape[2] != 3:
+            message = 'positions have to be of shape (n_frames, n_atoms, 3)'
+            raise ValueError(message)
+        self.positions = positions
+        self.atoms = np.array(atoms, dtype='O')
+        if self.atoms.shape != (positions.shape[1],):
+            raise PhysicalMeaning('There has to be one element symbol '
+                                  'per atom.')
+        if index is None:
+            self.index = pd.RangeIndex(positions.shape[1])
+        else:
+            self.index = pd.Index(index)
+        if len(self.index) != positions.shape[1]:
+            raise ValueError('The index has to be of length n_atoms')
+
+        if metadata is None:
+            self.metadata = {}
+        else:
+            self.metadata = metadata.copy()
+        self.frame_metadata = pd.DataFrame(frame_metadata,
+                                           index=range(len(positions)))
+
+    @classmethod
+    def from_cartesians(cls, cartesians):
+        """Create a trajectory from a list of Cartesians.
+
+        All Cartesians need the same index and atoms, but the order
+        of the rows may differ. The order of the first Cartesian is used.
+        The ``metadata`` of each Cartesian becomes a row
+        of ``frame_metadata``.
+
+        Args:
+            cartesians (list): A list of :class:`~chemcoord.Cartesian`.
+
+        Returns:
+            CartesianTrajectory:
+        """
+        index = cartesians[0].index
+        atoms = cartesians[0]._get_atoms()
+        positions = np.empty((len(cartesians), len(index), 3))
+        for k, molecule in enumerate(cartesians):
+            if len(molecule) != len(index):
+                raise PhysicalMeaning('All Cartesians need the same index.')
+            positions[k] = molecule._get_coords(index)
+            if (molecule._get_atoms()[molecule.index.get_indexer(index)]
+                    != atoms).any():
+                raise PhysicalMeaning('All Cartesians need the same atoms.')
+        return cls(atoms, positions, index=index,
+                   frame_metadata=[molecule.metadata
+                                   for molecule in cartesians])
+
+    @classmethod
+    def read_xyz(cls, inputfile, start_index=0, chunksize=1000):
+        """Read a xyz file with many frames of the same molecule.
+
+        The frames are parsed in chunks of ``chunksize`` frames.
+        The comment line of each frame is parsed into a row of
+        ``frame_metadata`` as described in
+        :func:`~chemcoord.xyz_functions.iter_xyz`.
+
+        Args:
+            inputfile (str): A filepath or an open file.
+            start_index (int):
+            chunksize (int): The number of frames that are parsed at once.
+
+        Returns:
+            CartesianTrajectory:
+        """
+        def read(f):
+            return list(xyz_functions._read_xyz_chunks(f, chunksize))
+
+        if hasattr(inputfile, 'read'):
+            chunks = read(inputfile)
+        else:
+            with open(inputfile, 'r') as f:
+                chunks = read(f)
+        if not chunks:
+            raise ValueError('The input contains no frames.')
+        atoms = chunks[0][0][0]
+        for chunk_atoms, _, _ in chunks:
+            if (chunk_atoms.shape[1] != len(atoms)
+                    or (chunk_atoms != atoms).any()):
+                raise PhysicalMeaning('All frames need the same atoms.')
+        positions = np.concatenate([positions for _, positions, _ in chunks])
+        comments = [comment for _, _, chunk_comments in chunks
+                    for comment in chunk_comments]
+        return cls(atoms, positions,
+                   index=range(start_index, start_index + len(atoms)),
+                   frame_metadata=[xyz_functions._parse_comment(comment)
+                                   for comment in comments])
+
+    @classmethod
+    def read_frames(cls, inputfile, frames=None, start_index=0,
+                    sidecar=True):
+        """Read selected frames of a large xyz or molden file.
+
+        The byte offsets of the frames are obtained from
+        :func:`~chemcoord.xyz_functions.get_frame_index`,
+        which stores them in a sidecar file for later calls.
+        Only the selected frames are read from the memory mapped file,
+        the rest of the file is neither read nor parsed.
+
+        Args:
+            inputfile (str):
+            frames (int): An integer, a slice, a list of integers or
+                a boolean mask, e.g. ``slice(None, None, 100)`` for every
+                hundredth frame. The default is to read all frames.
+            start_index (int):
+            sidecar (bool): Use a sidecar file for the index.
+
+        Returns:
+            CartesianTrajectory:
+        """
+        index = xyz_functions.get_frame_index(inputfile, sidecar=sidecar)
+        if frames is not None:
+            index = index.iloc[np.atleast_1d(np.arange(len(index))[frames])]
+        with open(inputfile, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                blocks = [mapped[start:end].rstrip(b'\r\n') + b'\n'
+                          for start, end in zip(index['start'],
+                                                index['end'])]
+            finally:
+                mapped.close()
+        new = cls.read_xyz(StringIO(b''.join(blocks).decode('utf-8')),
+                           start_index=start_index)
+        if 'energy' in index:
+            new.frame_metadata['energy'] = index['energy'].values
+        return new
+
+    @classmethod
+    def read_binary(cls, path, mode='r'):
+        """Read a binary trajectory file.
+
+        The positions are a view into the memory mapped file,
+        so opening is independent of the file size and frames are
+        only read from disk, when they are accessed.
+        Look into :meth:`~CartesianTrajectory.to_binary` for the format.
+
+        Args:
+            path (str):
+            mode (str): The mode of :class:`numpy.memmap`, i.e. ``'r'``
+                for read only, ``'r+'`` to change the positions in the file
+                or ``'c'`` for copy on write.
+
+        Returns:
+            CartesianTrajectory:
+        """
+        header, records = _trajectory_file.read(path, mode=mode)
+        if header['kind'] != 'cartesian':
+            raise ValueError('{} contains a {} trajectory'.format(
+                path, header['kind']))
+        return cls(header['atoms'], records['values'], index=header['index'],
+                   metadata=header['metadata'],
+                   frame_metadata={field: records[field]
+                                   for field in header['fields']})
+
+    @classmethod
+    def read_molden(cls, inputfile, start_index=0):
+        """Read a molden file.
+
+        In contrast to :func:`~chemcoord.xyz_functions.read_molden`
+        all geometries are parsed at once into one array
+        and the energies are stored in ``frame_metadata['energy']``.
+        If the file has no energy section, the energies are NaN.
+
+        Args:
+            inputfile (str):
+            start_index (int):
+
+        Returns:
+            CartesianTrajectory:
+        """
+        with open(inputfile, 'r') as f:
+            n_frames, energies = xyz_functions._read_molden_header(f)
+            lines = f.read().splitlines()
+        row = 0
+        n_atoms = int(lines[row].strip())
+
+        # Every block consists of the number of atoms, a comment line
+        # and n_atoms lines with the element symbol and coordinates.
+        block = np.array(lines[row:row + n_frames * (n_atoms + 2)],
+                         dtype='O').reshape((n_frames, n_atoms + 2))
+        fields = np.array(' '.join(block[:, 2:].ravel()).split(),
+                          dtype='O').reshape((n_frames, n_atoms, 4))
+        return cls(fields[0, :, 0], fields[:, :, 1:].astype('f8'),
+                   index=range(start_index, start_index + n_atoms),
+                   frame_metadata={'energy': energies})
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __repr__(self):
+        return '<{} with {} frames of {} atoms>'.format(
+            self.__class__.__name__, len(self), len(self.index))
+
+    def __getitem__(self, key):
+        if isinstance(key, (numbers.Integral, np.integer)):
+            metadata = self.metadata.copy()
+            if len(self.frame_metadata.columns):
+                metadata.update(
+                    self.frame_metadata.iloc[key].dropna().to_dict())
+            storage = self._get_storage().copy(
+                coords=self.positions[key].astype('f8'))
+            return Cartesian._from_columns(storage, metadata)
+        else:
+            if isinstance(key, slice):
+                frames = np.arange(len(self))[key]
+            else:
+                frames = np.arange(len(self))[np.asarray(key)]
+            frame_metadata = self.frame_metadata.iloc[frames]
+            return self.__class__(
+                self.atoms, self.positions[key], index=self.index,
+                metadata=self.metadata,
+                frame_metadata=frame_metadata.reset_index(drop=True))
+
+    def _get_storage(self):
+        """Return an empty :class:`ColumnarStorage` of the atoms and
+        the index, which is shared by all frames.
+
+        The element symbols are encoded only once
+        and again after ``atoms`` or ``index`` were replaced.
+        """
+        cached = self._storage
+        if (cached is None or cached[0] is not self.atoms
+                or cached[1] is not self.index):
+            storage = ColumnarStorage.from_atoms(
+                self.atoms, np.empty((len(self.atoms), 3)), self.index)
+            self._storage = cached = (self.atoms, self.index, storage)
+        return cached[2]
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def copy(self):
+        """Return a copy with its own array of positions.
+
+        Args:
+            None
+
+        Returns:
+            CartesianTrajectory:
+        """
+        return self.__class__(
+            self.atoms, self.positions.copy(), index=self.index,
+            metadata=self.metadata, frame_metadata=self.frame_metadata)
+
+    def compact(self):
+        """Return a copy with a compact storage of the positions.
+
+        The positions are stored as float32 and contiguous
+        integer labels as :class:`pandas.RangeIndex`.
+
+        Args:
+            None
+
+        Returns:
+            CartesianTrajectory:
+        """
+        return self.__class__(
+            self.atoms, self.positions.astype('f4'),
+            index=get_compact_index(self.index), metadata=self.metadata,
+            frame_metadata=self.frame_metadata)
+
+    def _get_positional_indices(self, indices, n_indices):
+        """Translate a list of index labels into positional indices.
+
+        The indices can be given in the same three ways as for
+        :meth:`~chemcoord.Cartesian.get_bond_lengths`.
+        """
+        if isinstance(indices, pd.DataFrame):
+            indices = np.c_[indices.index,
+                            indices.loc[:, ['b', 'a', 'd'][:n_indices - 1]]]
+        else:
+            indices = np.array(indices)
+            if len(indices.shape) == 1:
+                indices = indices[None, :]
+        positional = self.index.get_indexer(indices.ravel())
+        if (positional == -1).any():
+            raise KeyError('{} not in index'.format(
+                indices.ravel()[positional == -1]))
+        return positional.reshape(indices.shape)
+
+    def _get_masses(self):
+        return constants.elements.loc[self.atoms, 'mass'].values
+
+    def get_centroid(self):
+        """Return the average location for each frame.
+
+        Args:
+            None
+
+        Returns:
+            :class:`numpy.ndarray`: An array of shape ``(n_frames, 3)``.
+        """
+        return self.positions.mean(axis=1, dtype='f8')
+
+    def get_barycenter(self):
+        """Return the mass weighted average location for each frame.
+
+        Args:
+            None
+
+        Returns:
+            :class:`numpy.ndarray`: An array of shape ``(n_frames, 3)``.
+        """
+        masses = self._get_masses()
+        return masses.dot(self.positions) / masses.sum()
+
+    def get_bond_lengths(self, indices):
+        """Return the distances between given atoms for each frame.
+
+        The indices can be given in the same three ways as for
+        :meth:`~chemcoord.Cartesian.get_bond_lengths`.
+
+        Args:
+            indices (list):
+
+        Returns:
+            :class:`numpy.ndarray`: An array of shape
+            ``(n_frames, n_indices)``.
+        """
+        return xyz_functions.get_bond_lengths(
+            self.positions, self._get_positional_indices(indices, 2))
+
+    def get_angle_degrees(self, indices):
+        """Return the angles between given atoms for each frame.
+
+        The indices can be given in the same three ways as for
+        :meth:`~chemcoord.Cartesian.get_angle_degrees`.
+
+        Args:
+            indices (list):
+
+        Returns:
+            :class:`numpy.ndarray`: An array of shape
+            ``(n_frames, n_indices)``.
+        """
+        return xyz_functions.get_angle_degrees(
+            self.positions, self._get_positional_indices(indices, 3))
+
+    def get_dihedral_degrees(self, indices):
+        """Return the dihedrals between given atoms for each frame.
+
+        The indices can be given in the same three ways as for
+        :meth:`~chemcoord.Cartesian.get_dihedral_degrees`.
+
+        Args:
+            indices (list):
+
+        Returns:
+            :class:`numpy.ndarray`: An array of shape
+            ``(n_frames, n_indices)``.
+        """
+        return xyz_functions.get_dihedral_degrees(
+            self.positions, self._get_positional_indices(indices, 4))
+
+    def get_inertia(self):
+        """Calculate the inertia tensor for each frame.
+
+        Look into :func:`~chemcoord.xyz_functions.get_inertia`
+        for the returned values.
+
+        Args:
+            None
+
+        Returns:
+            dict:
+        """
+        return xyz_functions.get_inertia(self.positions, self._get_masses())
+
+    def get_pairwise_rmsd(self, out=None, rows=None):
+        """Return the RMSD between all pairs of frames.
+
+        Look into :func:`~chemcoord.xyz_functions.get_pairwise_rmsd`
+        for the arguments.
+
+        Args:
+            out (:class:`numpy.ndarray`):
+            rows (tuple):
+
+        Returns:
+            :class:`numpy.ndarray`:
+        """
+        return xyz_functions.get_pairwise_rmsd(self.positions, out=out,
+                                               rows=rows)
+
+    def align(self, reference=0, mass=False, indices=None):
+        """Align all frames onto a reference.
+
+        Args:
+            reference (int): Either the number of a frame or a
+                :class:`~chemcoord.Cartesian` with the same index.
+            mass (bool): If True, the barycenters are superimposed and
+                the mass weighted RMSD is minimised.
+            indices (sequence): Index labels of a subset of atoms,
+                that is used for the determination of the rotations.
+
+        Returns:
+            tuple: ``(aligned, rmsd)`` where ``aligned`` is a new
+            :class:`~chemcoord.CartesianTrajectory` and ``rmsd`` is an
+            array of length ``n_frames``.
+        """
+        if isinstance(reference, Cartesian):
+            reference = reference._get_coords(self.index)
+        else:
+            reference = self.positions[reference]
+        if indices is not None:
+            indices = self._get_positional_indices(indices, 1).ravel()
+        masses = self._get_masses() if mass else None
+        positions, rmsd = xyz_functions.align_ensemble(
+            self.positions, reference, masses=masses, indices=indices)
+        aligned = self.__class__(
+            self.atoms, positions, index=self.index, metadata=self.metadata,
+            frame_metadata=self.frame_metadata, dtype=self.positions.dtype)
+        return aligned, rmsd
+
+    def _get_positional_c_table(self, c_table):
+        """Translate a construction table into positional indices
+        for all atoms in the order of ``c_table.index``.
+        """
+        c_table = c_table.replace(constants.int_label).astype('i8')
+        order = self.index.get_indexer(c_table.index)
+        positions = dict(zip(c_table.index, range(len(c_table))))
+        return order, c_table.replace(positions).values.T
+
+    def get_zmat(self, construction_table=None, use_lookup=None):
+        """Transform all frames to internal coordinates.
+
+        If no ``construction_table`` is given, it is obtained from the
+        first frame as in :meth:`~chemcoord.Cartesian.get_zmat`.
+        The same construction table is used for all frames and the
+        internal coordinates are calculated at once.
+
+        Args:
+            construction_table (pandas.DataFrame):
+            use_lookup (bool): Use a lookup variable for
+                :meth:`~chemcoord.Cartesian.get_bonds`. The default is
+                specified in ``settings['defaults']['use_lookup']``
+
+        Returns:
+            ZmatTrajectory:
+        """
+        if use_lookup is None:
+            use_lookup = settings['defaults']['use_lookup']
+        if construction_table is None:
+            first = self[0]
+            c_table = first.get_construction_table(use_lookup=use_lookup)
+            c_table = first.correct_dihedral(c_table, use_lookup=True)
+            c_table = first.correct_absolute_refs(c_table)
+        else:
+            c_table = construction_table
+
+        order, positional_c_table = self._get_positional_c_table(c_table)
+        X = np.ascontiguousarray(
+            self.positions[:, order].transpose(0, 2, 1), dtype='f8')
+        err, C = transformation.get_C_batch(X, positional_c_table)
+        if (err != ERR_CODE_OK).any():
+            message = ('Frame {} uses an invalid/linear reference in the '
+                       'construction table.').format
+            raise InvalidReference(message((err != ERR_CODE_OK).argmax()))
+        C[:, [1, 2], :] = np.rad2deg(C[:, [1, 2], :])
+        return ZmatTrajectory(
+            self.atoms[order], c_table, C.transpose(0, 2, 1),
+            metadata=self.metadata, frame_metadata=self.frame_metadata,
+            dtype=self.positions.dtype)
+
+    def to_molden(self, buf=None, float_format='{:.6f}'):
+        """Write the trajectory into a molden file.
+
+        The energies are taken from ``frame_metadata['energy']``,
+        if this column exists.
+
+        Args:
+            buf (str): StringIO-like, optional buffer or path to write to.
+            float_format (str): Format string for the coordinates.
+
+        Returns:
+            str: If ``buf`` is None, the formatted string is returned.
+        """
+        if 'energy' in self.frame_metadata:
+            energies = self.frame_metadata['energy'].fillna(1).values
+        else:
+            energies = None
+
+        def write(f):
+            f.write(xyz_functions._get_molden_header(len(self), energies))
+            xyz_functions._write_frames(f, self.atoms, self.positions,
+                                        float_format=float_format)
+
+        if buf is None:
+            f = StringIO()
+            write(f)
+            return f.getvalue()
+        elif hasattr(buf, 'write'):
+            write(buf)
+        else:
+            with open(buf, mode='w') as f:
+                write(f)
+
+    def to_xyz(self, buf=None, float_format='{:.6f}'):
+        """Write all frames into one xyz file.
+
+        The frames are formatted and written in chunks, so the whole
+        file is never built in memory if ``buf`` is given.
+        The rows of ``frame_metadata`` are written as ``key=value``
+        pairs into the comment lines, which are read again by
+        :meth:`~CartesianTrajectory.read_xyz`.
+
+        Args:
+            buf (str): StringIO-like, optional buffer or path to write to.
+            float_format (str): Format string for the coordinates.
+
+        Returns:
+            str: If ``buf`` is None, the formatted string is returned.
+        """
+        if len(self.frame_metadata.columns):
+            comments = (
+                xyz_functions._get_comment(row.dropna().to_dict())
+                for _, row in self.frame_metadata.iterrows())
+        else:
+            comments = None
+
+        def write(f):
+            xyz_functions._write_frames(f, self.atoms, self.positions,
+                                        float_format=float_format,
+                                        comments=comments)
+
+        if buf is None:
+            f = StringIO()
+            write(f)
+            return f.getvalue()
+        elif hasattr(buf, 'write'):
+            write(buf)
+        else:
+            with open(buf, mode='w') as f:
+                write(f)
+
+    def to_binary(self, path, append=False):
+        """Write the trajectory into a binary file.
+
+        The file consists of a JSON header with the atoms, the index and
+        the metadata, followed by the raw little-endian positions
+        and the numerical ``frame_metadata`` of each frame.
+        It is read without parsing by
+        :meth:`~CartesianTrajectory.read_binary`.
+        Since the number of frames is given by the size of the file,
+        running jobs can append their frames one after another.
+
+        Args:
+            path (str):
+            append (bool): Append the frames to an existing file with
+                the same atoms, index, dtype and ``frame_metadata`` columns.
+
+        Returns:
+            None:
+        """
+        header = {'version': 1, 'kind': 'cartesian',
+                  'dtype': self.positions.dtype.newbyteorder('<').str,
+                  'atoms': self.atoms.tolist(), 'index': self.index.tolist(),
+                  'metadata': self.metadata}
+        _trajectory_file.write(path, header, self.positions,
+                               self.frame_metadata, append=append)
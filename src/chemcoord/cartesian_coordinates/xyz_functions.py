@@ -2,20 +2,25 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals, with_statement)
 
+import itertools
+import json
 import math as m
 import os
+import re
 import subprocess
 import tempfile
 import warnings
-from io import open  # pylint:disable=redefined-builtin
+from io import StringIO, open  # pylint:disable=redefined-builtin
 from threading import Thread
 
 import numba as nb
 import numpy as np
 import pandas as pd
-import sympy
 from chemcoord.configuration import settings
+from chemcoord.utilities import _symbolic
 from numba import jit
+from six import string_types
+from six.moves import zip  # pylint:disable=redefined-builtin
 
 
 def view(molecule, viewer=settings['defaults']['viewer'], use_curr_dir=False):
@@ -81,9 +86,12 @@ def to_molden(cartesian_list, buf=None, sort_index=True,
         is strictly speaking **not sideeffect free**.
         The list to be written is of course not changed.
 
+    The geometries are formatted and written one after another,
+    so the whole file is never built in memory.
+
     Args:
         cartesian_list (list):
-        buf (str): StringIO-like, optional buffer to write to
+        buf (str): StringIO-like, optional buffer or path to write to.
         sort_index (bool): If sort_index is true, the Cartesian
             is sorted by the index before writing.
         overwrite (bool): May overwrite existing files.
@@ -94,37 +102,152 @@ def to_molden(cartesian_list, buf=None, sort_index=True,
     Returns:
         formatted : string (or unicode, depending on data and options)
     """
-    if sort_index:
-        cartesian_list = [molecule.sort_index() for molecule in cartesian_list]
+    energies = [molecule.metadata.get('energy', 1)
+                for molecule in cartesian_list]
+
+    def write(f):
+        f.write(_get_molden_header(len(cartesian_list), energies))
+        for molecule in cartesian_list:
+            f.write(molecule.to_xyz(sort_index=sort_index,
+                                    float_format=float_format))
+            f.write('\n')
+
+    if buf is None:
+        f = StringIO()
+        write(f)
+        return f.getvalue()
+    elif hasattr(buf, 'write'):
+        write(buf)
+    else:
+        with open(buf, mode='w' if overwrite else 'x') as f:
+            write(f)
 
-    give_header = ("[MOLDEN FORMAT]\n"
-                   + "[N_GEO]\n"
-                   + str(len(cartesian_list)) + "\n"
-                   + '[GEOCONV]\n'
-                   + 'energy\n{energy}'
-                   + 'max-force\n{max_force}'
-                   + 'rms-force\n{rms_force}'
-                   + '[GEOMETRIES] (XYZ)\n').format
 
-    values = len(cartesian_list) * '1\n'
-    energy = [str(m.metadata.get('energy', 1)) for m in cartesian_list]
-    energy = '\n'.join(energy) + '\n'
+def _get_molden_header(n_frames, energies=None):
+    """Return the header of a molden file.
 
-    header = give_header(energy=energy, max_force=values, rms_force=values)
+    Args:
+        n_frames (int):
+        energies (sequence): The default is one for each frame.
 
-    coordinates = [x.to_xyz(sort_index=sort_index, float_format=float_format)
-                   for x in cartesian_list]
-    output = header + '\n'.join(coordinates)
+    Returns:
+        str:
+    """
+    if energies is None:
+        energies = n_frames * [1]
+    values = n_frames * '1\n'
+    return ('[MOLDEN FORMAT]\n[N_GEO]\n{n}\n[GEOCONV]\n'
+            'energy\n{energy}max-force\n{values}rms-force\n{values}'
+            '[GEOMETRIES] (XYZ)\n').format(
+                n=n_frames, values=values,
+                energy=''.join('{}\n'.format(e) for e in energies))
 
-    if buf is not None:
-        if overwrite:
-            with open(buf, mode='w') as f:
-                f.write(output)
-        else:
-            with open(buf, mode='x') as f:
-                f.write(output)
+
+_XYZ_COMMENT = 'Created by chemcoord http://chemcoord.readthedocs.io/'
+
+
+def _get_float_spec(float_format):
+    """Return the format specification of a float format,
+    e.g. ``'.6f'`` for ``'{:.6f}'`` or ``'{:.6f}'.format``.
+
+    If the format is not of the form ``'{:.<precision><type>}'``
+    with a fixed point or exponential type, None is returned.
+    For the other types the longest string of a column is not
+    necessarily the one of its minimum or maximum.
+    """
+    if callable(float_format):
+        float_format = getattr(float_format, '__self__', None)
+    if not isinstance(float_format, string_types):
+        return None
+    match = re.match(r'^\{:((?:\.\d+)?[eEfF])\}$', float_format)
+    return None if match is None else match.group(1)
+
+
+def _get_xyz_template(atoms, float_format, positions=None):
+    """Return a template to format the atom lines of one frame
+    with one call of :meth:`str.format`.
+
+    Args:
+        atoms (sequence): The element symbols.
+        float_format (str): Format string for the coordinates.
+        positions (:class:`numpy.ndarray`): If not None, the atoms and
+            the three columns are right aligned to the widths of the
+            formatted positions, like in :meth:`pandas.DataFrame.to_string`.
+
+    Returns:
+        str: If ``float_format`` is not a simple format string,
+        None is returned.
+    """
+    spec = _get_float_spec(float_format)
+    if spec is None or not len(atoms):
+        return None
+    if positions is None:
+        line = ' '.join(3 * ['{:' + spec + '}'])
     else:
-        return output
+        # For fixed point and exponential formats the longest string
+        # of a column is the one of its minimum or maximum.
+        positions = positions.reshape((-1, 3))
+        widths = [max(len(format(positions[:, j].min(), spec)),
+                      len(format(positions[:, j].max(), spec)))
+                  for j in range(3)]
+        line = ' '.join('{:>' + str(width) + spec + '}' for width in widths)
+        width = max(len(atom) for atom in atoms)
+        atoms = [atom.rjust(width) for atom in atoms]
+    return '\n'.join(atom.replace('{', '{{').replace('}', '}}') + ' ' + line
+                     for atom in atoms)
+
+
+def _format_xyz_lines(atoms, X, float_format, align=False):
+    """Format the atom lines of one frame value by value.
+
+    This is the fallback for arbitrary float formatters.
+    """
+    if isinstance(float_format, string_types):
+        float_format = float_format.format
+    columns = [list(atoms)] + [[float_format(x) for x in X[:, j]]
+                               for j in range(3)]
+    if align:
+        columns = [[x.rjust(max(len(y) for y in column)) for x in column]
+                   for column in columns]
+    return '\n'.join(' '.join(line) for line in zip(*columns))
+
+
+def _write_frames(f, atoms, positions, float_format='{:.6f}',
+                  comments=None, chunksize=100):
+    """Write frames of positions as xyz blocks into an open file.
+
+    The atoms are shared by all frames, so the format string for one
+    frame is built only once and each frame is formatted by one call
+    of :meth:`str.format`.
+    Chunks of ``chunksize`` frames are written at once.
+
+    Args:
+        f (file): An open file or StringIO-like object.
+        atoms (sequence): The element symbols.
+        positions (:class:`numpy.ndarray`): An array of shape
+            ``(n_frames, n_atoms, 3)``.
+        float_format (str): Format string for the coordinates.
+        comments (sequence): The comment line for each frame.
+            The default is a reference to chemcoord.
+        chunksize (int):
+
+    Returns:
+        None:
+    """
+    template = _get_xyz_template(atoms, float_format)
+    if comments is None:
+        comments = itertools.repeat(_XYZ_COMMENT)
+    chunk = []
+    for X, comment in zip(positions, comments):
+        if template is None:
+            lines = _format_xyz_lines(atoms, X, float_format)
+        else:
+            lines = template.format(*X.ravel())
+        chunk.append('{}\n{}\n{}\n'.format(len(atoms), comment, lines))
+        if len(chunk) == chunksize:
+            f.write(''.join(chunk))
+            chunk = []
+    f.write(''.join(chunk))
 
 
 def write_molden(*args, **kwargs):
@@ -149,41 +272,396 @@ def read_molden(inputfile, start_index=0, get_bonds=True):
     """
     from chemcoord.cartesian_coordinates.cartesian_class_main import Cartesian
     with open(inputfile, 'r') as f:
-        found = False
-        while not found:
-            line = f.readline()
-            if '[N_GEO]' in line:
-                found = True
-                number_of_molecules = int(f.readline().strip())
-
-        energies = []
-        found = False
-        while not found:
-            line = f.readline()
-            if 'energy' in line:
-                found = True
-                for _ in range(number_of_molecules):
-                    energies.append(float(f.readline().strip()))
-
-        found = False
-        while not found:
-            line = f.readline()
-            if '[GEOMETRIES] (XYZ)' in line:
-                found = True
-                current_line = f.tell()
-                number_of_atoms = int(f.readline().strip())
-                f.seek(current_line)
-
+        number_of_molecules, energies = _read_molden_header(f)
         cartesians = []
-        for energy in energies:
-            cartesian = Cartesian.read_xyz(
-                f, start_index=start_index, get_bonds=get_bonds,
-                nrows=number_of_atoms, engine='python')
-            cartesian.metadata['energy'] = energy
-            cartesians.append(cartesian)
+        chunks = _read_xyz_chunks(f, n_frames=number_of_molecules)
+        for atoms, positions, _ in chunks:
+            index = range(start_index, start_index + positions.shape[1])
+            for k in range(len(positions)):
+                cartesian = Cartesian(atoms=atoms[k], coords=positions[k],
+                                      index=index)
+                cartesian.metadata['energy'] = energies[len(cartesians)]
+                if get_bonds:
+                    cartesian.get_bonds(use_lookup=False, set_lookup=True)
+                cartesians.append(cartesian)
     return cartesians
 
 
+def _read_molden_header(f):
+    """Read the header of a molden file until the line
+    ``[GEOMETRIES] (XYZ)``.
+
+    Args:
+        f (file): An open file in text or binary mode.
+
+    Returns:
+        tuple: The number of frames and the list of energies.
+        If there is no energy section, the energies are NaN.
+    """
+    def readline():
+        line = f.readline()
+        if not line:
+            raise ValueError('Unexpected end of the molden header')
+        return line.decode('utf-8') if isinstance(line, bytes) else line
+
+    while '[N_GEO]' not in readline():
+        pass
+    n_frames = int(readline().strip())
+    energies = n_frames * [np.nan]
+    line = readline()
+    while '[GEOMETRIES] (XYZ)' not in line:
+        if 'energy' in line:
+            energies = [float(readline().strip()) for _ in range(n_frames)]
+        line = readline()
+    return n_frames, energies
+
+
+def _scan_xyz_offsets(f, n_frames=None, blocksize=2**24):
+    """Find the byte offsets of consecutive xyz blocks
+    in a file opened in binary mode.
+
+    The file is read in blocks of ``blocksize`` bytes and only the
+    positions of the newlines and the header lines are evaluated,
+    so the atom lines are never parsed.
+
+    Args:
+        f (file): An open file in binary mode positioned at the
+            header of the first block.
+        n_frames (int): The number of blocks to scan.
+            The default is to scan until the end of the file.
+        blocksize (int):
+
+    Returns:
+        tuple: Three integer arrays with the start and end offsets
+        and the number of atoms of each block.
+    """
+    starts, ends, n_atoms = [], [], []
+    data, data_start = b'', f.tell()
+    header, skip = data_start, 0
+    while skip or n_frames is None or len(starts) < n_frames:
+        block = f.read(blocksize)
+        if not block:
+            break
+        data += block
+        newlines = np.flatnonzero(np.frombuffer(data, dtype='u1') == 10)
+        i = 0
+        while True:
+            if skip:
+                if i + skip > len(newlines):
+                    skip -= len(newlines) - i
+                    break
+                i += skip
+                skip = 0
+                header = data_start + newlines[i - 1] + 1
+                ends.append(header)
+            if i == len(newlines) or len(starts) == n_frames:
+                break
+            line = data[header - data_start:newlines[i]].strip()
+            if not line:
+                n_frames = len(starts)
+                break
+            starts.append(header)
+            n_atoms.append(int(line))
+            skip = n_atoms[-1] + 2
+        if skip:
+            keep = newlines[-1] + 1 if len(newlines) else len(data)
+        else:
+            keep = header - data_start
+        data, data_start = data[keep:], data_start + keep
+    if len(ends) < len(starts):
+        ends.append(data_start + len(data))
+    return (np.array(starts, dtype='i8'), np.array(ends, dtype='i8'),
+            np.array(n_atoms, dtype='i8'))
+
+
+def get_frame_index(inputfile, sidecar=True):
+    """Return the byte offsets of the frames of a xyz or molden file.
+
+    The file is scanned once without parsing the coordinates.
+    If ``sidecar`` is True, the index is stored next to the file
+    as ``inputfile + '.idx.npz'`` and reused as long as the size
+    and the modification time of the file do not change.
+    The index is used by :meth:`~chemcoord.CartesianTrajectory.read_frames`
+    to read arbitrary frames without reading the rest of the file.
+
+    Args:
+        inputfile (str): The path of a xyz file with one or many frames
+            or of a molden file.
+        sidecar (bool): Read and write the sidecar index file.
+            If the sidecar can not be written, e.g. in a read only
+            directory, the index is just returned.
+
+    Returns:
+        :class:`pandas.DataFrame`: One row per frame with the columns
+        ``['start', 'end', 'n_atoms']`` and for molden files
+        additionally ``'energy'``.
+    """
+    path = inputfile + '.idx.npz'
+    stat = os.stat(inputfile)
+    file_id = np.array([stat.st_size, stat.st_mtime], dtype='f8')
+    if sidecar and os.path.exists(path):
+        with np.load(path) as stored:
+            if np.array_equal(stored['file_id'], file_id):
+                columns = [key for key in stored.files if key != 'file_id']
+                return pd.DataFrame({key: stored[key] for key in columns},
+                                    columns=columns)
+
+    with open(inputfile, 'rb') as f:
+        is_molden = b'[MOLDEN FORMAT]' in f.readline().upper()
+        f.seek(0)
+        if is_molden:
+            n_frames, energies = _read_molden_header(f)
+        else:
+            n_frames, energies = None, None
+        starts, ends, n_atoms = _scan_xyz_offsets(f, n_frames)
+    index = pd.DataFrame({'start': starts, 'end': ends, 'n_atoms': n_atoms},
+                         columns=['start', 'end', 'n_atoms'])
+    if is_molden:
+        index['energy'] = energies[:len(index)]
+
+    if sidecar:
+        try:
+            with open(path, 'wb') as f:
+                np.savez(f, file_id=file_id,
+                         **{key: index[key].values for key in index})
+        except (IOError, OSError):
+            pass
+    return index
+
+
+def _remove_digits(atoms):
+    """Remove digits from element symbols, e.g. ``'C12'`` becomes ``'C'``.
+
+    The regular expression is applied only once per distinct symbol.
+
+    Args:
+        atoms (sequence):
+
+    Returns:
+        :class:`numpy.ndarray`: An object array of the same length.
+    """
+    symbols, inverse = np.unique(np.asarray(atoms, dtype='str'),
+                                 return_inverse=True)
+    symbols = np.array([re.sub(r'[0-9]+', '', symbol) for symbol in symbols],
+                       dtype='O')
+    return symbols[inverse]
+
+
+def _parse_comment(line):
+    """Parse the comment line of a xyz block into a dictionary.
+
+    Pairs of the form ``key=value`` or ``key: value`` are recognized,
+    as they are written e.g. by the extended xyz format or xtb.
+    Numerical values are converted to float.
+    A comment that consists of a single number is interpreted as energy.
+
+    Args:
+        line (str):
+
+    Returns:
+        dict:
+    """
+    line = line.strip()
+    try:
+        return {'energy': float(line)}
+    except ValueError:
+        pass
+    metadata = {}
+    pairs = re.findall(r'([A-Za-z_][\w\-]*)(?:\s*=\s*|:\s+)("[^"]*"|\S+)',
+                       line)
+    for key, value in pairs:
+        try:
+            metadata[key] = float(value)
+        except ValueError:
+            metadata[key] = value.strip('"')
+    return metadata
+
+
+def _get_comment(metadata):
+    """Return a comment line for a xyz block with the ``key=value``
+    pairs of ``metadata``, that is understood by :func:`_parse_comment`.
+    """
+    pairs = []
+    for key, value in metadata.items():
+        value = str(value)
+        if not value or any(c.isspace() for c in value):
+            value = '"{}"'.format(value)
+        pairs.append('{}={}'.format(key, value))
+    return ' '.join(pairs)
+
+
+def _parse_xyz_lines(lines, n_atoms):
+    """Parse the atom lines of several xyz blocks with the same number
+    of atoms by one call of :func:`pandas.read_csv`."""
+    fields = pd.read_csv(StringIO(''.join(lines)), delim_whitespace=True,
+                         header=None, usecols=range(4), comment='#',
+                         dtype={0: str, 1: 'f8', 2: 'f8', 3: 'f8'})
+    if len(fields) != len(lines):
+        raise ValueError('Every atom line needs an element symbol and '
+                         'three coordinates.')
+    atoms = _remove_digits(fields[0].values).reshape((-1, n_atoms))
+    positions = fields.loc[:, [1, 2, 3]].values.reshape((-1, n_atoms, 3))
+    return atoms, positions
+
+
+def _read_xyz_chunks(f, chunksize=1000, n_frames=None):
+    """Read consecutive xyz blocks from an open file.
+
+    Consecutive frames with the same number of atoms are collected
+    into chunks of at most ``chunksize`` frames, which are parsed at once.
+    So the memory usage is bounded by the size of one chunk.
+
+    Args:
+        f (file): An open file or StringIO-like object.
+        chunksize (int):
+        n_frames (int): The number of frames to read.
+            The default is to read until the end of the file.
+
+    Yields:
+        tuple: ``(atoms, positions, comments)`` with the element symbols
+        of shape ``(n_chunk, n_atoms)``, the positions of shape
+        ``(n_chunk, n_atoms, 3)`` and the list of comment lines.
+    """
+    lines, comments = [], []
+    n_atoms, n_read = None, 0
+    while n_frames is None or n_read < n_frames:
+        header = f.readline()
+        if not header.strip():
+            # Trailing blank lines end the file, but may not separate frames.
+            for line in iter(f.readline, ''):
+                if line.strip():
+                    raise ValueError(
+                        'Blank line before frame {}'.format(n_read))
+            break
+        if comments and (int(header) != n_atoms
+                         or len(comments) == chunksize):
+            atoms, positions = _parse_xyz_lines(lines, n_atoms)
+            yield atoms, positions, comments
+            lines, comments = [], []
+        n_atoms = int(header)
+        comments.append(f.readline().rstrip('\r\n'))
+        block = [f.readline() for _ in range(n_atoms)]
+        if block and not block[-1]:
+            raise ValueError('Unexpected end of file in frame {}'.format(
+                n_read))
+        lines.extend(block)
+        n_read += 1
+    if n_frames is not None and n_read < n_frames:
+        raise ValueError('Expected {} frames, found {}'.format(n_frames,
+                                                               n_read))
+    if comments:
+        atoms, positions = _parse_xyz_lines(lines, n_atoms)
+        yield atoms, positions, comments
+
+
+def iter_xyz(buf, start_index=0, get_bonds=False, chunksize=1000):
+    """Iterate over the frames of a xyz file with one or many frames.
+
+    The frames are parsed in chunks of ``chunksize`` frames,
+    so arbitrarily large files can be processed with bounded memory.
+    The comment line of each frame is parsed into the ``metadata``
+    of the Cartesian. Pairs of the form ``key=value`` or ``key: value``
+    are recognized and a single number is interpreted as energy.
+    Use :meth:`~chemcoord.CartesianTrajectory.read_xyz` to read all
+    frames into one array.
+
+    Args:
+        buf (str): A filepath or an open file.
+        start_index (int):
+        get_bonds (bool):
+        chunksize (int): The number of frames that are parsed at once.
+
+    Yields:
+        Cartesian:
+    """
+    from chemcoord.cartesian_coordinates.cartesian_class_main import Cartesian
+
+    def generate_frames(f):
+        for atoms, positions, comments in _read_xyz_chunks(f, chunksize):
+            index = range(start_index, start_index + positions.shape[1])
+            for k in range(len(positions)):
+                molecule = Cartesian(atoms=atoms[k], coords=positions[k],
+                                     index=index,
+                                     metadata=_parse_comment(comments[k]))
+                if get_bonds:
+                    molecule.get_bonds(use_lookup=False, set_lookup=True)
+                yield molecule
+
+    if hasattr(buf, 'read'):
+        for molecule in generate_frames(buf):
+            yield molecule
+    else:
+        with open(buf, 'r') as f:
+            for molecule in generate_frames(f):
+                yield molecule
+
+
+def to_cjson_lines(cartesians, buf=None, **kwargs):
+    """Write Cartesians as JSON Lines with one cjson object per line.
+
+    The molecules are serialized one after another by
+    :meth:`~chemcoord.Cartesian.to_cjson`, so ``cartesians`` can be
+    a generator and arbitrarily many molecules can be written
+    with bounded memory.
+
+    Args:
+        cartesians (iterable): Iterable of :class:`~chemcoord.Cartesian`.
+        buf (str): StringIO-like, optional buffer or path to write to.
+        kwargs: The keyword arguments are passed into :func:`json.dumps`.
+            ``indent`` is not allowed, since every object has to be
+            on one line.
+
+    Returns:
+        str: If ``buf`` is None, the formatted string is returned.
+    """
+    if kwargs.get('indent') is not None:
+        raise ValueError('JSON Lines can not be indented.')
+
+    def write(f):
+        for molecule in cartesians:
+            f.write(json.dumps(molecule.to_cjson(), **kwargs))
+            f.write('\n')
+
+    if buf is None:
+        f = StringIO()
+        write(f)
+        return f.getvalue()
+    elif hasattr(buf, 'write'):
+        write(buf)
+    else:
+        with open(buf, mode='w') as f:
+            write(f)
+
+
+def iter_cjson_lines(buf):
+    """Iterate over the molecules of a JSON Lines file with
+    one cjson object per line.
+
+    Only one molecule is held in memory at a time.
+    Empty lines are skipped.
+
+    Args:
+        buf (str): A filepath or an open file.
+
+    Yields:
+        Cartesian:
+    """
+    from chemcoord.cartesian_coordinates.cartesian_class_main import Cartesian
+
+    def generate_molecules(f):
+        for line in f:
+            if line.strip():
+                yield Cartesian.read_cjson(json.loads(line))
+
+    if hasattr(buf, 'read'):
+        for molecule in generate_molecules(buf):
+            yield molecule
+    else:
+        with open(buf, 'r') as f:
+            for molecule in generate_molecules(f):
+                yield molecule
+
+
 def isclose(a, b, align=False, rtol=1.e-5, atol=1.e-8):
     """Compare two molecules for numerical equality.
 
@@ -442,6 +920,74 @@ def get_kabsch_rotation(Q, P):
     return np.linalg.multi_dot((W, np.diag([1., 1., d]), V.T))
 
 
+def _as_float_array(positions):
+    """Return ``positions`` as float array.
+
+    Single and double precision are passed without copy
+    and promoted to double precision inside the calculations.
+    """
+    positions = np.asarray(positions)
+    if positions.dtype in (np.dtype('f4'), np.dtype('f8')):
+        return positions
+    return positions.astype('f8')
+
+
+def align_ensemble(positions, reference, masses=None, indices=None):
+    """Align an ensemble of frames onto a reference.
+
+    This is the batched version of the Kabsch algorithm in
+    :func:`~chemcoord.xyz_functions.get_kabsch_rotation`.
+    The centroids and covariance matrices of all frames are
+    calculated at once and the rotations are obtained from
+    one batched singular value decomposition.
+
+    Args:
+        positions (:class:`numpy.ndarray`): An array of shape
+            ``(n_frames, n_atoms, 3)``.
+        reference (:class:`numpy.ndarray`): An array of shape
+            ``(n_atoms, 3)``.
+        masses (sequence): Optional weights of length ``n_atoms``.
+            If masses are given, the weighted centroids are superimposed
+            and the weighted RMSD is minimised.
+        indices (sequence): Positional indices of a subset of atoms,
+            that is used for the determination of the rotation and RMSD.
+            The whole frames are moved.
+
+    Returns:
+        tuple: ``(aligned, rmsd)`` where ``aligned`` has the shape of
+        ``positions`` and ``rmsd`` is an array of length ``n_frames``.
+    """
+    positions = _as_float_array(positions)
+    reference = np.asarray(reference, dtype='f8')
+    if masses is None:
+        weights = np.ones(positions.shape[1])
+    else:
+        weights = np.asarray(masses, dtype='f8')
+    if indices is None:
+        indices = slice(None)
+    P, Q, weights = positions[:, indices], reference[indices], weights[indices]
+    weights = weights / weights.sum()
+
+    centroid_P = np.einsum('i,fij->fj', weights, P)
+    centroid_Q = weights.dot(Q)
+    Q = Q - centroid_Q
+    # Covariance matrices of all frames. Since Q is centered,
+    # the centroids of P do not have to be subtracted.
+    A = np.einsum('fia,i,ib->fab', P, weights, Q)
+    V, _, W = np.linalg.svd(A)
+    W = W.transpose(0, 2, 1)
+    D = np.ones((len(A), 3))
+    D[:, 2] = np.sign(np.linalg.det(np.matmul(W, V.transpose(0, 2, 1))))
+    R = np.matmul(W * D[:, None, :], V.transpose(0, 2, 1))
+
+    aligned = (np.matmul(positions - centroid_P[:, None, :],
+                         R.transpose(0, 2, 1))
+               + centroid_Q)
+    deviation = aligned[:, indices] - (Q + centroid_Q)
+    rmsd = np.sqrt(np.einsum('i,fij,fij->f', weights, deviation, deviation))
+    return aligned, rmsd
+
+
 def apply_grad_zmat_tensor(grad_C, construction_table, cart_dist):
     """Apply the gradient for transformation to Zmatrix space onto cart_dist.
 
@@ -460,14 +1006,15 @@ def apply_grad_zmat_tensor(grad_C, construction_table, cart_dist):
     if (construction_table.index != cart_dist.index).any():
         message = "construction_table and cart_dist must use the same index"
         raise ValueError(message)
-    X_dist = cart_dist.loc[:, ['x', 'y', 'z']].values.T
-    C_dist = np.tensordot(grad_C, X_dist, axes=([3, 2], [0, 1])).T
-    if C_dist.dtype == np.dtype('i8'):
-        C_dist = C_dist.astype('f8')
-    try:
+
+    def get_C_dist(X_dist):
+        C_dist = np.tensordot(grad_C, X_dist, axes=([3, 2], [0, 1])).T
         C_dist[:, [1, 2]] = np.rad2deg(C_dist[:, [1, 2]])
-    except AttributeError:
-        C_dist[:, [1, 2]] = sympy.deg(C_dist[:, [1, 2]])
+        return C_dist
+
+    # Symbolic distortions are applied term by term with float arrays.
+    C_dist = _symbolic.apply_linear(
+        get_C_dist, cart_dist.loc[:, ['x', 'y', 'z']].values.T)
 
     from chemcoord.internal_coordinates.zmat_class_main import Zmat
     cols = ['atom', 'b', 'bond', 'a', 'angle', 'd', 'dihedral']
@@ -478,4 +1025,381 @@ def apply_grad_zmat_tensor(grad_C, construction_table, cart_dist):
     new.loc[:, ['b', 'a', 'd']] = construction_table
     new.loc[:, 'atom'] = cart_dist.loc[:, 'atom']
     new.loc[:, ['bond', 'angle', 'dihedral']] = C_dist
-    return Zmat(new, _metadata={'last_valid_cartesian': cart_dist})
+    return Zmat(new)
+
+
+def _prepare_measurement(positions, indices, n_indices):
+    positions = _as_float_array(positions)
+    indices = np.asarray(indices, dtype='i8')
+    if indices.ndim == 1:
+        indices = indices[None, :]
+    if indices.shape[1] != n_indices:
+        message = 'indices has to be of shape (n_coords, {})'.format
+        raise ValueError(message(n_indices))
+    # The kernels do not check bounds.
+    if indices.size and (indices.min() < 0
+                         or indices.max() >= positions.shape[-2]):
+        raise IndexError('indices have to be in [0, n_atoms)')
+    single_frame = positions.ndim == 2
+    if single_frame:
+        positions = positions[None, :, :]
+    return np.ascontiguousarray(positions), indices, single_frame
+
+
+def get_bond_lengths(positions, indices):
+    """Return the distances between given atoms for many frames.
+
+    This is the batched version of
+    :meth:`~chemcoord.Cartesian.get_bond_lengths`.
+
+    Args:
+        positions (:class:`numpy.ndarray`): An array of shape
+            ``(n_frames, n_atoms, 3)`` or ``(n_atoms, 3)``.
+        indices (:class:`numpy.ndarray`): An integer array of shape
+            ``(n_coords, 2)`` with the positional indices ``[i, b]``.
+
+    Returns:
+        :class:`numpy.ndarray`: An array of shape ``(n_frames, n_coords)``
+        or ``(n_coords,)`` if ``positions`` was two dimensional.
+    """
+    positions, indices, single_frame = _prepare_measurement(
+        positions, indices, 2)
+    result = _jit_get_bond_lengths(positions, indices)
+    return result[0] if single_frame else result
+
+
+def get_angle_degrees(positions, indices):
+    """Return the angles between given atoms for many frames.
+
+    This is the batched version of
+    :meth:`~chemcoord.Cartesian.get_angle_degrees`.
+
+    Args:
+        positions (:class:`numpy.ndarray`): An array of shape
+            ``(n_frames, n_atoms, 3)`` or ``(n_atoms, 3)``.
+        indices (:class:`numpy.ndarray`): An integer array of shape
+            ``(n_coords, 3)`` with the positional indices ``[i, b, a]``.
+
+    Returns:
+        :class:`numpy.ndarray`: An array of shape ``(n_frames, n_coords)``
+        or ``(n_coords,)`` if ``positions`` was two dimensional.
+    """
+    positions, indices, single_frame = _prepare_measurement(
+        positions, indices, 3)
+    result = _jit_get_angle_degrees(positions, indices)
+    return result[0] if single_frame else result
+
+
+def get_dihedral_degrees(positions, indices):
+    """Return the dihedrals between given atoms for many frames.
+
+    This is the batched version of
+    :meth:`~chemcoord.Cartesian.get_dihedral_degrees`.
+
+    Args:
+        positions (:class:`numpy.ndarray`): An array of shape
+            ``(n_frames, n_atoms, 3)`` or ``(n_atoms, 3)``.
+        indices (:class:`numpy.ndarray`): An integer array of shape
+            ``(n_coords, 4)`` with the positional indices ``[i, b, a, d]``.
+
+    Returns:
+        :class:`numpy.ndarray`: An array of shape ``(n_frames, n_coords)``
+        or ``(n_coords,)`` if ``positions`` was two dimensional.
+    """
+    positions, indices, single_frame = _prepare_measurement(
+        positions, indices, 4)
+    result = _jit_get_dihedral_degrees(positions, indices)
+    return result[0] if single_frame else result
+
+
+@jit(nopython=True, cache=True)
+def _jit_get_bond_lengths(positions, indices):
+    n_frames, n_coords = positions.shape[0], indices.shape[0]
+    result = np.empty((n_frames, n_coords))
+    for f in range(n_frames):
+        for k in range(n_coords):
+            i, b = indices[k, 0], indices[k, 1]
+            s = 0.
+            for l in range(3):
+                x = np.float64(positions[f, i, l]) - positions[f, b, l]
+                s += x * x
+            result[f, k] = m.sqrt(s)
+    return result
+
+
+@jit(nopython=True, cache=True)
+def _jit_get_angle_degrees(positions, indices):
+    n_frames, n_coords = positions.shape[0], indices.shape[0]
+    result = np.empty((n_frames, n_coords))
+    for f in range(n_frames):
+        for k in range(n_coords):
+            i, b, a = indices[k, 0], indices[k, 1], indices[k, 2]
+            dot_product, norm_bi, norm_ba = 0., 0., 0.
+            for l in range(3):
+                bi = np.float64(positions[f, i, l]) - positions[f, b, l]
+                ba = np.float64(positions[f, a, l]) - positions[f, b, l]
+                dot_product += bi * ba
+                norm_bi += bi * bi
+                norm_ba += ba * ba
+            dot_product /= m.sqrt(norm_bi * norm_ba)
+            dot_product = min(max(dot_product, -1.), 1.)
+            result[f, k] = m.degrees(m.acos(dot_product))
+    return result
+
+
+@jit(nopython=True, cache=True)
+def _jit_get_dihedral_degrees(positions, indices):
+    n_frames, n_coords = positions.shape[0], indices.shape[0]
+    result = np.empty((n_frames, n_coords))
+    IB, BA, AD = np.empty(3), np.empty(3), np.empty(3)
+    N1, N2 = np.empty(3), np.empty(3)
+    for f in range(n_frames):
+        for k in range(n_coords):
+            i, b = indices[k, 0], indices[k, 1]
+            a, d = indices[k, 2], indices[k, 3]
+            for l in range(3):
+                IB[l] = np.float64(positions[f, b, l]) - positions[f, i, l]
+                BA[l] = np.float64(positions[f, a, l]) - positions[f, b, l]
+                AD[l] = np.float64(positions[f, d, l]) - positions[f, a, l]
+            for l in range(3):
+                l1, l2 = (l + 1) % 3, (l + 2) % 3
+                N1[l] = IB[l1] * BA[l2] - IB[l2] * BA[l1]
+                N2[l] = BA[l1] * AD[l2] - BA[l2] * AD[l1]
+            dot_product, norm_n1, norm_n2 = 0., 0., 0.
+            for l in range(3):
+                dot_product += N1[l] * N2[l]
+                norm_n1 += N1[l] * N1[l]
+                norm_n2 += N2[l] * N2[l]
+            dot_product /= m.sqrt(norm_n1 * norm_n2)
+            dot_product = min(max(dot_product, -1.), 1.)
+            dihedral = m.degrees(m.acos(dot_product))
+            # Direction of rotation: BA * (N1 x N2)
+            direction = 0.
+            for l in range(3):
+                l1, l2 = (l + 1) % 3, (l + 2) % 3
+                direction += BA[l] * (N1[l1] * N2[l2] - N1[l2] * N2[l1])
+            if direction > 0:
+                dihedral = 360 - dihedral
+            result[f, k] = dihedral
+    return result
+
+
+def get_pairwise_rmsd(positions, out=None, rows=None, centered=False):
+    """Calculate the RMSD after optimal superposition for all pairs of frames.
+
+    The RMSD of each pair is obtained with the quaternion characteristic
+    polynomial (QCP) method [6]_ instead of a singular value
+    decomposition. The rows are distributed over all cores.
+
+    The result is stored in condensed form like in
+    :func:`scipy.spatial.distance.pdist`:
+    The RMSD between the frames ``i < j`` is at the position
+    ``n_frames * i - i * (i + 1) // 2 + j - i - 1``.
+    Use :func:`scipy.spatial.distance.squareform` to obtain the square matrix.
+
+    Args:
+        positions (:class:`numpy.ndarray`): An array of shape
+            ``(n_frames, n_atoms, 3)``.
+        out (:class:`numpy.ndarray`): Optional output array of length
+            ``n_frames * (n_frames - 1) // 2``.
+            It may be a :class:`numpy.memmap` for matrices that
+            do not fit into memory.
+        rows (tuple): A tuple ``(start, stop)`` with
+            ``0 <= start <= stop <= n_frames``. If it is given, only the
+            pairs ``i < j`` with ``start <= i < stop`` are calculated
+            and written into ``out``.
+            This allows to split the calculation across processes
+            that share ``out``.
+        centered (bool): If True, the centroid of each frame is
+            assumed to be at the origin and ``positions`` are
+            used without copy.
+            Splitting the calculation with ``rows`` should center the
+            frames once beforehand.
+
+    Returns:
+        :class:`numpy.ndarray`: ``out``.
+    """
+    positions = _as_float_array(positions)
+    n_frames = positions.shape[0]
+    if rows is None:
+        start, stop = 0, n_frames
+    else:
+        start, stop = rows
+        if not 0 <= start <= stop <= n_frames:
+            raise ValueError('rows has to be (start, stop) with '
+                             '0 <= start <= stop <= n_frames')
+    if out is None:
+        out = np.empty(n_frames * (n_frames - 1) // 2)
+    elif len(out) != n_frames * (n_frames - 1) // 2:
+        raise ValueError('out has to be of length n_frames * (n_frames - 1)'
+                         ' // 2')
+    if not centered:
+        centroids = positions.mean(axis=1, dtype='f8')
+        positions = positions - centroids.astype(positions.dtype)[:, None, :]
+    G = np.einsum('ijk,ijk->i', positions, positions, dtype='f8')
+    _jit_pairwise_rmsd(positions, G, start, stop, out.view(np.ndarray))
+    return out
+
+
+@jit(nopython=True, cache=True)
+def _jit_qcp_rmsd(A, B, G_A, G_B):
+    """Return the RMSD of the centered coordinates A and B."""
+    Sxx, Sxy, Sxz = 0., 0., 0.
+    Syx, Syy, Syz = 0., 0., 0.
+    Szx, Szy, Szz = 0., 0., 0.
+    for k in range(A.shape[0]):
+        ax, ay, az = (np.float64(A[k, 0]), np.float64(A[k, 1]),
+                      np.float64(A[k, 2]))
+        bx, by, bz = (np.float64(B[k, 0]), np.float64(B[k, 1]),
+                      np.float64(B[k, 2]))
+        Sxx += ax * bx
+        Sxy += ax * by
+        Sxz += ax * bz
+        Syx += ay * bx
+        Syy += ay * by
+        Syz += ay * bz
+        Szx += az * bx
+        Szy += az * by
+        Szz += az * bz
+
+    Sxx2, Syy2, Szz2 = Sxx * Sxx, Syy * Syy, Szz * Szz
+    Sxy2, Syz2, Sxz2 = Sxy * Sxy, Syz * Syz, Sxz * Sxz
+    Syx2, Szy2, Szx2 = Syx * Syx, Szy * Szy, Szx * Szx
+
+    SyzSzymSyySzz2 = 2. * (Syz * Szy - Syy * Szz)
+    Sxx2Syy2Szz2Syz2Szy2 = Syy2 + Szz2 - Sxx2 + Syz2 + Szy2
+    C2 = -2. * (Sxx2 + Syy2 + Szz2 + Sxy2 + Syx2 + Sxz2 + Szx2 + Syz2 + Szy2)
+    C1 = 8. * (Sxx * Syz * Szy + Syy * Szx * Sxz + Szz * Sxy * Syx
+               - Sxx * Syy * Szz - Syz * Szx * Sxy - Szy * Syx * Sxz)
+
+    SxzpSzx, SyzpSzy, SxypSyx = Sxz + Szx, Syz + Szy, Sxy + Syx
+    SyzmSzy, SxzmSzx, SxymSyx = Syz - Szy, Sxz - Szx, Sxy - Syx
+    SxxpSyy, SxxmSyy = Sxx + Syy, Sxx - Syy
+    Sxy2Sxz2Syx2Szx2 = Sxy2 + Sxz2 - Syx2 - Szx2
+
+    C0 = (Sxy2Sxz2Syx2Szx2 * Sxy2Sxz2Syx2Szx2
+          + (Sxx2Syy2Szz2Syz2Szy2 + SyzSzymSyySzz2)
+          * (Sxx2Syy2Szz2Syz2Szy2 - SyzSzymSyySzz2)
+          + (-SxzpSzx * SyzmSzy + SxymSyx * (SxxmSyy - Szz))
+          * (-SxzmSzx * SyzpSzy + SxymSyx * (SxxmSyy + Szz))
+          + (-SxzpSzx * SyzpSzy - SxypSyx * (SxxpSyy - Szz))
+          * (-SxzmSzx * SyzmSzy - SxypSyx * (SxxpSyy + Szz))
+          + (SxypSyx * SyzpSzy + SxzpSzx * (SxxmSyy + Szz))
+          * (-SxymSyx * SyzmSzy + SxzpSzx * (SxxpSyy + Szz))
+          + (SxypSyx * SyzmSzy + SxzmSzx * (SxxmSyy - Szz))
+          * (-SxymSyx * SyzpSzy + SxzmSzx * (SxxpSyy - Szz)))
+
+    # Newton iteration for the largest eigenvalue of the key matrix
+    E0 = (G_A + G_B) / 2.
+    max_eigenvalue = E0
+    for _ in range(50):
+        old = max_eigenvalue
+        x2 = max_eigenvalue * max_eigenvalue
+        b = (x2 + C2) * max_eigenvalue
+        a = b + C1
+        max_eigenvalue -= ((a * max_eigenvalue + C0)
+                           / (2. * x2 * max_eigenvalue + b + a))
+        if abs(max_eigenvalue - old) < abs(1e-11 * max_eigenvalue):
+            break
+    return m.sqrt(max(2. * (E0 - max_eigenvalue) / A.shape[0], 0.))
+
+
+@jit(nopython=True, cache=True, parallel=True)
+def _jit_pairwise_rmsd(positions, G, start, stop, out):
+    n_frames = positions.shape[0]
+    for i in nb.prange(start, stop):
+        offset = n_frames * i - i * (i + 1) // 2 - i - 1
+        for j in range(i + 1, n_frames):
+            out[offset + j] = _jit_qcp_rmsd(positions[i], positions[j],
+                                            G[i], G[j])
+
+
+def get_inertia(positions, masses):
+    """Calculate the inertia tensors and principal axes of many frames.
+
+    This is the batched version of :meth:`~chemcoord.Cartesian.get_inertia`.
+    The six unique components of each inertia tensor are accumulated
+    relative to the barycenter, which is calculated in a first pass
+    over the atoms.
+
+    The unit is ``amu * length-unit-of-positions**2``
+
+    Args:
+        positions (:class:`numpy.ndarray`): An array of shape
+            ``(n_frames, n_atoms, 3)``.
+        masses (sequence): The masses of the atoms, which are shared
+            by all frames.
+
+    Returns:
+        dict: The returned dictionary has the following keys, where
+        each value has ``n_frames`` as first dimension:
+
+        ``transformed_positions``:
+        The positions moved to the barycenter and transformed to the basis
+        spanned by the eigenvectors of the inertia tensor.
+
+        ``barycenter``:
+        The mass weighted average location.
+
+        ``diag_inertia_tensor``:
+        The ascendingly sorted inertia moments.
+
+        ``inertia_tensor``:
+        The inertia tensor in the old basis.
+
+        ``eigenvectors``:
+        The eigenvectors of the inertia tensor in the old basis
+        as orthonormal righthanded basis.
+        The signs are chosen, so that the largest component of the
+        first two eigenvectors is positive.
+    """
+    positions = _as_float_array(positions)
+    barycenter, inertia = _jit_get_inertia(positions,
+                                           np.asarray(masses, dtype='f8'))
+    diag_inertia, eig_v = np.linalg.eigh(inertia)
+    largest = np.take_along_axis(
+        eig_v, abs(eig_v).argmax(axis=1)[:, None, :], axis=1)
+    eig_v *= np.where(largest < 0, -1., 1.)
+    eig_v[:, :, 2] = np.cross(eig_v[:, :, 0], eig_v[:, :, 1])
+    transformed = np.matmul(positions - barycenter[:, None, :], eig_v)
+    return {'transformed_positions': transformed, 'barycenter': barycenter,
+            'eigenvectors': eig_v, 'diag_inertia_tensor': diag_inertia,
+            'inertia_tensor': inertia}
+
+
+@jit(nopython=True, cache=True)
+def _jit_get_inertia(positions, masses):
+    """Return the barycenters and inertia tensors of all frames."""
+    n_frames, n_atoms = positions.shape[0], positions.shape[1]
+    barycenter = np.empty((n_frames, 3))
+    inertia = np.empty((n_frames, 3, 3))
+    for f in range(n_frames):
+        M, cx, cy, cz = 0., 0., 0., 0.
+        for i in range(n_atoms):
+            mass = masses[i]
+            M += mass
+            cx += mass * positions[f, i, 0]
+            cy += mass * positions[f, i, 1]
+            cz += mass * positions[f, i, 2]
+        cx, cy, cz = cx / M, cy / M, cz / M
+        # Second moments relative to the barycenter
+        Cxx, Cyy, Czz, Cxy, Cxz, Cyz = 0., 0., 0., 0., 0., 0.
+        for i in range(n_atoms):
+            mass = masses[i]
+            x = positions[f, i, 0] - cx
+            y = positions[f, i, 1] - cy
+            z = positions[f, i, 2] - cz
+            Cxx += mass * x * x
+            Cyy += mass * y * y
+            Czz += mass * z * z
+            Cxy += mass * x * y
+            Cxz += mass * x * z
+            Cyz += mass * y * z
+        barycenter[f, 0], barycenter[f, 1], barycenter[f, 2] = cx, cy, cz
+        inertia[f, 0, 0] = Cyy + Czz
+        inertia[f, 1, 1] = Cxx + Czz
+        inertia[f, 2, 2] = Cxx + Cyy
+        inertia[f, 0, 1] = inertia[f, 1, 0] = -Cxy
+        inertia[f, 0, 2] = inertia[f, 2, 0] = -Cxz
+        inertia[f, 1, 2] = inertia[f, 2, 1] = -Cyz
+    return barycenter, inertia
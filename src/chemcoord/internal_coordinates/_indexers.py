@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+from six import string_types
+
 from chemcoord.exceptions import InvalidReference
 
 
@@ -8,6 +10,22 @@ class _generic_Indexer(object):
         self.molecule = molecule
 
 
+def _reset_fingerprint(molecule, key):
+    """Assignments to other columns than ``['bond', 'angle', 'dihedral']``
+    may change the structure of the Zmatrix."""
+    if isinstance(key, tuple):
+        if isinstance(key[1], string_types):
+            columns = set([key[1]])
+        else:
+            try:
+                columns = set(key[1])
+            except TypeError:
+                columns = set([key[1]])
+        if columns <= {'bond', 'angle', 'dihedral'}:
+            return
+    molecule._fingerprint = None
+
+
 class _Loc(_generic_Indexer):
     def __getitem__(self, key):
         if isinstance(key, tuple):
@@ -23,6 +41,7 @@ class _Unsafe_Loc(_Loc):
             self.molecule._frame.loc[key[0], key[1]] = value
         else:
             self.molecule._frame.loc[key] = value
+        _reset_fingerprint(self.molecule, key)
 
 
 class _Safe_Loc(_Loc):
@@ -35,6 +54,7 @@ class _Safe_Loc(_Loc):
             molecule._frame.loc[key[0], key[1]] = value
         else:
             molecule._frame.loc[key] = value
+        _reset_fingerprint(molecule, key)
 
         try:
             molecule.get_cartesian()
@@ -68,6 +88,7 @@ class _Unsafe_ILoc(_ILoc):
             self.molecule._frame.iloc[key[0], key[1]] = value
         else:
             self.molecule._frame.iloc[key] = value
+        self.molecule._fingerprint = None
 
 
 class _Safe_ILoc(_Unsafe_ILoc):
@@ -80,6 +101,7 @@ class _Safe_ILoc(_Unsafe_ILoc):
             molecule._frame.iloc[key[0], key[1]] = value
         else:
             molecule._frame.iloc[key] = value
+        molecule._fingerprint = None
 
         try:
             molecule.get_cartesian()
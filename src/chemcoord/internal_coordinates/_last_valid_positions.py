@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals, with_statement)
+
+import numpy as np
+import pandas as pd
+
+import chemcoord.constants as constants
+import chemcoord.internal_coordinates._zmat_transformation as transformation
+from chemcoord.exceptions import ERR_CODE_InvalidReference, InvalidReference
+
+
+class LastValidPositions(object):
+    """The positions of the last valid state of a Zmat.
+
+    They are needed as reference, when dummy atoms are inserted.
+    If they are created from a Zmat, only a snapshot of the construction
+    table and the values is taken.
+    The transformation to cartesian coordinates is done on first access
+    of :attr:`positions`.
+    An instance is not changed afterwards and is shared between copies
+    of a Zmat.
+    A symbolic Zmat has no positions, so no snapshot is taken
+    until its values are evaluated.
+    """
+    def __init__(self, index, positions=None, c_table=None, values=None):
+        """How to initialize a LastValidPositions instance.
+
+        Either ``positions`` or ``c_table`` and ``values``
+        have to be given.
+
+        Args:
+            index (pd.Index):
+            positions (np.array): An array of shape ``(n_atoms, 3)``.
+            c_table (np.array): The labels of the construction table as
+                array of shape ``(3, n_atoms)``.
+            values (np.array): The values for
+                ``['bond', 'angle', 'dihedral']`` as array of
+                shape ``(3, n_atoms)``. The angles are given in degrees.
+
+        Returns:
+            LastValidPositions:
+        """
+        self.index = index
+        self._positions = positions
+        self._c_table = c_table
+        self._values = values
+
+    @classmethod
+    def from_zmat(cls, zmat):
+        """Take a snapshot of the construction table and the values.
+
+        Args:
+            zmat (Zmat):
+
+        Returns:
+            LastValidPositions: If the values are symbolic,
+            None is returned.
+        """
+        frame = zmat._frame
+        c_table = np.array([frame[col].values for col in ['b', 'a', 'd']])
+        try:
+            values = np.array([frame[col].values
+                               for col in ['bond', 'angle', 'dihedral']],
+                              dtype='f8')
+        except (TypeError, ValueError):
+            return None
+        return cls(frame.index, c_table=c_table, values=values)
+
+    @classmethod
+    def from_cartesian(cls, cartesian):
+        """Use the positions of a Cartesian.
+
+        Args:
+            cartesian (Cartesian):
+
+        Returns:
+            LastValidPositions:
+        """
+        return cls(cartesian.index,
+                   positions=np.array(cartesian._get_coords(), dtype='f8'))
+
+    @property
+    def positions(self):
+        """The positions as array of shape ``(n_atoms, 3)``.
+
+        Raises an :class:`~exceptions.InvalidReference` exception,
+        if the snapshot is not a valid Zmatrix.
+        """
+        if self._positions is None:
+            c_table = pd.DataFrame(self._c_table.T, index=self.index)
+            c_table = c_table.replace(constants.int_label)
+            c_table = c_table.replace(
+                {k: v for v, k in enumerate(self.index)})
+            C = self._values.copy()
+            C[[1, 2], :] = np.radians(C[[1, 2], :])
+            err, row, X = transformation.get_X(
+                C, c_table.values.astype('i8').T)
+            if err == ERR_CODE_InvalidReference:
+                b, a, d = self._c_table[:, row]
+                raise InvalidReference(i=self.index[row], b=b, a=a, d=d)
+            self._positions = np.ascontiguousarray(X.T)
+            self._c_table, self._values = None, None
+        return self._positions
+
+    def get_positions(self, labels):
+        """Return the positions of the atoms with the given labels.
+
+        Args:
+            labels (sequence): Index labels or absolute references
+                like ``'origin'``.
+
+        Returns:
+            np.array: An array of shape ``(len(labels), 3)``.
+        """
+        out = np.empty((len(labels), 3))
+        for row, label in enumerate(labels):
+            if label in constants.absolute_refs:
+                out[row] = constants.absolute_refs[label]
+            else:
+                out[row] = self.positions[self.index.get_loc(label)]
+        return out
@@ -2,7 +2,6 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals, with_statement)
 
-import copy
 import warnings
 from functools import partial
 
@@ -14,9 +13,12 @@ import pandas as pd
 from chemcoord._generic_classes.generic_core import GenericCore
 from chemcoord.exceptions import (ERR_CODE_OK, ERR_CODE_InvalidReference,
                                   InvalidReference, PhysicalMeaning)
+from chemcoord.internal_coordinates._last_valid_positions import \
+    LastValidPositions
 from chemcoord.internal_coordinates._zmat_class_pandas_wrapper import \
     PandasWrapper
-from chemcoord.utilities import _decorators
+from chemcoord.utilities import _decorators, _symbolic
+from chemcoord.utilities._fingerprint import get_fingerprint
 
 append_indexer_docstring = _decorators.Appender(
     """In the case of obtaining elements, the indexing behaves like
@@ -36,6 +38,7 @@ class ZmatCore(PandasWrapper, GenericCore):
                                 'd', 'dihedral'})
     dummy_manipulation_allowed = True
     test_operators = True
+    _fingerprint = None
 
     def __init__(self, frame, metadata=None, _metadata=None):
         """How to initialize a Zmat instance.
@@ -64,11 +67,12 @@ class ZmatCore(PandasWrapper, GenericCore):
         if _metadata is None:
             self._metadata = {}
         else:
-            self._metadata = copy.deepcopy(_metadata)
+            self._metadata = _metadata.copy()
 
         def fill_missing_keys_with_defaults(_metadata):
-            if 'last_valid_cartesian' not in _metadata:
-                _metadata['last_valid_cartesian'] = self.get_cartesian()
+            if _metadata.get('last_valid_positions') is None:
+                _metadata['last_valid_positions'] = \
+                    LastValidPositions.from_zmat(self)
             if 'has_dummies' not in _metadata:
                 _metadata['has_dummies'] = {}
 
@@ -77,6 +81,7 @@ class ZmatCore(PandasWrapper, GenericCore):
     def copy(self):
         molecule = self.__class__(
             self._frame, metadata=self.metadata, _metadata=self._metadata)
+        molecule._fingerprint = self._fingerprint
         return molecule
 
     def __getitem__(self, key):
@@ -136,7 +141,22 @@ and assigning values safely.
         """
         return indexers._Safe_ILoc(self)
 
+    def _get_fingerprint(self):
+        """Return a hash of the index and the columns
+        ``['atom', 'b', 'a', 'd']``.
+
+        It is calculated only once and passed on to copies.
+        Assignments to other columns than ``['bond', 'angle', 'dihedral']``
+        and changes of the index invalidate it.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = get_fingerprint(
+                self._frame.loc[:, ['atom', 'b', 'a', 'd']])
+        return self._fingerprint
+
     def _test_if_can_be_added(self, other):
+        if self._get_fingerprint() == other._get_fingerprint():
+            return
         cols = ['atom', 'b', 'a', 'd']
         if not (np.alltrue(self.loc[:, cols] == other.loc[:, cols])
                 and np.alltrue(self.index == other.index)):
@@ -146,7 +166,106 @@ and assigning values safely.
                        "columns ['bond', 'angle', 'dihedral']")
             raise PhysicalMeaning(message)
 
+    def _get_values(self):
+        """Return the columns ``['bond', 'angle', 'dihedral']``
+        as array of shape ``(n_atoms, 3)``."""
+        return np.column_stack([self._frame[col].values
+                                for col in ['bond', 'angle', 'dihedral']])
+
+    def _get_array_operands(self, other):
+        """Return the values of ``self`` and the other operand
+        of an arithmetic operation as float arrays.
+
+        A Series with the labels ``['bond', 'angle', 'dihedral']``
+        is aligned to them and used by position otherwise.
+        If the fast path is not possible, e.g. for symbolic values
+        or DataFrames, ``(None, None)`` is returned.
+        """
+        values = self._get_values()
+        if values.dtype != np.dtype('f8') or isinstance(other, pd.DataFrame):
+            return None, None
+        elif isinstance(other, pd.Series):
+            other = self._get_series_values(
+                other, ['bond', 'angle', 'dihedral'])
+        if isinstance(other, ZmatCore):
+            self._test_if_can_be_added(other)
+            operand = other._get_values()
+            if operand.dtype != np.dtype('f8'):
+                return None, None
+            return values, operand
+        try:
+            return values, np.asarray(other, dtype='f8')
+        except (TypeError, ValueError):
+            return None, None
+
+    def _with_values(self, new_values):
+        """Return a copy with new values for
+        ``['bond', 'angle', 'dihedral']``.
+
+        This is the fast path of the arithmetic operators.
+        If :attr:`test_operators` is True, the result is tested
+        in the same way as an assignment with :meth:`~Zmat.safe_loc`.
+        """
+        new = self.copy()
+        for j, col in enumerate(['bond', 'angle', 'dihedral']):
+            new._frame[col] = new_values[:, j]
+        if self.test_operators:
+            new._test_values()
+        return new
+
+    def _test_values(self):
+        """Test if ``self`` can be transformed to cartesian coordinates
+        after its values were changed in place.
+
+        Dummy atoms are inserted or removed,
+        if :attr:`dummy_manipulation_allowed` is True.
+        """
+        try:
+            self.get_cartesian()
+        except InvalidReference as exception:
+            if self.dummy_manipulation_allowed:
+                self._insert_dummy_zmat(exception, inplace=True)
+            else:
+                exception.zmat_after_assignment = self
+                raise exception
+        if self.dummy_manipulation_allowed:
+            self._remove_dummies(inplace=True)
+
+    def evaluate(self):
+        """Test the Zmatrix after operations without testing.
+
+        This is the deferred version of the test, which is done
+        by the operators if :attr:`test_operators` is True.
+        Chains of operations can be done with
+        :class:`~chemcoord.zmat_functions.TestOperators` switched off
+        and only the final result is transformed
+        to cartesian coordinates once::
+
+            with cc.TestOperators(False):
+                zmat = z0 + 0.5 * (z1 - z0)
+            zmat = zmat.evaluate()
+
+        The operations are not recorded, but the intermediate values are
+        still calculated immediately on the value arrays.
+        Only the test is deferred, so it is the responsibility of the
+        caller to switch the tests off for the chain.
+        The behaviour for invalid references is controlled by
+        :class:`~chemcoord.zmat_functions.DummyManipulation`.
+
+        Args:
+            None
+
+        Returns:
+            Zmat: A tested copy, which contains dummy atoms if necessary.
+        """
+        new = self.copy()
+        new._test_values()
+        return new
+
     def __add__(self, other):
+        values, operand = self._get_array_operands(other)
+        if values is not None:
+            return self._with_values(values + operand)
         coords = ['bond', 'angle', 'dihedral']
         if isinstance(other, ZmatCore):
             self._test_if_can_be_added(other)
@@ -164,6 +283,9 @@ and assigning values safely.
         return self + other
 
     def __sub__(self, other):
+        values, operand = self._get_array_operands(other)
+        if values is not None:
+            return self._with_values(values - operand)
         coords = ['bond', 'angle', 'dihedral']
         if isinstance(other, ZmatCore):
             self._test_if_can_be_added(other)
@@ -178,6 +300,9 @@ and assigning values safely.
         return new
 
     def __rsub__(self, other):
+        values, operand = self._get_array_operands(other)
+        if values is not None:
+            return self._with_values(operand - values)
         coords = ['bond', 'angle', 'dihedral']
         if isinstance(other, ZmatCore):
             self._test_if_can_be_added(other)
@@ -192,6 +317,9 @@ and assigning values safely.
         return new
 
     def __mul__(self, other):
+        values, operand = self._get_array_operands(other)
+        if values is not None:
+            return self._with_values(values * operand)
         coords = ['bond', 'angle', 'dihedral']
         if isinstance(other, ZmatCore):
             self._test_if_can_be_added(other)
@@ -209,6 +337,9 @@ and assigning values safely.
         return self * other
 
     def __truediv__(self, other):
+        values, operand = self._get_array_operands(other)
+        if values is not None:
+            return self._with_values(values / operand)
         coords = ['bond', 'angle', 'dihedral']
         if isinstance(other, ZmatCore):
             self._test_if_can_be_added(other)
@@ -223,6 +354,9 @@ and assigning values safely.
         return new
 
     def __rtruediv__(self, other):
+        values, operand = self._get_array_operands(other)
+        if values is not None:
+            return self._with_values(operand / values)
         coords = ['bond', 'angle', 'dihedral']
         if isinstance(other, ZmatCore):
             self._test_if_can_be_added(other)
@@ -237,6 +371,9 @@ and assigning values safely.
         return new
 
     def __pow__(self, other):
+        values, operand = self._get_array_operands(other)
+        if values is not None:
+            return self._with_values(values**operand)
         coords = ['bond', 'angle', 'dihedral']
         new = self.copy()
         if self.test_operators:
@@ -252,6 +389,9 @@ and assigning values safely.
         return -1 * self
 
     def __abs__(self):
+        values = self._get_values()
+        if values.dtype == np.dtype('f8'):
+            return self._with_values(abs(values))
         coords = ['bond', 'angle', 'dihedral']
         new = self.copy()
         if self.test_operators:
@@ -388,8 +528,8 @@ and assigning values safely.
             and ``perform_checks`` is True, a check for the transformation
             to cartesian coordinates is performed.
             If no :class:`~chemcoord.exceptions.InvalidReference`
-            exceptions are raised, the resulting cartesian is written to
-            ``self._metadata['last_valid_cartesian']``.
+            exceptions are raised, the resulting positions are written to
+            ``self._metadata['last_valid_positions']``.
 
         Args:
             symb_expr (sympy expression):
@@ -438,10 +578,127 @@ and assigning values safely.
                 else:
                     raise e
             else:
-                out._metadata['last_valid_cartesian'] = new_cartesian
-                self._metadata['last_valid_cartesian'] = new_cartesian
+                last_valid = LastValidPositions.from_cartesian(new_cartesian)
+                out._metadata['last_valid_positions'] = last_valid
+                self._metadata['last_valid_positions'] = last_valid
         return out
 
+    def compile(self, *symbols):
+        """Compile the symbolic expressions in ``['bond', 'angle', 'dihedral']``
+
+        In contrast to :meth:`~Zmat.subs` the symbolic expressions are
+        translated only once with :func:`sympy.lambdify`
+        into a numpy function.
+        The returned function can be called repeatedly
+        with concrete values for the symbols and takes the fast numeric path.
+        Each call returns a new :class:`~Zmat` with 64bit float columns.
+
+        Args:
+            symbols (sympy.Symbol): The symbols in the order in which
+                their values are passed to the compiled function.
+                If no symbols are given, all free symbols
+                sorted by their name are used.
+
+        Returns:
+            function: A function ``f(*values, perform_checks=True)``.
+            If ``perform_checks is True``,
+            it is asserted, that the resulting Zmatrix can be converted
+            to cartesian coordinates and the resulting positions are written
+            to ``_metadata['last_valid_positions']`` of the new Zmatrix.
+            Dummy atoms will be inserted automatically if necessary.
+            The used order of symbols is stored in ``f.symbols``.
+        """
+        cols = ['bond', 'angle', 'dihedral']
+        symbols, get_values = _symbolic.lambdify_array(
+            self.loc[:, cols].values, symbols if symbols else None)
+
+        def f(*values, **kwargs):
+            perform_checks = kwargs.pop('perform_checks', True)
+            new_values = get_values(*values)
+            if new_values.ndim != 2:
+                raise ValueError('Only scalar values are allowed.')
+            out = self.copy()
+            for j, col in enumerate(cols):
+                out._frame[col] = new_values[:, j]
+            if perform_checks:
+                try:
+                    new_cartesian = out.get_cartesian()
+                except InvalidReference as e:
+                    if out.dummy_manipulation_allowed:
+                        out._manipulate_dummies(e, inplace=True)
+                    else:
+                        raise e
+                else:
+                    out._metadata['last_valid_positions'] = \
+                        LastValidPositions.from_cartesian(new_cartesian)
+            return out
+        f.symbols = tuple(symbols)
+        return f
+
+    def scan(self, values, grid=False, as_iterator=False, chunksize=1000):
+        """Evaluate the symbolic Zmatrix for many parameter values at once.
+
+        The symbolic expressions in ``['bond', 'angle', 'dihedral']``
+        are compiled once (see :meth:`~Zmat.compile`) and evaluated for
+        all points in one vectorized call.
+        The transformation to cartesian coordinates is done by a batched
+        numba kernel, that shares the construction table between all points.
+
+        .. note:: Dummy atoms are not inserted automatically.
+            If any point leads to an invalid reference,
+            an :class:`~chemcoord.exceptions.InvalidReference`
+            exception is raised for the first such point.
+
+        Args:
+            values (dict): A dictionary ``{symbol: values, ...}``.
+                The values are either scalars or one dimensional arrays.
+            grid (bool): If True, the cartesian product
+                of the values is scanned.
+                Otherwise the values are broadcasted against each other.
+            as_iterator (bool): If True, an iterator of
+                :class:`~chemcoord.Cartesian` is returned,
+                that is evaluated lazily in chunks.
+            chunksize (int): The number of points that are transformed
+                at once, if ``as_iterator`` is True.
+
+        Returns:
+            np.array or iterator: An array of shape
+            ``(n_points, n_atoms, 3)`` with the positions in the
+            order of ``self.index`` or an iterator of Cartesians.
+        """
+        if not values:
+            raise ValueError('At least one symbol has to be scanned.')
+        symbols = list(values.keys())
+        values = [np.asarray(values[symb], dtype='f8') for symb in symbols]
+        if grid:
+            values = [x.ravel()
+                      for x in np.meshgrid(*values, indexing='ij')]
+        else:
+            values = [x.ravel() for x in np.broadcast_arrays(*values)]
+
+        cols = ['bond', 'angle', 'dihedral']
+        get_values = _symbolic.lambdify_array(
+            self.loc[:, cols].values, symbols)[1]
+        c_table = self._get_positional_c_table()
+
+        def get_positions(start, stop):
+            C = get_values(*[x[start:stop] for x in values])
+            return self._get_positions_batch(C, c_table, offset=start)
+
+        n_points = len(values[0])
+        if not as_iterator:
+            return get_positions(0, n_points)
+
+        def iterate_cartesians():
+            from chemcoord.cartesian_coordinates.cartesian_class_main \
+                import Cartesian
+            for start in range(0, n_points, chunksize):
+                for positions in get_positions(start, start + chunksize):
+                    yield Cartesian(atoms=self['atom'].values,
+                                    coords=positions, index=self.index,
+                                    metadata=self.metadata)
+        return iterate_cartesians()
+
     def change_numbering(self, new_index=None):
         """Change numbering to a new index.
 
@@ -488,13 +745,14 @@ and assigning values safely.
         out = self.copy()
         out.unsafe_loc[:, ['b', 'a', 'd']] = c_table
         out._frame.index = new_index
+        out._fingerprint = None
         return out
 
     def _insert_dummy_cart(self, exception, last_valid_cartesian=None):
         """Insert dummy atom into the already built cartesian of exception
         """
-        def get_normal_vec(cartesian, reference_labels):
-            b_pos, a_pos, d_pos = cartesian._get_positions(reference_labels)
+        def get_normal_vec(last_valid, reference_labels):
+            b_pos, a_pos, d_pos = last_valid.get_positions(reference_labels)
             BA = a_pos - b_pos
             AD = d_pos - a_pos
             N1 = np.cross(BA, AD)
@@ -513,9 +771,15 @@ and assigning values safely.
             return cartesian, i_dummy
 
         if last_valid_cartesian is None:
-            last_valid_cartesian = self._metadata['last_valid_cartesian']
+            last_valid = self._metadata['last_valid_positions']
+            if last_valid is None:
+                # There was no numeric state yet.
+                raise exception
+        else:
+            last_valid = LastValidPositions.from_cartesian(
+                last_valid_cartesian)
         ref_labels = self.loc[exception.index, ['b', 'a', 'd']]
-        n1 = get_normal_vec(last_valid_cartesian, ref_labels)
+        n1 = get_normal_vec(last_valid, ref_labels)
         return insert_dummy(exception.already_built_cartesian, ref_labels, n1)
 
     def _insert_dummy_zmat(self, exception, inplace=False):
@@ -549,8 +813,11 @@ and assigning values safely.
             zframe.loc[dummy_d, ['bond', 'angle', 'dihedral']] = zmat_values
 
             zmat._frame = zframe
-            zmat._metadata['has_dummies'][i] = {'dummy_d': dummy_d,
-                                                'actual_d': actual_d}
+            zmat._fingerprint = None
+            # The entries of _metadata are shared between copies.
+            has_dummies = zmat._metadata['has_dummies'].copy()
+            has_dummies[i] = {'dummy_d': dummy_d, 'actual_d': actual_d}
+            zmat._metadata['has_dummies'] = has_dummies
             raise_warning(i, dummy_d)
 
         zmat = self if inplace else self.copy()
@@ -562,7 +829,8 @@ and assigning values safely.
                          *zmat._insert_dummy_cart(exception))
 
         try:
-            zmat._metadata['last_valid_cartesian'] = zmat.get_cartesian()
+            zmat._metadata['last_valid_positions'] = \
+                LastValidPositions.from_cartesian(zmat.get_cartesian())
         except InvalidReference as e:
             zmat._insert_dummy_zmat(e, inplace=True)
 
@@ -571,6 +839,8 @@ and assigning values safely.
 
     def _has_removable_dummies(self):
         has_dummies = self._metadata['has_dummies']
+        if not has_dummies:
+            return []
         to_be_tested = has_dummies.keys()
         c_table = self.loc[to_be_tested, ['b', 'a', 'd']]
         c_table['d'] = [has_dummies[i]['actual_d'] for i in to_be_tested]
@@ -601,10 +871,11 @@ and assigning values safely.
         zmat.unsafe_loc[to_remove, ['bond', 'angle', 'dihedral']] = zmat_values
         zmat._frame.drop([has_dummies[k]['dummy_d'] for k in to_remove],
                          inplace=True)
+        zmat._fingerprint = None
         warnings.warn('The dummy atoms {} were removed'.format(to_remove),
                       UserWarning)
-        for k in to_remove:
-            zmat._metadata['has_dummies'].pop(k)
+        zmat._metadata['has_dummies'] = {
+            k: v for k, v in has_dummies.items() if k not in to_remove}
         if not inplace:
             return zmat
 
@@ -617,6 +888,52 @@ and assigning values safely.
             zmat = zmat._insert_dummy_zmat(exception, inplace=False)
             return zmat._remove_dummies(inplace=False)
 
+    def _get_positional_c_table(self):
+        """Return the construction table as positional integer array.
+
+        The absolute references are replaced by
+        :attr:`~chemcoord.constants.int_label`.
+
+        Returns:
+            np.array: An array of shape ``(3, n_atoms)``.
+        """
+        c_table = self.loc[:, ['b', 'a', 'd']]
+        c_table = c_table.replace(constants.int_label)
+        c_table = c_table.replace({k: v for v, k in enumerate(c_table.index)})
+        return c_table.values.astype('i8').T
+
+    def _get_positions_batch(self, C, c_table=None, offset=0):
+        """Transform many sets of internal coordinates at once.
+
+        Args:
+            C (np.array): An array of shape ``(n_points, n_atoms, 3)``
+                with the values for ``['bond', 'angle', 'dihedral']``
+                in the order of ``self.index``.
+                The angles are given in degrees.
+            c_table (np.array): The positional construction table.
+                If it is None, it is calculated from ``self``.
+            offset (int): Is added to the number of the point
+                in the message of an
+                :class:`~chemcoord.exceptions.InvalidReference` exception.
+
+        Returns:
+            np.array: An array of shape ``(n_points, n_atoms, 3)``.
+        """
+        if c_table is None:
+            c_table = self._get_positional_c_table()
+        C = np.array(C, dtype='f8').transpose(0, 2, 1)
+        C[:, [1, 2], :] = np.radians(C[:, [1, 2], :])
+        err, row, positions = transformation.get_X_batch(
+            np.ascontiguousarray(C), c_table)
+        invalid = (err == ERR_CODE_InvalidReference).nonzero()[0]
+        if len(invalid):
+            i = self.index[row[invalid[0]]]
+            b, a, d = self.loc[i, ['b', 'a', 'd']]
+            message = 'Invalid reference at point {}'.format
+            raise InvalidReference(message(offset + invalid[0]),
+                                   i=i, b=b, a=a, d=d)
+        return positions.transpose(0, 2, 1)
+
     def get_cartesian(self):
         """Return the molecule in cartesian coordinates.
 
@@ -639,10 +956,7 @@ and assigning values safely.
             cartesian = Cartesian(xyz_frame, metadata=self.metadata)
             return cartesian
 
-        c_table = self.loc[:, ['b', 'a', 'd']]
-        c_table = c_table.replace(constants.int_label)
-        c_table = c_table.replace({k: v for v, k in enumerate(c_table.index)})
-        c_table = c_table.values.astype('i8').T
+        c_table = self._get_positional_c_table()
 
         C = self.loc[:, ['bond', 'angle', 'dihedral']].values.T
         C[[1, 2], :] = np.radians(C[[1, 2], :])
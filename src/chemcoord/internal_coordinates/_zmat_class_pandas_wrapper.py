@@ -20,6 +20,9 @@ class PandasWrapper(object):
         There are two dictionaris as attributes
         called `metadata` and `_metadata`
         which are passed on when doing slices...
+        Only the dictionaries are copied, their entries are shared.
+        The entries of `_metadata` are therefore never changed in place,
+        but replaced by new objects.
     """
     def __len__(self):
         return self.shape[0]
@@ -77,6 +80,8 @@ class PandasWrapper(object):
 
         Wrapper around the :meth:`pandas.DataFrame.sort_index` method.
         """
+        if inplace:
+            self._fingerprint = None
         return self._frame.sort_index(axis=axis, level=level,
                                       ascending=ascending, inplace=inplace,
                                       kind=kind, na_position=na_position,
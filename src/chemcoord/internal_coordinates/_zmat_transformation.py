@@ -65,6 +65,29 @@ def get_X(C, c_table):
     return (ERR_CODE_OK, j, X)  # pylint:disable=undefined-loop-variable
 
 
+@jit(nopython=True, cache=True)
+def get_X_batch(C, c_table):
+    """Batched version of :func:`get_X`.
+
+    Args:
+        C (np.array): An array of shape ``(n_points, 3, n_atoms)``.
+        c_table (np.array): The positional construction table
+            of shape ``(3, n_atoms)``, which is shared by all points.
+
+    Returns:
+        tuple: ``(err, row, X)`` where ``err`` and ``row`` are arrays
+        of length ``n_points`` and ``X`` has the same shape as ``C``.
+    """
+    n_points = C.shape[0]
+    X = np.empty_like(C)
+    err = np.empty(n_points, dtype=nb.i8)
+    row = np.empty(n_points, dtype=nb.i8)
+    for k in range(n_points):
+        err[k], row[k], X_k = get_X(C[k], c_table)
+        X[k] = X_k
+    return err, row, X
+
+
 @jit(nopython=True, cache=True)
 def chain_grad(X, grad_X, C, c_table, j, l):
     if j < constants.keys_below_are_abs_refs:
@@ -40,6 +40,15 @@ class Zmat(ZmatIO):
     ``shape=(len(Zmat), 3)`` which is again added elementwise.
     The same rules are true for subtraction, division and multiplication.
 
+    **Testing of results**:
+    By default the result of each operator is transformed to cartesian
+    coordinates to test for invalid references and to insert dummy atoms
+    if necessary.
+    For chains of operations like ``z0 + 0.5 * (z1 - z0)`` it is faster
+    to switch off the testing with
+    :class:`~chemcoord.zmat_functions.TestOperators`
+    and to test only the final result with :meth:`~Zmat.evaluate`.
+
     **Indexing**:
 
     The indexing behaves like Indexing and Selecting data in
@@ -2,11 +2,14 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals, with_statement)
 
+from io import open  # pylint:disable=redefined-builtin
+
 import numpy as np
-import sympy
 
+import chemcoord.cartesian_coordinates.xyz_functions as xyz_functions
 from chemcoord import export
 from chemcoord.internal_coordinates.zmat_class_main import Zmat
+from chemcoord.utilities import _symbolic
 
 
 @export
@@ -57,6 +60,15 @@ class TestOperators(object):
         with TestOperators(True):
             zmat_1 + zmat_2
             # Raises InvalidReference Exception
+
+    Switching the testing off is useful for chains of operations,
+    where only the final result is tested once::
+
+        with TestOperators(False):
+            zmat_3 = zmat_1 + 0.5 * (zmat_2 - zmat_1)
+        zmat_3 = zmat_3.evaluate()
+        # Inserts dummy atoms or raises an InvalidReference Exception
+        # depending on DummyManipulation.
     """
     def __init__(self, test_operators, cls=None):
         if cls is None:
@@ -86,13 +98,78 @@ def apply_grad_cartesian_tensor(grad_X, zmat_dist):
         :class:`~chemcoord.Cartesian`: Distortions in cartesian space.
     """
     columns = ['bond', 'angle', 'dihedral']
-    C_dist = zmat_dist.loc[:, columns].values.T
-    try:
-        C_dist = C_dist.astype('f8')
+
+    def get_cart_dist(C_dist):
+        C_dist = C_dist.copy()
         C_dist[[1, 2], :] = np.radians(C_dist[[1, 2], :])
-    except (TypeError, AttributeError):
-        C_dist[[1, 2], :] = sympy.rad(C_dist[[1, 2], :])
-    cart_dist = np.tensordot(grad_X, C_dist, axes=([3, 2], [0, 1])).T
+        return np.tensordot(grad_X, C_dist, axes=([3, 2], [0, 1])).T
+
+    # Symbolic distortions are applied term by term with float arrays.
+    cart_dist = _symbolic.apply_linear(
+        get_cart_dist, zmat_dist.loc[:, columns].values.T)
     from chemcoord.cartesian_coordinates.cartesian_class_main import Cartesian
     return Cartesian(atoms=zmat_dist['atom'],
                      coords=cart_dist, index=zmat_dist.index)
+
+
+def interpolate(zmat_a, zmat_b, n_frames, buf=None, file_format='molden',
+                float_format='{:.6f}', chunksize=1000):
+    """Interpolate linearly in internal coordinates between two Zmatrices.
+
+    The difference between ``zmat_a`` and ``zmat_b`` is calculated once
+    and the dihedrals of the difference are wrapped into
+    :math:`[-180^\\circ, 180^\\circ)`
+    (compare with :meth:`~chemcoord.Zmat.minimize_dihedrals`).
+    All intermediate frames are generated vectorized and
+    transformed to cartesian space by a batched kernel.
+
+    Args:
+        zmat_a (:class:`~chemcoord.Zmat`): The first frame.
+        zmat_b (:class:`~chemcoord.Zmat`): The last frame.
+            It has to use the same index and construction table
+            as ``zmat_a``.
+        n_frames (int): The number of frames including both ends.
+        buf (str): Optional filename or open file to write to.
+            The frames are calculated and written in chunks.
+        file_format (str): Either ``'molden'`` or ``'xyz'``.
+        float_format (str): Format string for the coordinates.
+        chunksize (int): The number of frames that are transformed
+            at once, if ``buf`` is given.
+
+    Returns:
+        :class:`numpy.ndarray`: If ``buf`` is None, an array of shape
+        ``(n_frames, n_atoms, 3)`` with the positions in the order of
+        ``zmat_a.index``.
+    """
+    if file_format not in {'molden', 'xyz'}:
+        raise ValueError("file_format has to be 'molden' or 'xyz'")
+    zmat_a._test_if_can_be_added(zmat_b)
+    cols = ['bond', 'angle', 'dihedral']
+    C_a = zmat_a.loc[:, cols].values.astype('f8')
+    D = zmat_b.loc[:, cols].values.astype('f8') - C_a
+    D[:, 2] = D[:, 2] % 360
+    D[:, 2] -= (D[:, 2] // 180) * 360
+    t = np.linspace(0., 1., n_frames)
+    c_table = zmat_a._get_positional_c_table()
+
+    def get_positions(start, stop):
+        C = C_a + t[start:stop, None, None] * D
+        return zmat_a._get_positions_batch(C, c_table, offset=start)
+
+    if buf is None:
+        return get_positions(0, n_frames)
+
+    def write(f):
+        atoms = zmat_a['atom'].values
+        if file_format == 'molden':
+            f.write(xyz_functions._get_molden_header(n_frames))
+        for start in range(0, n_frames, chunksize):
+            xyz_functions._write_frames(
+                f, atoms, get_positions(start, start + chunksize),
+                float_format=float_format)
+
+    if hasattr(buf, 'write'):
+        write(buf)
+    else:
+        with open(buf, mode='w') as f:
+            write(f)
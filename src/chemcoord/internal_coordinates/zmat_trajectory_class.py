@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals, with_statement)
+
+import numbers
+
+import numpy as np
+import pandas as pd
+
+import chemcoord.constants as constants
+import chemcoord.internal_coordinates._zmat_transformation as transformation
+from chemcoord.exceptions import (ERR_CODE_InvalidReference, InvalidReference,
+                                  PhysicalMeaning)
+from chemcoord.internal_coordinates.zmat_class_main import Zmat
+from chemcoord.utilities import _trajectory_file
+
+
+class ZmatTrajectory(object):
+    """A sequence of frames of the same molecule in internal coordinates.
+
+    All frames share one construction table and the bookkeeping of
+    inserted dummy atoms.
+    The values for ``['bond', 'angle', 'dihedral']`` are stored in
+    one array of shape ``(n_frames, n_atoms, 3)`` in the order of
+    ``construction_table.index``.
+    Per frame information is stored in the :class:`pandas.DataFrame`
+    ``frame_metadata`` with one row per frame.
+
+    **Indexing**:
+
+    ``trajectory[i]`` returns the ``i``-th frame as
+    :class:`~chemcoord.Zmat`.
+    Slices, boolean masks and lists of integers return a new
+    :class:`~chemcoord.ZmatTrajectory`.
+    For slices the values are a view of the original array.
+
+    **Mathematical Operations**:
+
+    The binary operators ``+ - * /`` and the unary operators ``+ - abs``
+    are applied to the values of all frames at once.
+    The other operand can be a scalar, an array that broadcasts against
+    ``(n_frames, n_atoms, 3)``, a :class:`~chemcoord.Zmat`
+    or a :class:`~chemcoord.ZmatTrajectory` with the same
+    construction table.
+    In contrast to :class:`~chemcoord.Zmat` the result is not tested
+    and no dummy atoms are inserted. Invalid references are reported by
+    :meth:`~ZmatTrajectory.get_cartesian`.
+
+    **Compact storage**:
+
+    The values can be stored as float32 by passing a float32 array
+    or by calling :meth:`~ZmatTrajectory.compact`.
+    The transformation to cartesian coordinates is always done
+    in float64.
+    """
+    def __init__(self, atoms, construction_table, values, metadata=None,
+                 frame_metadata=None, has_dummies=None, dtype=None):
+        """How to initialize a ZmatTrajectory instance.
+
+        Args:
+            atoms (sequence): A list of strings. (Elementsymbols)
+            construction_table (pd.DataFrame): A DataFrame with the columns
+                ``['b', 'a', 'd']``. Its index is shared by all frames.
+            values (sequence): An array of shape
+                ``(n_frames, n_atoms, 3)``. The angles are given in degrees.
+            metadata (dict): Metadata shared by all frames.
+            frame_metadata (pd.DataFrame): Metadata per frame.
+                Everything accepted by the :class:`pandas.DataFrame`
+                constructor with one row per frame can be passed.
+            has_dummies (dict): The bookkeeping of inserted dummy atoms
+                as in ``Zmat._metadata['has_dummies']``.
+            dtype (str): The dtype of the stored values,
+                either ``'f8'`` or the compact ``'f4'``.
+                The default is ``'f4'`` for float32 values
+                and ``'f8'`` otherwise.
+
+        Returns:
+            ZmatTrajectory: A new trajectory instance.
+        """
+        values = np.asarray(values)
+        if dtype is None:
+            dtype = 'f4' if values.dtype == np.dtype('f4') else 'f8'
+        if np.dtype(dtype) not in (np.dtype('f4'), np.dtype('f8')):
+            raise ValueError("dtype has to be 'f4' or 'f8'")
+        values = values.astype(dtype, copy=False)
+        if len(values.shape) != 3 or values.shape[2] != 3:
+            message = 'values have to be of shape (n_frames, n_atoms, 3)'
+            raise ValueError(message)
+        self.values = values
+        self.atoms = np.array(atoms, dtype='O')
+        self.construction_table = construction_table.loc[:, ['b', 'a', 'd']]
+        if not (self.atoms.shape == (values.shape[1],)
+                == (len(self.construction_table),)):
+            raise PhysicalMeaning('There has to be one element symbol and '
+                                  'one row in the construction table '
+                                  'per atom.')
+
+        if metadata is None:
+            self.metadata = {}
+        else:
+            self.metadata = metadata.copy()
+        self.frame_metadata = pd.DataFrame(frame_metadata,
+                                           index=range(len(values)))
+        if has_dummies is None:
+            self.has_dummies = {}
+        else:
+            self.has_dummies = has_dummies.copy()
+        self._c_table = None
+
+    @property
+    def index(self):
+        return self.construction_table.index
+
+    @classmethod
+    def from_zmats(cls, zmats):
+        """Create a trajectory from a list of Zmats.
+
+        All Zmats need the same construction table.
+        The ``metadata`` of each Zmat becomes a row
+        of ``frame_metadata``.
+
+        Args:
+            zmats (list): A list of :class:`~chemcoord.Zmat`.
+
+        Returns:
+            ZmatTrajectory:
+        """
+        first = zmats[0]
+        coords = ['bond', 'angle', 'dihedral']
+        values = np.empty((len(zmats), len(first), 3))
+        for k, zmat in enumerate(zmats):
+            first._test_if_can_be_added(zmat)
+            values[k] = zmat.loc[:, coords].values
+        return cls(first.loc[:, 'atom'].values, first.loc[:, ['b', 'a', 'd']],
+                   values, frame_metadata=[zmat.metadata for zmat in zmats],
+                   has_dummies=first._metadata['has_dummies'])
+
+    @classmethod
+    def read_binary(cls, path, mode='r'):
+        """Read a binary trajectory file.
+
+        The values are a view into the memory mapped file.
+        Look into :meth:`~chemcoord.CartesianTrajectory.read_binary`.
+
+        Args:
+            path (str):
+            mode (str): The mode of :class:`numpy.memmap`.
+
+        Returns:
+            ZmatTrajectory:
+        """
+        header, records = _trajectory_file.read(path, mode=mode)
+        if header['kind'] != 'zmat':
+            raise ValueError('{} contains a {} trajectory'.format(
+                path, header['kind']))
+        c_table = pd.DataFrame(header['construction_table'],
+                               index=header['index'], columns=['b', 'a', 'd'])
+        return cls(header['atoms'], c_table, records['values'],
+                   metadata=header['metadata'],
+                   frame_metadata={field: records[field]
+                                   for field in header['fields']},
+                   has_dummies=dict(header['has_dummies']))
+
+    def to_binary(self, path, append=False):
+        """Write the trajectory into a binary file.
+
+        The construction table and the bookkeeping of dummy atoms
+        are stored in the header.
+        Look into :meth:`~chemcoord.CartesianTrajectory.to_binary`.
+
+        Args:
+            path (str):
+            append (bool): Append the frames to an existing file with
+                the same atoms, construction table, dtype and
+                ``frame_metadata`` columns.
+
+        Returns:
+            None:
+        """
+        header = {'version': 1, 'kind': 'zmat',
+                  'dtype': self.values.dtype.newbyteorder('<').str,
+                  'atoms': self.atoms.tolist(), 'index': self.index.tolist(),
+                  'construction_table': {
+                      col: self.construction_table[col].tolist()
+                      for col in ['b', 'a', 'd']},
+                  'has_dummies': sorted(self.has_dummies.items()),
+                  'metadata': self.metadata}
+        _trajectory_file.write(path, header, self.values,
+                               self.frame_metadata, append=append)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return '<{} with {} frames of {} atoms>'.format(
+            self.__class__.__name__, len(self), len(self.index))
+
+    def _get_frame(self, values):
+        frame = pd.DataFrame(
+            columns=['atom', 'b', 'bond', 'a', 'angle', 'd', 'dihedral'],
+            index=self.index, dtype='f8')
+        frame['atom'] = self.atoms
+        frame.loc[:, ['b', 'a', 'd']] = self.construction_table
+        frame.loc[:, ['bond', 'angle', 'dihedral']] = values
+        return frame
+
+    def _new(self, values, frame_metadata=None):
+        if frame_metadata is None:
+            frame_metadata = self.frame_metadata
+        new = self.__class__(
+            self.atoms, self.construction_table, values,
+            metadata=self.metadata, frame_metadata=frame_metadata,
+            has_dummies=self.has_dummies, dtype=self.values.dtype)
+        new._c_table = self._c_table
+        return new
+
+    def __getitem__(self, key):
+        if isinstance(key, (numbers.Integral, np.integer)):
+            metadata = self.metadata.copy()
+            metadata.update(self.frame_metadata.iloc[key].dropna().to_dict())
+            return Zmat(self._get_frame(self.values[key]), metadata=metadata,
+                        _metadata={'has_dummies': self.has_dummies})
+        else:
+            if isinstance(key, slice):
+                frames = np.arange(len(self))[key]
+            else:
+                frames = np.arange(len(self))[np.asarray(key)]
+            frame_metadata = self.frame_metadata.iloc[frames]
+            return self._new(self.values[key],
+                             frame_metadata.reset_index(drop=True))
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def copy(self):
+        """Return a copy with its own array of values.
+
+        Args:
+            None
+
+        Returns:
+            ZmatTrajectory:
+        """
+        return self._new(self.values.copy())
+
+    def compact(self):
+        """Return a copy with the values stored as float32.
+
+        Args:
+            None
+
+        Returns:
+            ZmatTrajectory:
+        """
+        new = self.__class__(
+            self.atoms, self.construction_table, self.values.astype('f4'),
+            metadata=self.metadata, frame_metadata=self.frame_metadata,
+            has_dummies=self.has_dummies)
+        new._c_table = self._c_table
+        return new
+
+    def _test_if_can_be_added(self, other):
+        cols = ['b', 'a', 'd']
+        if isinstance(other, Zmat):
+            atoms, c_table = other.loc[:, 'atom'].values, other.loc[:, cols]
+        else:
+            atoms, c_table = other.atoms, other.construction_table
+        if not (len(c_table) == len(self.index)
+                and np.alltrue(c_table.index == self.index)
+                and np.alltrue(c_table == self.construction_table)
+                and np.alltrue(atoms == self.atoms)):
+            message = ("You can add only those zmatrices that have the same "
+                       "index, use the same construction table, have the same "
+                       "ordering... The only allowed difference is in the "
+                       "columns ['bond', 'angle', 'dihedral']")
+            raise PhysicalMeaning(message)
+
+    def _get_operand(self, other):
+        if isinstance(other, ZmatTrajectory):
+            self._test_if_can_be_added(other)
+            return other.values
+        elif isinstance(other, Zmat):
+            self._test_if_can_be_added(other)
+            return other.loc[:, ['bond', 'angle', 'dihedral']].values.astype(
+                'f8')
+        else:
+            return np.asarray(other, dtype='f8')
+
+    def __add__(self, other):
+        return self._new(self.values + self._get_operand(other))
+
+    def __radd__(self, other):
+        return self + other
+
+    def __sub__(self, other):
+        return self._new(self.values - self._get_operand(other))
+
+    def __rsub__(self, other):
+        return self._new(self._get_operand(other) - self.values)
+
+    def __mul__(self, other):
+        return self._new(self.values * self._get_operand(other))
+
+    def __rmul__(self, other):
+        return self * other
+
+    def __truediv__(self, other):
+        return self._new(self.values / self._get_operand(other))
+
+    def __rtruediv__(self, other):
+        return self._new(self._get_operand(other) / self.values)
+
+    def __pos__(self):
+        return self.copy()
+
+    def __neg__(self):
+        return self._new(-self.values)
+
+    def __abs__(self):
+        return self._new(abs(self.values))
+
+    @staticmethod
+    def _convert_d(d):
+        r = d % 360
+        return r - (r // 180) * 360
+
+    def iupacify(self):
+        """Give the IUPAC conform representation for all frames.
+
+        Look into :meth:`~chemcoord.Zmat.iupacify`.
+
+        Args:
+            None
+
+        Returns:
+            ZmatTrajectory: Trajectory with accordingly changed
+            angles and dihedrals.
+        """
+        new = self.copy()
+        angle, dihedral = new.values[:, :, 1], new.values[:, :, 2]
+        angle %= 360
+        select = angle > 180
+        angle[select] -= 180
+        dihedral[select] += 180
+        new.values[:, :, 2] = self._convert_d(dihedral)
+        return new
+
+    def minimize_dihedrals(self):
+        """Give a representation of the dihedrals with minimized absolute
+        value for all frames.
+
+        Look into :meth:`~chemcoord.Zmat.minimize_dihedrals`.
+
+        Args:
+            None
+
+        Returns:
+            ZmatTrajectory: Trajectory with accordingly changed dihedrals.
+        """
+        new = self.copy()
+        new.values[:, :, 2] = self._convert_d(new.values[:, :, 2])
+        return new
+
+    def unwrap_dihedrals(self):
+        """Remove the jumps of 360° of the dihedrals between
+        consecutive frames.
+
+        This is the counterpart of :meth:`~ZmatTrajectory.minimize_dihedrals`
+        along the trajectory and useful before analysing or interpolating
+        the movement of the dihedrals.
+
+        Args:
+            None
+
+        Returns:
+            ZmatTrajectory: Trajectory with accordingly changed dihedrals.
+        """
+        new = self.copy()
+        new.values[:, :, 2] = np.degrees(
+            np.unwrap(np.radians(new.values[:, :, 2]), axis=0))
+        return new
+
+    def _get_positional_c_table(self):
+        """Return the construction table as positional integer array.
+
+        It is calculated once and shared between trajectories that are
+        derived by slicing or arithmetic.
+        """
+        if self._c_table is None:
+            c_table = self.construction_table.replace(constants.int_label)
+            c_table = c_table.replace(
+                {k: v for v, k in enumerate(c_table.index)})
+            self._c_table = c_table.values.astype('i8').T
+        return self._c_table
+
+    def get_cartesian(self):
+        """Return all frames in cartesian coordinates.
+
+        The transformation of all frames is done in one call of a
+        compiled function.
+        Raises an :class:`~exceptions.InvalidReference` exception,
+        if the reference of an atom is undefined in any frame.
+
+        Args:
+            None
+
+        Returns:
+            CartesianTrajectory:
+        """
+        from chemcoord.cartesian_coordinates.cartesian_trajectory_class \
+            import CartesianTrajectory
+        C = self.values.transpose(0, 2, 1).astype('f8')
+        C[:, [1, 2], :] = np.radians(C[:, [1, 2], :])
+        err, row, positions = transformation.get_X_batch(
+            C, self._get_positional_c_table())
+        invalid = (err == ERR_CODE_InvalidReference).nonzero()[0]
+        if len(invalid):
+            i = self.index[row[invalid[0]]]
+            b, a, d = self.construction_table.loc[i, ['b', 'a', 'd']]
+            message = 'Invalid reference at frame {}'.format
+            raise InvalidReference(message(invalid[0]), i=i, b=b, a=a, d=d)
+        return CartesianTrajectory(
+            self.atoms, positions.transpose(0, 2, 1), index=self.index,
+            metadata=self.metadata, frame_metadata=self.frame_metadata,
+            dtype=self.values.dtype)
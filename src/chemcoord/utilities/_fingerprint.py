@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+
+import pandas as pd
+
+
+def get_fingerprint(data):
+    """Return a hash of the index and the values of a DataFrame or Series.
+
+    The hash depends on the order of the rows.
+    It is used to test quickly, if two molecules have
+    the same structure, e.g. the same index and atoms.
+
+    Args:
+        data (pd.DataFrame or pd.Series):
+
+    Returns:
+        str:
+    """
+    hashes = pd.util.hash_pandas_object(data, index=True).values
+    return hashlib.sha1(hashes.tobytes()).hexdigest()
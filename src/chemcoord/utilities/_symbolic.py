@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals, with_statement)
+
+import numpy as np
+import sympy
+
+
+def get_free_symbols(values):
+    """Return the set of free symbols in an array of values.
+
+    Args:
+        values (:class:`numpy.ndarray`): An object array, which may
+            contain sympy expressions and numbers.
+
+    Returns:
+        set:
+    """
+    free_symbols = set()
+    for x in values.flat:
+        if isinstance(x, sympy.Basic):
+            free_symbols |= x.free_symbols
+    return free_symbols
+
+
+def lambdify_array(values, symbols=None):
+    """Compile an array of symbolic expressions into a numpy function.
+
+    All symbolic entries of ``values`` are passed in one call to
+    :func:`sympy.lambdify`, the numeric entries are stored once in a
+    template array.
+
+    Args:
+        values (:class:`numpy.ndarray`): An object array, which may
+            contain sympy expressions and numbers.
+        symbols (sequence): The free symbols in the order in which
+            their values are passed to the returned function.
+            If it is None, all free symbols sorted by their name are used.
+
+    Returns:
+        tuple: ``(symbols, f)`` where ``f`` is a function that
+        accepts one value (or array of values) per symbol.
+        The values are broadcasted against each other and ``f`` returns a
+        float array of shape ``broadcasted_shape + values.shape``.
+    """
+    values = np.asarray(values, dtype='O')
+    free_symbols = get_free_symbols(values)
+    if symbols is None:
+        symbols = sorted(free_symbols, key=str)
+    else:
+        symbols = list(symbols)
+    missing = free_symbols - set(symbols)
+    if missing:
+        message = 'Values for the symbols {} have to be given.'.format
+        raise ValueError(message(sorted(missing, key=str)))
+
+    template = np.empty(values.shape, dtype='f8')
+    cells, exprs = [], []
+    for position, x in np.ndenumerate(values):
+        if isinstance(x, sympy.Basic) and x.free_symbols:
+            template[position] = np.nan
+            cells.append(position)
+            exprs.append(x)
+        else:
+            template[position] = float(x)
+    compiled = sympy.lambdify(symbols, exprs, modules='numpy')
+
+    def f(*args):
+        if len(args) != len(symbols):
+            message = 'Expected {} values, got {}.'.format
+            raise ValueError(message(len(symbols), len(args)))
+        args = np.broadcast_arrays(*[np.asarray(v, dtype='f8') for v in args])
+        shape = args[0].shape if args else ()
+        out = np.empty(shape + template.shape)
+        out[...] = template
+        if cells:
+            for position, result in zip(cells, compiled(*args)):
+                out[(Ellipsis,) + position] = result
+        return out
+    return symbols, f
+
+
+def get_term_coefficients(values):
+    """Decompose an array of expressions into numeric coefficient arrays.
+
+    Every entry is written as ``sum(coefficient * term)``, where the terms
+    are the keys of :meth:`sympy.Expr.as_coefficients_dict`.
+    Numeric entries contribute to the term ``1``.
+
+    Args:
+        values (:class:`numpy.ndarray`): An object array, which may
+            contain sympy expressions and numbers.
+
+    Returns:
+        dict: A dictionary ``{term: coefficients}``, where
+        ``coefficients`` is a float array of the same shape as ``values``.
+    """
+    values = np.asarray(values, dtype='O')
+    coefficients = {sympy.S.One: np.zeros(values.shape)}
+    for position, x in np.ndenumerate(values):
+        if isinstance(x, sympy.Basic):
+            terms = x.as_coefficients_dict()
+        else:
+            terms = {sympy.S.One: x}
+        for term, coefficient in terms.items():
+            if term not in coefficients:
+                coefficients[term] = np.zeros(values.shape)
+            coefficients[term][position] = float(coefficient)
+    return coefficients
+
+
+def apply_linear(f, values):
+    """Apply a numeric linear function onto an array of expressions.
+
+    Instead of evaluating ``f`` on an object array, ``f`` is evaluated
+    with float arrays once for every term in ``values``
+    (see :func:`get_term_coefficients`) and the results are assembled to
+    ``sum(f(coefficients) * term)``.
+    Only the nonzero entries are multiplied with the terms.
+
+    Args:
+        f (function): A linear function that accepts and returns
+            float arrays.
+        values (:class:`numpy.ndarray`): An array, which may
+            contain sympy expressions and numbers.
+
+    Returns:
+        :class:`numpy.ndarray`: If ``values`` contained no symbolic
+        expressions, a float array. Otherwise an object array.
+    """
+    values = np.asarray(values)
+    if values.dtype != np.dtype('O'):
+        return f(values.astype('f8'))
+    coefficients = get_term_coefficients(values)
+    out = f(coefficients.pop(sympy.S.One))
+    if not coefficients:
+        return out
+    out = out.astype('O')
+    for term, coefficient in coefficients.items():
+        result = f(coefficient)
+        nonzero = result != 0.
+        out[nonzero] = out[nonzero] + result[nonzero] * term
+    return out
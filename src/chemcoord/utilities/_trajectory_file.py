@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""A binary container for trajectories.
+
+The file starts with the eight bytes :data:`MAGIC`, followed by the
+length of the header as little-endian uint64 and the header itself as
+utf-8 encoded JSON, which is padded with spaces to a multiple of
+64 bytes.
+The header contains the atoms, the index, the dtype of the values,
+the names of the per frame fields and the shared metadata.
+After the header follows one fixed size record per frame with the
+values of shape ``(n_atoms, 3)`` and one little-endian float64 per
+field.
+
+The number of frames is not stored, but given by the size of the file,
+so frames can be appended without changing the header.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import os
+import struct
+from io import open  # pylint:disable=redefined-builtin
+
+import numpy as np
+
+from chemcoord.exceptions import PhysicalMeaning
+
+MAGIC = b'CCTRAJ\x00\x01'
+_ALIGNMENT = 64
+_CHUNKSIZE = 1000
+
+
+def _to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    elif isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
+def get_record_dtype(header):
+    """Return the structured dtype of one frame.
+
+    Args:
+        header (dict):
+
+    Returns:
+        :class:`numpy.dtype`:
+    """
+    dtype = np.dtype(header['dtype']).newbyteorder('<')
+    return np.dtype(
+        [(str('values'), dtype, (len(header['atoms']), 3))]
+        + [(str(field), '<f8') for field in header['fields']])
+
+
+def read_header(f):
+    """Read the header of an open trajectory file.
+
+    Args:
+        f (file): An open file in binary mode positioned at the start.
+
+    Returns:
+        tuple: The header as dictionary and the offset of the first frame.
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError('Not a chemcoord trajectory file.')
+    length, = struct.unpack(str('<Q'), f.read(8))
+    header = json.loads(f.read(length).decode('utf-8'))
+    return header, len(MAGIC) + 8 + length
+
+
+def _get_header_bytes(header):
+    data = json.dumps(header, default=_to_json).encode('utf-8')
+    offset = len(MAGIC) + 8
+    length = -(-(offset + len(data)) // _ALIGNMENT) * _ALIGNMENT - offset
+    return (MAGIC + struct.pack(str('<Q'), length)
+            + data + b' ' * (length - len(data)))
+
+
+def write(path, header, values, frame_metadata, append=False):
+    """Write frames into a trajectory file.
+
+    Args:
+        path (str):
+        header (dict): Everything apart from ``'fields'``, which is
+            taken from the columns of ``frame_metadata``.
+        values (:class:`numpy.ndarray`): An array of shape
+            ``(n_frames, n_atoms, 3)``.
+        frame_metadata (:class:`pandas.DataFrame`): Numerical metadata
+            with one row per frame.
+        append (bool): Append the frames to an existing file.
+            Its header has to be the same apart from the metadata.
+            An incomplete last frame, e.g. of an interrupted job,
+            is overwritten.
+
+    Returns:
+        None:
+    """
+    header = dict(header, fields=[str(field)
+                                  for field in frame_metadata.columns])
+    for field in header['fields']:
+        if frame_metadata[field].dtype.kind not in 'biuf':
+            message = 'Only numerical frame_metadata can be stored, not {}'
+            raise ValueError(message.format(field))
+    if append and os.path.exists(path) and os.path.getsize(path):
+        with open(path, 'rb') as f:
+            stored, offset = read_header(f)
+        ignore = {'metadata', 'version'}
+        if ({k: v for k, v in stored.items() if k not in ignore}
+                != json.loads(json.dumps(
+                    {k: v for k, v in header.items() if k not in ignore},
+                    default=_to_json))):
+            raise PhysicalMeaning('Only frames with the same atoms, index, '
+                                  'dtype and frame_metadata columns can be '
+                                  'appended.')
+        record_dtype = get_record_dtype(stored)
+        n_frames = (os.path.getsize(path) - offset) // record_dtype.itemsize
+        f = open(path, 'r+b')
+        f.truncate(offset + n_frames * record_dtype.itemsize)
+        f.seek(0, os.SEEK_END)
+    else:
+        record_dtype = get_record_dtype(header)
+        f = open(path, 'wb')
+        f.write(_get_header_bytes(header))
+    with f:
+        for start in range(0, len(values), _CHUNKSIZE):
+            stop = start + _CHUNKSIZE
+            records = np.empty(len(values[start:stop]), dtype=record_dtype)
+            records['values'] = values[start:stop]
+            for field in header['fields']:
+                records[field] = frame_metadata[field].values[start:stop]
+            f.write(records.tobytes())
+
+
+def read(path, mode='r'):
+    """Map a trajectory file into memory.
+
+    Args:
+        path (str):
+        mode (str): The mode of :class:`numpy.memmap`, i.e. ``'r'``
+            for read only, ``'r+'`` to change the values in the file or
+            ``'c'`` for copy on write.
+
+    Returns:
+        tuple: The header and the records as structured array.
+        Apart from empty files, the records are a :class:`numpy.memmap`.
+    """
+    with open(path, 'rb') as f:
+        header, offset = read_header(f)
+    record_dtype = get_record_dtype(header)
+    n_frames = (os.path.getsize(path) - offset) // record_dtype.itemsize
+    if n_frames == 0:
+        return header, np.empty(0, dtype=record_dtype)
+    return header, np.memmap(path, dtype=record_dtype, mode=mode,
+                             offset=offset, shape=(n_frames,))
@@ -0,0 +1,74 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals, with_statement)
+
+import os
+
+import chemcoord as cc
+import numpy as np
+
+
+def get_script_path():
+    return os.path.dirname(os.path.realpath(__file__))
+
+
+def get_structure_path(script_path):
+    test_path = os.path.join(script_path)
+    while True:
+        structure_path = os.path.join(test_path, 'structures')
+        if os.path.exists(structure_path):
+            return structure_path
+        else:
+            test_path = os.path.join(test_path, '..')
+
+
+STRUCTURE_PATH = get_structure_path(get_script_path())
+
+
+def get_distances(molecule):
+    X = molecule.loc[:, ['x', 'y', 'z']].values
+    return np.linalg.norm(X[:, None, :] - X[None, :, :], axis=2)
+
+
+def test_get_rotatable_bonds():
+    molecule = cc.Cartesian.read_xyz(
+        os.path.join(STRUCTURE_PATH, 'temp_lig.xyz'))
+    assert (sorted(molecule.get_rotatable_bonds())
+            == [(0, 5), (1, 7), (3, 10), (4, 12), (5, 11), (7, 13)])
+
+
+def test_get_conformers():
+    molecule = cc.Cartesian.read_xyz(
+        os.path.join(STRUCTURE_PATH, 'temp_lig.xyz'))
+    bonds = [(7, 13), (1, 7)]
+    conformers = molecule.get_conformers(bonds=bonds, chunksize=4)
+    assert conformers['positions'].shape == (9, len(molecule), 3)
+    assert conformers['bonds'] == [(13, 7), (7, 1)]
+    assert np.allclose(conformers['positions'][0],
+                       molecule.loc[:, ['x', 'y', 'z']])
+
+    bond_dict = molecule.get_bonds()
+    dihedrals = [[21, 13, 7, 9], [9, 7, 1, 2]]
+    moving = [molecule._get_fragment(13, 7, bond_dict),
+              molecule._get_fragment(7, 1, bond_dict)]
+    for positions, angles in zip(conformers['positions'],
+                                 conformers['angles']):
+        conformer = molecule.copy()
+        conformer.loc[:, ['x', 'y', 'z']] = positions
+        assert np.allclose(conformer.get_bond_lengths([[13, 7], [1, 7]]),
+                           molecule.get_bond_lengths([[13, 7], [1, 7]]))
+        change = (conformer.get_dihedral_degrees(dihedrals)
+                  - molecule.get_dihedral_degrees(dihedrals) - angles)
+        assert np.allclose(np.cos(np.radians(change)), 1.)
+        # Each fragment between the rotated bonds stays rigid.
+        for fragment in [set(molecule.index) - moving[1],
+                         moving[0], moving[1] - moving[0]]:
+            fragment = sorted(fragment)
+            assert np.allclose(get_distances(conformer.loc[fragment]),
+                               get_distances(molecule.loc[fragment]))
+
+    sampled = molecule.get_conformers(bonds=bonds, n_samples=10,
+                                      random_state=0)
+    assert sampled['angles'].shape == (10, 2)
+
+    strict = molecule.get_conformers(bonds=bonds, clash_factor=3.)
+    assert len(strict['positions']) < len(conformers['positions'])
@@ -6,6 +6,7 @@ import os
 import sys
 
 import numpy as np
+import pandas as pd
 import pytest
 
 import chemcoord as cc
@@ -117,6 +118,19 @@ def test_overloaded_operators():
     assert allclose(-1 * molecule, -molecule)
     assert allclose(-molecule, 0 - molecule)
     assert allclose(molecule, molecule - 0)
+    shift = pd.Series([3., 2., 1.], index=['z', 'y', 'x'])
+    assert allclose(molecule + shift, molecule + [1, 2, 3])
+    assert allclose(molecule - shift, molecule - [1, 2, 3])
+    assert allclose(molecule * shift, molecule * [1, 2, 3])
+    molecule2 = molecule.copy()
+    molecule2 += shift
+    assert allclose(molecule2, molecule + [1, 2, 3])
+    positional = pd.Series([1., 2., 3.])
+    assert allclose(molecule + positional, molecule + [1, 2, 3])
+    assert allclose(molecule - positional, molecule - [1, 2, 3])
+    molecule2 = molecule.copy()
+    molecule2 -= positional
+    assert allclose(molecule2, molecule - [1, 2, 3])
     molecule2 = molecule[~(np.isclose(molecule['x'], 0)
                            | np.isclose(molecule['y'], 0)
                            | np.isclose(molecule['z'], 0))]
@@ -199,6 +213,16 @@ def test_get_inertia():
     B = molecule2.get_inertia()
     assert cc.xyz_functions.allclose(B['transformed_Cartesian'], t_mol)
 
+    # The eigenvectors are oriented as by previous versions.
+    np.random.seed(1)
+    molecule3 = molecule + np.random.normal(scale=0.3,
+                                            size=(len(molecule), 3))
+    C = molecule3.get_inertia()
+    diag_inertia, eig_v = np.linalg.eig(C['inertia_tensor'])
+    expected = cc.xyz_functions.orthonormalize_righthanded(
+        eig_v[:, np.argsort(diag_inertia)])
+    assert np.allclose(C['eigenvectors'], expected)
+
 
 def test_partition_chem_env():
     xpctd = {('C', frozenset({('C', 4), ('Cr', 2), ('H', 7), ('O', 7)})):
@@ -262,3 +286,150 @@ def test_align_and_reindex_similar():
                                                      [87, 115, 24, 208]])
     m2_backindexed = m2.reindex_similar(m2_shuffled)
     assert cc.xyz_functions.allclose(m2, m2_backindexed)
+
+
+def test_reindex_similar_optimal():
+    cartesians = cc.xyz_functions.read_molden(
+        get_complete_path('total_movement.molden'), start_index=1)
+    m2 = cartesians[-1]
+
+    np.random.seed(77)
+    m2_shuffled = m2 + np.random.uniform(-0.02, 0.02, (len(m2), 3))
+    m2_shuffled.index = np.random.permutation(m2.index)
+
+    for cutoff in [None, 1.]:
+        m2_backindexed = m2.reindex_similar(m2_shuffled, method='optimal',
+                                            cutoff=cutoff)
+        assert (m2_backindexed.index == m2.index).all()
+        assert np.allclose(m2_backindexed.loc[:, ['x', 'y', 'z']],
+                           m2.loc[:, ['x', 'y', 'z']], atol=0.05)
+
+
+def test_inplace_operations():
+    molecule2 = molecule.copy()
+    molecule2.get_bonds()
+    rotation = get_rotation_matrix([1, 2, 3], 0.5)
+
+    expected = dot(rotation, molecule2) + [1, 2, 3]
+    molecule2 += [1, 2, 3]
+    molecule2.rotate_(rotation).translate_(np.dot(rotation, [1, 2, 3])
+                                           - [1, 2, 3])
+    assert cc.xyz_functions.allclose(molecule2, expected)
+    assert 'bond_dict' in molecule2._metadata
+
+    molecule2 -= [1, 2, 3]
+    molecule2.rotate_(rotation.T)
+    assert cc.xyz_functions.allclose(molecule2, molecule)
+    assert 'bond_dict' in molecule2._metadata
+
+    molecule2.transform_(np.diag([1, 1, 2]))
+    assert 'bond_dict' not in molecule2._metadata
+    assert np.allclose(molecule2.loc[:, 'z'], 2 * molecule.loc[:, 'z'])
+
+    with pytest.raises(ValueError):
+        molecule2.rotate_(np.diag([1, 1, 2]))
+
+    sympy = pytest.importorskip('sympy')
+    x = sympy.Symbol('x')
+    molecule2 = molecule.copy()
+    molecule2 += [x, 0, 0]
+    molecule2 -= molecule
+    assert (molecule2.loc[:, 'x'] == x).all()
+    assert np.allclose(molecule2.subs(x, 1).loc[:, ['x', 'y', 'z']].values
+                       .astype('f8'), [1, 0, 0])
+
+
+def test_columnar_storage():
+    molecule2 = cc.Cartesian(atoms=molecule.loc[:, 'atom'].values,
+                             coords=molecule.loc[:, ['x', 'y', 'z']].values,
+                             index=molecule.index)
+    assert molecule2._columns is not None
+    assert molecule2.shape == molecule.shape
+    assert (molecule2.columns == ['atom', 'x', 'y', 'z']).all()
+
+    moved = (2 * molecule2 + [1, 2, 3]).copy()
+    assert moved._columns is not None
+    assert np.allclose(moved.loc[:, ['x', 'y', 'z']],
+                       2 * molecule.loc[:, ['x', 'y', 'z']] + [1, 2, 3])
+    assert moved._columns is not None
+    moved.translate_([1, 0, 0])
+    assert np.allclose(moved.loc[:, 'x'],
+                       2 * molecule.loc[:, 'x'] + 2)
+    moved.index = moved.index + 1
+    assert (moved.loc[:, 'x'].index == molecule.index + 1).all()
+    moved.index = molecule.index
+    assert np.allclose(molecule2.get_barycenter(), molecule.get_barycenter())
+    assert molecule2.get_bonds() == molecule.get_bonds()
+
+    with_mass = molecule.add_data('mass')
+    assert (with_mass.columns == ['atom', 'x', 'y', 'z', 'mass']).all()
+    assert np.allclose(with_mass._get_masses(),
+                       with_mass.loc[:, 'mass'].values)
+
+    moved.loc[moved.index[0], 'x'] = 100.
+    assert moved._columns is None
+    assert moved.loc[moved.index[0], 'x'] == 100.
+    moved += 1
+    assert moved.loc[moved.index[0], 'x'] == 101.
+
+    sympy = pytest.importorskip('sympy')
+    x = sympy.Symbol('x')
+    symbolic = molecule2 + x
+    assert symbolic._columns is None
+    assert allclose(symbolic.subs(x, 0), molecule2)
+
+
+def test_shared_metadata():
+    molecule2 = molecule.copy()
+    bond_dict = molecule2.get_bonds()
+    subset = molecule2.loc[molecule2.index[:5]]
+    copied = molecule2.copy()
+    assert subset._metadata['bond_dict'] is bond_dict
+    assert copied._metadata['bond_dict'] is bond_dict
+
+    copied.set_bonds({})
+    assert molecule2._metadata['bond_dict'] is bond_dict
+    assert copied.get_bonds(use_lookup=True) == {}
+
+
+def test_fingerprint():
+    molecule2 = cc.Cartesian.read_xyz(get_complete_path('MIL53_small.xyz'),
+                                      start_index=1)
+    molecule3 = molecule2 + 1
+    assert molecule3._columns.fingerprint == molecule2._columns.fingerprint
+    assert np.allclose((molecule3 - molecule2).loc[:, ['x', 'y', 'z']], 1.)
+
+    fingerprint = molecule2._columns.fingerprint
+    shuffled = molecule2.iloc[::-1]
+    assert shuffled._columns.fingerprint != fingerprint
+    assert allclose(molecule2 + shuffled, 2 * molecule2)
+
+    molecule3.index = molecule3.index + 1
+    with pytest.raises(PhysicalMeaning):
+        molecule2 + molecule3
+
+
+def test_compact():
+    molecule2 = cc.Cartesian(atoms=molecule.loc[:, 'atom'].values,
+                             coords=molecule.loc[:, ['x', 'y', 'z']].values,
+                             index=range(1, len(molecule) + 1))
+    compact = molecule2.compact()
+    assert compact._columns.coords.dtype == np.dtype('f4')
+    assert isinstance(compact.index, pd.RangeIndex)
+    assert compact._get_coords().dtype == np.dtype('f8')
+    assert allclose(compact, molecule2, atol=1e-4)
+    moved = compact + 1
+    assert moved._columns.coords.dtype == np.dtype('f4')
+    assert allclose(moved, molecule2 + 1, atol=1e-4)
+    assert allclose(compact.get_zmat().get_cartesian(), molecule2, atol=1e-3)
+    assert compact.loc[:, 'x'].dtype == np.dtype('f4')
+
+
+def test_masses_are_cached():
+    molecule2 = cc.Cartesian(atoms=molecule.loc[:, 'atom'].values,
+                             coords=molecule.loc[:, ['x', 'y', 'z']].values)
+    masses = molecule2._get_masses()
+    assert np.allclose(masses, molecule.add_data('mass').loc[:, 'mass'])
+    assert (molecule2 + 1)._get_masses() is masses
+    assert molecule2.compact()._get_masses() is masses
+    assert np.isclose(molecule2.get_total_mass(), masses.sum())
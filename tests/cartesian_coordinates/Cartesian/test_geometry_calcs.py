@@ -57,3 +57,25 @@ def test_get_shortest_distance():
     i, j, d = molecule.get_shortest_distance(molecule + [0, 0, 10])
     assert (i, j) == (27, 24)
     assert np.allclose(d, 4.2537465795414988)
+
+
+def test_get_shortest_distance_with_tree(monkeypatch):
+    monkeypatch.setattr(cc.Cartesian, '_max_pairs_brute_force', 0)
+    i, j, d = molecule.get_shortest_distance(molecule + [0, 0, 10])
+    assert (i, j) == (27, 24)
+    assert np.allclose(d, 4.2537465795414988)
+
+
+def test_pairs_within():
+    pairs = molecule.pairs_within(1.2)
+    D = np.linalg.norm(molecule.loc[:, ['x', 'y', 'z']].values[:, None]
+                       - molecule.loc[:, ['x', 'y', 'z']].values[None],
+                       axis=2)
+    assert len(pairs) == (np.triu(D < 1.2, k=1)).sum()
+    assert np.allclose(pairs['distance'], molecule.get_bond_lengths(
+        pairs.loc[:, ['i', 'j']].values))
+
+    other = molecule + [0, 0, 10]
+    pairs = molecule.pairs_within(4.5, other)
+    assert (pairs.loc[pairs['distance'].idxmin(), ['i', 'j']]
+            == [27, 24]).all()
@@ -12,6 +12,7 @@ import itertools
 import numpy as np
 import os
 import sys
+from io import StringIO
 
 
 def get_script_path():
@@ -61,3 +62,35 @@ H 3.260455 0.500000 -0.872893"""
 
     with pytest.warns(DeprecationWarning):
         assert molecule.write_xyz() == expected
+
+    lines = molecule.to_xyz(float_format='{:g}').splitlines()[2:]
+    assert len(set(len(line) for line in lines)) == 1
+    assert [line.split() for line in lines][1] \
+        == ['H', '0.758602', '0', '0.504284']
+
+
+def test_cjson():
+    bond_dict = molecule.get_bonds()
+    expected_bonds = {k: set(v) for k, v in bond_dict.items()}
+    cjson = molecule.to_cjson()
+    assert molecule.get_bonds() == expected_bonds
+    assert cjson['atoms']['elements']['number'] == [8, 1, 1, 8, 1, 1]
+    assert cjson['bonds']['connections']['index'] == [0, 1, 0, 2, 3, 4, 3, 5]
+
+    read = cc.Cartesian.read_cjson(cjson)
+    read.index = molecule.index
+    assert allclose(read, molecule)
+    assert read._metadata['bond_dict'] == {
+        k - 1: {j - 1 for j in v} for k, v in expected_bonds.items()}
+
+    molecule2 = molecule.copy()
+    molecule2.metadata['energy'] = np.float32(-0.5)
+    assert 'properties' not in molecule2.to_cjson()
+
+    molecules = [molecule, molecule2]
+    lines = cc.xyz_functions.to_cjson_lines(iter(molecules))
+    assert len(lines.splitlines()) == 2
+    for read, expected in zip(
+            cc.xyz_functions.iter_cjson_lines(StringIO(lines)), molecules):
+        read.index = expected.index
+        assert allclose(read, expected)
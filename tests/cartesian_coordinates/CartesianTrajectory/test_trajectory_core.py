@@ -0,0 +1,252 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals, with_statement)
+
+import os
+
+import chemcoord as cc
+import numpy as np
+import pandas as pd
+import pytest
+from chemcoord.exceptions import PhysicalMeaning
+from chemcoord.xyz_functions import allclose
+from io import StringIO
+
+
+def get_script_path():
+    return os.path.dirname(os.path.realpath(__file__))
+
+
+def get_structure_path(script_path):
+    test_path = os.path.join(script_path)
+    while True:
+        structure_path = os.path.join(test_path, 'structures')
+        if os.path.exists(structure_path):
+            return structure_path
+        else:
+            test_path = os.path.join(test_path, '..')
+
+
+STRUCTURE_PATH = get_structure_path(get_script_path())
+
+
+def get_molden_path():
+    return os.path.join(STRUCTURE_PATH, 'total_movement.molden')
+
+
+def test_read_molden(tmpdir):
+    trajectory = cc.CartesianTrajectory.read_molden(get_molden_path(),
+                                                    start_index=1)
+    cartesians = cc.xyz_functions.read_molden(get_molden_path(),
+                                              start_index=1)
+    assert len(trajectory) == len(cartesians)
+    assert trajectory.positions.shape == (len(cartesians),
+                                          len(cartesians[0]), 3)
+    for frame, molecule in zip(trajectory, cartesians):
+        assert allclose(frame, molecule)
+        assert frame.metadata['energy'] == molecule.metadata['energy']
+
+    from_list = cc.CartesianTrajectory.from_cartesians(cartesians)
+    assert np.allclose(from_list.positions, trajectory.positions)
+    assert np.allclose(from_list.frame_metadata['energy'],
+                       trajectory.frame_metadata['energy'])
+
+    f = StringIO(trajectory.to_molden())
+    assert f.getvalue().count('[GEOMETRIES] (XYZ)') == 1
+
+    with open(get_molden_path(), 'r') as f:
+        content = f.read()
+    start, end = content.index('[GEOCONV]'), content.index('[GEOMETRIES]')
+    path = str(tmpdir.join('no_energy.molden'))
+    with open(path, 'w') as f:
+        f.write(content[:start] + content[end:])
+    without_energy = cc.CartesianTrajectory.read_molden(path, start_index=1)
+    assert np.allclose(without_energy.positions, trajectory.positions)
+    assert without_energy.frame_metadata['energy'].isnull().all()
+
+
+def test_slicing():
+    trajectory = cc.CartesianTrajectory.read_molden(get_molden_path())
+    sliced = trajectory[2:10:2]
+    assert len(sliced) == 4
+    assert np.shares_memory(sliced.positions, trajectory.positions)
+    assert allclose(sliced[1], trajectory[4])
+    assert len(trajectory[[0, 3]]) == 2
+    assert list(sliced.frame_metadata.index) == list(range(4))
+
+    frame = trajectory[3]
+    assert not np.shares_memory(frame._get_coords(), trajectory.positions)
+    assert (frame._columns.fingerprint
+            == trajectory[4]._columns.fingerprint)
+    frame += 1
+    assert np.allclose(trajectory[3].loc[:, ['x', 'y', 'z']] + 1,
+                       frame.loc[:, ['x', 'y', 'z']])
+    trajectory.atoms = trajectory.atoms.copy()
+    trajectory.atoms[0] = 'Xe'
+    assert trajectory[0].loc[0, 'atom'] == 'Xe'
+
+
+def test_vectorized_methods():
+    trajectory = cc.CartesianTrajectory.read_molden(get_molden_path(),
+                                                    start_index=1)
+    frames = [trajectory[k] for k in [0, 7, 20]]
+    indices = [[1, 2], [5, 10]]
+    for k, molecule in zip([0, 7, 20], frames):
+        assert np.allclose(trajectory.get_barycenter()[k],
+                           molecule.get_barycenter())
+        assert np.allclose(trajectory.get_centroid()[k],
+                           molecule.loc[:, ['x', 'y', 'z']].values.mean(
+                               axis=0))
+        assert np.allclose(trajectory.get_bond_lengths(indices)[k],
+                           molecule.get_bond_lengths(indices))
+
+    aligned, rmsd = trajectory.align(reference=0)
+    assert np.isclose(rmsd[0], 0.)
+    assert np.allclose(aligned.positions[0], trajectory.positions[0])
+    assert np.allclose(aligned.get_pairwise_rmsd()[:len(trajectory) - 1],
+                       rmsd[1:])
+
+
+def test_get_zmat():
+    trajectory = cc.CartesianTrajectory.read_molden(get_molden_path(),
+                                                    start_index=1)[::5]
+    zmats = trajectory.get_zmat()
+    c_table = zmats[0].loc[:, ['b', 'a', 'd']]
+    for zmat, molecule in zip(zmats, trajectory):
+        expected = molecule.get_zmat(c_table)
+        assert np.allclose(
+            zmat.loc[:, ['bond', 'angle', 'dihedral']].values.astype('f8'),
+            expected.loc[zmat.index,
+                         ['bond', 'angle', 'dihedral']].values.astype('f8'))
+        assert allclose(zmat.get_cartesian(), molecule, atol=1e-4)
+
+
+def test_compact():
+    trajectory = cc.CartesianTrajectory.read_molden(get_molden_path(),
+                                                    start_index=1)[::5]
+    compact = trajectory.compact()
+    assert compact.positions.dtype == np.dtype('f4')
+    assert isinstance(compact.index, pd.RangeIndex)
+    assert compact[1:3].positions.dtype == np.dtype('f4')
+    assert compact.get_centroid().dtype == np.dtype('f8')
+    assert np.allclose(compact.get_centroid(), trajectory.get_centroid())
+
+    aligned, rmsd = compact.align(reference=0)
+    assert aligned.positions.dtype == np.dtype('f4')
+    assert np.allclose(rmsd, trajectory.align(reference=0)[1], atol=1e-5)
+
+    zmats = compact.get_zmat()
+    assert zmats.values.dtype == np.dtype('f4')
+    assert (zmats + 1).values.dtype == np.dtype('f4')
+    cartesians = zmats.get_cartesian()
+    assert cartesians.positions.dtype == np.dtype('f4')
+    for k in range(len(trajectory)):
+        assert allclose(cartesians[k], trajectory[k], atol=1e-3)
+
+
+def test_read_xyz():
+    trajectory = cc.CartesianTrajectory.read_molden(get_molden_path(),
+                                                    start_index=1)
+    f = StringIO()
+    for k, positions in enumerate(trajectory.positions):
+        f.write('{}\nenergy={} step: {}\n'.format(len(trajectory.index),
+                                                  -0.5 * k, k))
+        for atom, (x, y, z) in zip(trajectory.atoms, positions):
+            f.write('{}1 {!r} {!r} {!r}\n'.format(atom, x, y, z))
+
+    from_xyz = cc.CartesianTrajectory.read_xyz(StringIO(f.getvalue()),
+                                               start_index=1, chunksize=4)
+    assert np.allclose(from_xyz.positions, trajectory.positions)
+    assert (from_xyz.atoms == trajectory.atoms).all()
+    assert np.allclose(from_xyz.frame_metadata['energy'],
+                       -0.5 * np.arange(len(trajectory)))
+    assert np.allclose(from_xyz.frame_metadata['step'],
+                       np.arange(len(trajectory)))
+
+    frames = cc.xyz_functions.iter_xyz(StringIO(f.getvalue()),
+                                       start_index=1, chunksize=4)
+    for k, molecule in enumerate(frames):
+        assert allclose(molecule, trajectory[k])
+        assert molecule.metadata == {'energy': -0.5 * k, 'step': k}
+    assert k == len(trajectory) - 1
+
+    from_xyz = cc.CartesianTrajectory.read_xyz(
+        StringIO(f.getvalue() + '\n\n'), start_index=1)
+    assert len(from_xyz) == len(trajectory)
+    lines = f.getvalue().splitlines(True)
+    separated = ''.join(lines[:len(trajectory.index) + 2] + ['\n']
+                        + lines[len(trajectory.index) + 2:])
+    with pytest.raises(ValueError):
+        cc.CartesianTrajectory.read_xyz(StringIO(separated))
+    with pytest.raises(ValueError):
+        cc.CartesianTrajectory.read_xyz(StringIO(''))
+
+
+def test_to_xyz():
+    trajectory = cc.CartesianTrajectory.read_molden(get_molden_path(),
+                                                    start_index=1)
+    trajectory.frame_metadata['step'] = np.arange(len(trajectory))
+    f = StringIO()
+    trajectory.to_xyz(f, float_format='{:.8f}')
+    from_xyz = cc.CartesianTrajectory.read_xyz(StringIO(f.getvalue()),
+                                               start_index=1)
+    assert np.allclose(from_xyz.positions, trajectory.positions, atol=1e-7)
+    assert np.allclose(from_xyz.frame_metadata, trajectory.frame_metadata)
+
+    lines = trajectory[3:4].to_xyz().splitlines()[2:]
+    expected = trajectory[3].to_xyz(float_format='{:.6f}').splitlines()[2:]
+    assert [line.split() for line in lines] \
+        == [line.split() for line in expected]
+
+
+def test_read_frames(tmpdir):
+    trajectory = cc.CartesianTrajectory.read_molden(get_molden_path(),
+                                                    start_index=1)
+    selected = cc.CartesianTrajectory.read_frames(
+        get_molden_path(), slice(2, None, 5), start_index=1, sidecar=False)
+    assert np.allclose(selected.positions, trajectory.positions[2::5])
+    assert np.allclose(selected.frame_metadata['energy'],
+                       trajectory.frame_metadata['energy'][2::5])
+
+    trajectory.frame_metadata['step'] = np.arange(len(trajectory))
+    path = str(tmpdir.join('trajectory.xyz'))
+    trajectory.to_xyz(path)
+    index = cc.xyz_functions.get_frame_index(path)
+    assert os.path.exists(path + '.idx.npz')
+    assert len(index) == len(trajectory)
+    assert (index['n_atoms'] == len(trajectory.index)).all()
+    assert index.equals(cc.xyz_functions.get_frame_index(path))
+    with open(path, 'rb') as f:
+        starts, ends, _ = cc.xyz_functions._scan_xyz_offsets(f, blocksize=100)
+    assert (starts == index['start']).all() and (ends == index['end']).all()
+
+    selected = cc.CartesianTrajectory.read_frames(path, [20, 0, 7],
+                                                  start_index=1)
+    assert np.allclose(selected.positions, trajectory.positions[[20, 0, 7]],
+                       atol=1e-6)
+    assert list(selected.frame_metadata['step']) == [20, 0, 7]
+
+
+def test_binary(tmpdir):
+    trajectory = cc.CartesianTrajectory.read_molden(get_molden_path(),
+                                                    start_index=1)
+    path = str(tmpdir.join('trajectory.cctraj'))
+    trajectory.to_binary(path)
+    loaded = cc.CartesianTrajectory.read_binary(path)
+    assert not loaded.positions.flags.owndata
+    assert np.array_equal(loaded.positions, trajectory.positions)
+    assert (loaded.index == trajectory.index).all()
+    assert np.array_equal(loaded.frame_metadata['energy'],
+                          trajectory.frame_metadata['energy'])
+
+    trajectory[:3].to_binary(path, append=True)
+    with open(path, 'ab') as f:
+        f.write(b'incomplete frame')
+    assert len(cc.CartesianTrajectory.read_binary(path)) \
+        == len(trajectory) + 3
+    trajectory[5:6].to_binary(path, append=True)
+    loaded = cc.CartesianTrajectory.read_binary(path)
+    assert len(loaded) == len(trajectory) + 4
+    assert np.array_equal(loaded.positions[-1], trajectory.positions[5])
+
+    with pytest.raises(PhysicalMeaning):
+        trajectory.compact().to_binary(path, append=True)
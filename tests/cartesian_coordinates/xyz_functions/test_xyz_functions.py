@@ -74,3 +74,146 @@ def test_concat_with_zmats():
     assert allclose(
         zm1.get_cartesian().append(zm2.get_cartesian() + [0, 0, 20]),
         znew.get_cartesian())
+
+
+def test_batched_measurements():
+    path = os.path.join(STRUCTURES, 'MIL53_small.xyz')
+    molecule = cc.Cartesian.read_xyz(path)
+    c_table = molecule.get_construction_table().iloc[3:]
+    indices = np.array([[molecule.index.get_loc(j) for j in row]
+                        for row in np.c_[c_table.index, c_table.values]])
+    positions = molecule.loc[:, ['x', 'y', 'z']].values
+    frames = np.array([positions, positions + 1.])
+
+    bonds = cc.xyz_functions.get_bond_lengths(frames, indices[:, :2])
+    angles = cc.xyz_functions.get_angle_degrees(frames, indices[:, :3])
+    dihedrals = cc.xyz_functions.get_dihedral_degrees(frames, indices)
+    for result in [bonds, angles, dihedrals]:
+        assert result.shape == (2, len(c_table))
+        assert np.allclose(result[0], result[1])
+    assert np.allclose(bonds[0], molecule.get_bond_lengths(c_table))
+    assert np.allclose(angles[0], molecule.get_angle_degrees(c_table))
+    assert np.allclose(dihedrals[0], molecule.get_dihedral_degrees(c_table))
+    assert np.allclose(
+        cc.xyz_functions.get_dihedral_degrees(positions, indices),
+        dihedrals[0])
+
+    for invalid in [[[0, len(positions)]], [[-1, 0]], [[0, 100000]]]:
+        with pytest.raises(IndexError):
+            cc.xyz_functions.get_bond_lengths(frames, invalid)
+
+    single = frames.astype('f4')
+    assert cc.xyz_functions.get_bond_lengths(
+        single, indices[:, :2]).dtype == np.dtype('f8')
+    assert np.allclose(
+        cc.xyz_functions.get_bond_lengths(single, indices[:, :2]),
+        bonds, atol=1e-5)
+    assert np.allclose(
+        cc.xyz_functions.get_angle_degrees(single, indices[:, :3]),
+        angles, atol=1e-3)
+    assert np.allclose(
+        cc.xyz_functions.get_dihedral_degrees(single, indices),
+        dihedrals, atol=1e-3)
+
+
+def test_align_ensemble():
+    path = os.path.join(STRUCTURES, 'MIL53_small.xyz')
+    molecule = cc.Cartesian.read_xyz(path)
+    reference = molecule.loc[:, ['x', 'y', 'z']].values
+    masses = molecule.add_data('mass').loc[:, 'mass'].values
+
+    frames = np.array([
+        np.dot(reference, cc.xyz_functions.get_rotation_matrix(
+            [1, 2, 3], angle).T) + angle
+        for angle in [0.1, 1., 2.]])
+    aligned, rmsd = cc.xyz_functions.align_ensemble(frames, reference)
+    assert np.allclose(aligned, reference[None])
+    assert np.allclose(rmsd, 0.)
+
+    aligned, rmsd = cc.xyz_functions.align_ensemble(
+        frames, reference, masses=masses, indices=[0, 1, 2, 3])
+    assert np.allclose(aligned, reference[None])
+
+    np.random.seed(3)
+    noisy = frames + np.random.normal(scale=0.1, size=frames.shape)
+    aligned, rmsd = cc.xyz_functions.align_ensemble(noisy, reference)
+    for frame, d in zip(noisy, rmsd):
+        P = frame - frame.mean(axis=0)
+        Q = reference - reference.mean(axis=0)
+        R = cc.xyz_functions.get_kabsch_rotation(Q, P)
+        expected = np.sqrt(((np.dot(P, R.T) - Q)**2).sum(axis=1).mean())
+        assert np.isclose(d, expected)
+
+    aligned, rmsd32 = cc.xyz_functions.align_ensemble(
+        noisy.astype('f4'), reference)
+    assert np.allclose(rmsd32, rmsd, atol=1e-5)
+
+
+def test_get_pairwise_rmsd():
+    path = os.path.join(STRUCTURES, 'MIL53_small.xyz')
+    molecule = cc.Cartesian.read_xyz(path)
+    reference = molecule.loc[:, ['x', 'y', 'z']].values
+    np.random.seed(5)
+    frames = reference + np.random.normal(scale=0.2, size=(6,)
+                                          + reference.shape)
+
+    rmsd = cc.xyz_functions.get_pairwise_rmsd(frames)
+    assert rmsd.shape == (15,)
+    for i in range(len(frames)):
+        expected = cc.xyz_functions.align_ensemble(frames, frames[i])[1]
+        for j in range(i + 1, len(frames)):
+            assert np.isclose(rmsd[6 * i - i * (i + 1) // 2 + j - i - 1],
+                              expected[j])
+
+    out = np.zeros_like(rmsd)
+    cc.xyz_functions.get_pairwise_rmsd(frames, out=out, rows=(0, 3))
+    cc.xyz_functions.get_pairwise_rmsd(frames, out=out, rows=(3, 6))
+    assert np.allclose(out, rmsd)
+
+    centered = frames - frames.mean(axis=1)[:, None, :]
+    out = np.zeros_like(rmsd)
+    for rows in [(0, 2), (2, 2), (2, 6)]:
+        cc.xyz_functions.get_pairwise_rmsd(centered, out=out, rows=rows,
+                                           centered=True)
+    assert np.allclose(out, rmsd)
+    for rows in [(-1, 3), (4, 3), (0, 7)]:
+        with pytest.raises(ValueError):
+            cc.xyz_functions.get_pairwise_rmsd(frames, rows=rows)
+
+    assert np.allclose(
+        cc.xyz_functions.get_pairwise_rmsd(frames.astype('f4')), rmsd,
+        atol=1e-5)
+
+
+def test_get_inertia():
+    path = os.path.join(STRUCTURES, 'MIL53_small.xyz')
+    molecule = cc.Cartesian.read_xyz(path)
+    reference = molecule.get_inertia()
+    positions = molecule.loc[:, ['x', 'y', 'z']].values
+    frames = np.array([
+        np.dot(positions, cc.xyz_functions.get_rotation_matrix(
+            [1, 2, 3], angle).T) + angle
+        for angle in [0., 1.]])
+    # Far from the origin the second moments are prone to cancellation.
+    frames = np.concatenate([frames, frames[:1] + 1e7])
+
+    inertia = cc.xyz_functions.get_inertia(
+        frames, molecule.add_data('mass').loc[:, 'mass'].values)
+    assert np.allclose(inertia['inertia_tensor'][0],
+                       reference['inertia_tensor'])
+    assert np.allclose(inertia['barycenter'][0], molecule.get_barycenter())
+    assert np.allclose(inertia['inertia_tensor'][2],
+                       reference['inertia_tensor'])
+    for k in range(3):
+        assert np.allclose(inertia['diag_inertia_tensor'][k],
+                           reference['diag_inertia_tensor'])
+        assert np.isclose(np.linalg.det(inertia['eigenvectors'][k]), 1.)
+        assert np.allclose(
+            abs(inertia['transformed_positions'][k]),
+            abs(reference['transformed_Cartesian'].loc[:, ['x', 'y', 'z']]))
+
+    single = cc.xyz_functions.get_inertia(
+        frames[:2].astype('f4'),
+        molecule.add_data('mass').loc[:, 'mass'].values)
+    assert np.allclose(single['inertia_tensor'],
+                       inertia['inertia_tensor'][:2], rtol=1e-5)
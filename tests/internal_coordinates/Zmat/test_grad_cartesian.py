@@ -9,6 +9,7 @@ import chemcoord as cc
 import numpy as np
 import pandas as pd
 import pytest
+import sympy
 from chemcoord.exceptions import UndefinedCoordinateSystem
 from chemcoord.xyz_functions import allclose
 
@@ -57,3 +58,21 @@ def test_grad_cartesian():
     index = new.index[~np.isclose(new, 0.).all(axis=1)]
     assert (index
             == [3, 17, 60, 6, 19, 62, 38, 37, 81, 80, 7, 39, 82, 10]).all()
+
+
+def test_symbolic_grad_cartesian():
+    path = os.path.join(STRUCTURE_PATH, 'MIL53_beta.xyz')
+    molecule = cc.Cartesian.read_xyz(path, start_index=1)
+    zmolecule = molecule.get_zmat()
+
+    x = sympy.Symbol('x')
+    dist_zmol = zmolecule.copy()
+    dist_zmol.unsafe_loc[:, ['bond', 'angle', 'dihedral']] = 0
+    dist_zmol.unsafe_loc[3, 'dihedral'] = 2 * x
+
+    grad_cartesian = zmolecule.get_grad_cartesian()
+    symb_dist = grad_cartesian(dist_zmol)
+
+    num_dist_zmol = dist_zmol.subs(x, 0.5, perform_checks=False)
+    num_dist = grad_cartesian(num_dist_zmol)
+    assert cc.xyz_functions.allclose(symb_dist.subs(x, 0.5), num_dist)
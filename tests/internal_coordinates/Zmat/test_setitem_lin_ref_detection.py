@@ -61,3 +61,31 @@ def test_assignment_leading_to_linear_reference():
             with pytest.warns(UserWarning):
                 test = e.zmat_after_assignment._insert_dummy_zmat(e)
     assert len(test) == len(zmolecule3) + 1
+    assert test._metadata['has_dummies']
+    assert not zmolecule3._metadata['has_dummies']
+
+
+def test_deferred_testing_of_operators():
+    molecule = cc.Cartesian.read_xyz(
+        os.path.join(STRUCTURE_PATH, 'water.xyz'), start_index=1)
+    zmolecule = molecule.get_zmat()
+    zmolecule2 = zmolecule.copy()
+    zmolecule2.unsafe_loc[4, 'angle'] = 180.
+
+    with cc.TestOperators(False):
+        zmolecule3 = zmolecule + 0.5 * (zmolecule2 - zmolecule) * 2
+    assert len(zmolecule3) == len(zmolecule)
+    with pytest.raises(InvalidReference):
+        zmolecule3.get_cartesian()
+
+    with cc.DummyManipulation(False):
+        with pytest.raises(InvalidReference):
+            zmolecule3.evaluate()
+    with pytest.warns(UserWarning):
+        zmolecule4 = zmolecule3.evaluate()
+    assert len(zmolecule4) == len(zmolecule) + 1
+
+    zmolecule5 = zmolecule.copy()
+    with pytest.warns(UserWarning):
+        zmolecule5.safe_loc[4, 'angle'] = 180.
+    assert allclose(zmolecule4.get_cartesian(), zmolecule5.get_cartesian())
@@ -4,6 +4,7 @@ from __future__ import (absolute_import, division, print_function,
 import os
 
 import chemcoord as cc
+import numpy as np
 import sympy
 
 
@@ -37,3 +38,53 @@ def test_multiple_subs():
     symb_zwater.subs(a, 180)
     symb_zwater.safe_loc[6, 'dihedral'] = c
     symb_zwater.subs(a, 180.)
+
+
+def test_compile():
+    path = os.path.join(STRUCTURE_PATH, 'water.xyz')
+    water = cc.Cartesian.read_xyz(path, start_index=1)
+
+    zwater = water.get_zmat()
+    symb_zwater = zwater.copy()
+    a, b = sympy.symbols('a, b')
+    symb_zwater.unsafe_loc[4, 'dihedral'] = a
+    symb_zwater.unsafe_loc[5, 'dihedral'] = a + b
+
+    f = symb_zwater.compile()
+    assert f.symbols == (a, b)
+    new = f(zwater.loc[4, 'dihedral'], 0.)
+    assert new.loc[:, 'dihedral'].dtype == 'f8'
+    assert new.loc[5, 'dihedral'] == new.loc[4, 'dihedral']
+    assert np.allclose(new._metadata['last_valid_positions'].positions,
+                       new.get_cartesian().loc[:, ['x', 'y', 'z']])
+
+    f = symb_zwater.compile(b, a)
+    assert f.symbols == (b, a)
+    new = f(10., 20.)
+    assert new.loc[4, 'dihedral'] == 20.
+    assert new.loc[5, 'dihedral'] == 30.
+
+
+def test_scan():
+    path = os.path.join(STRUCTURE_PATH, 'water.xyz')
+    water = cc.Cartesian.read_xyz(path, start_index=1)
+
+    zwater = water.get_zmat()
+    symb_zwater = zwater.copy()
+    a, b = sympy.symbols('a, b')
+    symb_zwater.unsafe_loc[4, 'dihedral'] = a
+    symb_zwater.unsafe_loc[5, 'bond'] = b
+
+    dihedrals = [90., 120., 180.]
+    bonds = [0.9, 1.]
+    positions = symb_zwater.scan({a: dihedrals, b: bonds}, grid=True)
+    assert positions.shape == (6, len(zwater), 3)
+
+    f = symb_zwater.compile(a, b)
+    cartesians = symb_zwater.scan({a: dihedrals, b: 1.}, as_iterator=True,
+                                  chunksize=2)
+    for dihedral, cartesian in zip(dihedrals, cartesians):
+        expected = f(dihedral, 1.).get_cartesian()
+        assert cc.xyz_functions.allclose(cartesian, expected)
+        assert np.allclose(cartesian.loc[:, ['x', 'y', 'z']],
+                           positions[2 * dihedrals.index(dihedral) + 1])
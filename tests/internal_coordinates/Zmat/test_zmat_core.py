@@ -7,10 +7,14 @@ from __future__ import unicode_literals
 import chemcoord as cc
 from chemcoord.xyz_functions import allclose
 import pytest
-from chemcoord.exceptions import UndefinedCoordinateSystem, InvalidReference
+from chemcoord.exceptions import (UndefinedCoordinateSystem, InvalidReference,
+                                  PhysicalMeaning)
 import os
 import sys
 from sympy import Symbol
+import numpy as np
+import pandas as pd
+from io import StringIO
 
 
 def get_script_path():
@@ -47,3 +51,95 @@ def test_addition_with_sympy():
 
     zmolecule = zmolecule + zmolecule2
     zmolecule.subs(x, 3)
+
+
+def test_interpolate():
+    molecule = cc.Cartesian.read_xyz(
+        os.path.join(STRUCTURE_PATH, 'MIL53_small.xyz'), start_index=1)
+    zmolecule = molecule.get_zmat()
+    zmolecule2 = zmolecule.copy()
+    zmolecule2.unsafe_loc[zmolecule.index[5], 'dihedral'] += 350
+
+    positions = cc.zmat_functions.interpolate(zmolecule, zmolecule2, 11)
+    assert positions.shape == (11, len(zmolecule), 3)
+    cols = ['x', 'y', 'z']
+    assert np.allclose(
+        positions[0], molecule.loc[zmolecule.index, cols].values)
+    step = zmolecule.copy()
+    step.unsafe_loc[zmolecule.index[5], 'dihedral'] -= 1
+    assert np.allclose(positions[1], step.get_cartesian().loc[:, cols])
+
+    f = StringIO()
+    cc.zmat_functions.interpolate(zmolecule, zmolecule2, 11, buf=f,
+                                  file_format='xyz', chunksize=4)
+    assert f.getvalue().count('Created by chemcoord') == 11
+
+
+def test_lazy_last_valid_positions():
+    molecule = cc.Cartesian.read_xyz(
+        os.path.join(STRUCTURE_PATH, 'MIL53_small.xyz'), start_index=1)
+    zmolecule = molecule.get_zmat()
+
+    zmolecule2 = cc.Zmat(zmolecule.loc[:, zmolecule.columns])
+    last_valid = zmolecule2._metadata['last_valid_positions']
+    assert last_valid._positions is None
+    assert zmolecule2.copy()._metadata['last_valid_positions'] is last_valid
+
+    zmolecule2.unsafe_loc[:, 'bond'] = 0.
+    assert np.allclose(last_valid.positions,
+                       zmolecule.get_cartesian().loc[:, ['x', 'y', 'z']])
+
+
+def test_symbolic_last_valid_positions():
+    molecule = cc.Cartesian.read_xyz(
+        os.path.join(STRUCTURE_PATH, 'MIL53_small.xyz'), start_index=1)
+    zmolecule = molecule.get_zmat()
+    frame = zmolecule.loc[:, zmolecule.columns]
+
+    numeric = frame.copy()
+    numeric['bond'] = numeric['bond'].astype('O')
+    last_valid = cc.Zmat(numeric)._metadata['last_valid_positions']
+    assert np.allclose(last_valid.positions,
+                       zmolecule.get_cartesian().loc[:, ['x', 'y', 'z']])
+
+    symbolic = frame.copy()
+    symbolic['bond'] = symbolic['bond'].astype('O')
+    symbolic.loc[symbolic.index[3], 'bond'] = Symbol('x')
+    zmolecule2 = cc.Zmat(symbolic)
+    assert zmolecule2._metadata['last_valid_positions'] is None
+    assert zmolecule2.copy()._metadata['last_valid_positions'] is None
+
+
+def test_series_operand():
+    molecule = cc.Cartesian.read_xyz(
+        os.path.join(STRUCTURE_PATH, 'MIL53_small.xyz'), start_index=1)
+    zmolecule = molecule.get_zmat()
+    distortion = pd.Series([0.5, 0.2, 0.01],
+                           index=['dihedral', 'angle', 'bond'])
+    with cc.TestOperators(False):
+        expected = zmolecule + [0.01, 0.2, 0.5]
+        assert allclose((zmolecule + distortion).get_cartesian(),
+                        expected.get_cartesian())
+        assert np.allclose((zmolecule - distortion).loc[:, 'bond'],
+                           zmolecule.loc[:, 'bond'] - 0.01)
+
+
+def test_fingerprint():
+    molecule = cc.Cartesian.read_xyz(
+        os.path.join(STRUCTURE_PATH, 'MIL53_small.xyz'), start_index=1)
+    zmolecule = molecule.get_zmat()
+    with cc.TestOperators(False):
+        distortion = zmolecule * 0.001
+    fingerprint = zmolecule._get_fingerprint()
+
+    zmolecule2 = zmolecule + distortion
+    assert zmolecule2._fingerprint == fingerprint
+    assert np.allclose(zmolecule2.loc[:, 'bond'],
+                       1.001 * zmolecule.loc[:, 'bond'])
+
+    zmolecule2.safe_loc[zmolecule2.index[3], 'bond'] = 2.
+    assert zmolecule2._fingerprint == fingerprint
+    zmolecule2.unsafe_loc[zmolecule2.index[3], 'atom'] = 'X'
+    assert zmolecule2._fingerprint is None
+    with pytest.raises(PhysicalMeaning):
+        zmolecule + zmolecule2
@@ -0,0 +1,102 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals, with_statement)
+
+import os
+
+import chemcoord as cc
+import numpy as np
+import pytest
+from chemcoord.exceptions import InvalidReference, PhysicalMeaning
+from chemcoord.xyz_functions import allclose
+
+
+def get_script_path():
+    return os.path.dirname(os.path.realpath(__file__))
+
+
+def get_structure_path(script_path):
+    test_path = os.path.join(script_path)
+    while True:
+        structure_path = os.path.join(test_path, 'structures')
+        if os.path.exists(structure_path):
+            return structure_path
+        else:
+            test_path = os.path.join(test_path, '..')
+
+
+STRUCTURE_PATH = get_structure_path(get_script_path())
+
+
+def get_trajectory():
+    return cc.CartesianTrajectory.read_molden(
+        os.path.join(STRUCTURE_PATH, 'total_movement.molden'),
+        start_index=1)[::4]
+
+
+def test_get_cartesian():
+    trajectory = get_trajectory()
+    zmats = trajectory.get_zmat()
+    assert len(zmats) == len(trajectory)
+    cartesians = zmats.get_cartesian()
+    for k in range(len(trajectory)):
+        assert allclose(cartesians[k], trajectory[k], atol=1e-4)
+        assert allclose(zmats[k].get_cartesian(), cartesians[k])
+
+    from_list = cc.ZmatTrajectory.from_zmats(list(zmats))
+    assert np.allclose(from_list.values, zmats.values)
+    sliced = zmats[1:3]
+    assert np.shares_memory(sliced.values, zmats.values)
+    assert np.allclose(sliced.get_cartesian().positions,
+                       cartesians.positions[1:3])
+
+
+def test_arithmetic():
+    zmats = get_trajectory().get_zmat()
+    first = zmats[0]
+    difference = (zmats - first).minimize_dihedrals()
+    assert np.allclose(difference.values[0], 0.)
+    assert np.allclose((difference + first).iupacify().values,
+                       zmats.iupacify().values)
+    assert np.allclose((2 * zmats / 2).values, zmats.values)
+    assert np.allclose((-zmats + zmats).values, 0.)
+
+    other = cc.Cartesian.read_xyz(
+        os.path.join(STRUCTURE_PATH, 'MIL53_small.xyz')).get_zmat()
+    with pytest.raises(PhysicalMeaning):
+        zmats + other
+
+    broken = zmats.copy()
+    broken.values[1, :, 1] = 0.
+    with pytest.raises(InvalidReference) as excinfo:
+        broken.get_cartesian()
+    assert 'frame 1' in str(excinfo.value)
+
+
+def test_dihedral_wrapping():
+    zmats = get_trajectory().get_zmat()
+    shifted = zmats + [0, 0, 350]
+    minimized = shifted.minimize_dihedrals()
+    assert ((-180 <= minimized.values[:, :, 2])
+            & (minimized.values[:, :, 2] < 180)).all()
+    iupac = (zmats + [0, 200, 0]).iupacify()
+    for k in range(len(zmats)):
+        assert np.allclose(iupac.values[k],
+                           (zmats[k] + [0, 200, 0]).iupacify().loc[
+                               :, ['bond', 'angle', 'dihedral']].values
+                           .astype('f8'))
+    unwrapped = minimized.unwrap_dihedrals()
+    assert (abs(np.diff(unwrapped.values[:, :, 2], axis=0)) <= 180).all()
+
+
+def test_binary(tmpdir):
+    zmats = get_trajectory().get_zmat()
+    path = str(tmpdir.join('zmats.cctraj'))
+    zmats.to_binary(path)
+    loaded = cc.ZmatTrajectory.read_binary(path)
+    assert np.array_equal(loaded.values, zmats.values)
+    assert (loaded.construction_table == zmats.construction_table).all().all()
+    assert loaded.has_dummies == zmats.has_dummies
+    assert np.allclose(loaded.get_cartesian().positions,
+                       zmats.get_cartesian().positions)
+    with pytest.raises(ValueError):
+        cc.CartesianTrajectory.read_binary(path)